@@ -0,0 +1,47 @@
+"""
+Compares events/sec and listener calls of per-event listener, batch listener and emit_many
+
+PYTHONPATH=. python week1/benchmarks/bench_batch.py
+"""
+
+from time import perf_counter
+
+from week1.emitter import ClickEvent, EventEmitter
+
+
+def main():
+    number = 10000
+    events = [{"x": i % 1000, "y": 0} for i in range(number)]
+    print(f"{'method':>28} {'events / s':>10} {'calls':>8}")
+
+    for name, batch in {"emit": False, "emit (batch listener)": True}.items():
+        emitter = EventEmitter()
+        calls = 0
+
+        @emitter.on("click", batch=batch)
+        def on_click(event: ClickEvent | list[ClickEvent]):
+            nonlocal calls
+            calls += 1
+
+        started = perf_counter()
+        for event in events:
+            emitter.emit("click", **event)
+        print(f"{name:>28} {number / (perf_counter() - started):>10.0f} {calls:>8}")
+        emitter.close()
+
+    emitter = EventEmitter()
+    calls = 0
+
+    @emitter.on("click", batch=True)
+    def on_clicks(events: list[ClickEvent]):
+        nonlocal calls
+        calls += 1
+
+    started = perf_counter()
+    emitter.emit_many("click", events)
+    print(f"{'emit_many':>28} {number / (perf_counter() - started):>10.0f} {calls:>8}")
+    emitter.close()
+
+
+if __name__ == "__main__":
+    main()
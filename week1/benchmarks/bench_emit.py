@@ -0,0 +1,73 @@
+"""
+Compares emits/sec of asyncio.run per emit (previous), persistent loop and queued dispatch
+
+PYTHONPATH=. python week1/benchmarks/bench_emit.py
+"""
+
+import asyncio
+import logging
+from time import perf_counter
+from typing import Any
+
+from week1.emitter import ClickEvent, EventEmitter
+
+
+def make_emitter(**kwargs: Any) -> EventEmitter:
+    emitter = EventEmitter(**kwargs)
+
+    @emitter.on("click", lambda x: x["x"] < 500)
+    async def on_click_left(event: ClickEvent):
+        pass
+
+    @emitter.on("click", lambda x: x["x"] >= 500)
+    def on_click_right(event: ClickEvent):
+        pass
+
+    return emitter
+
+
+def previous_emit(emitter: EventEmitter, x: int):
+    asyncio.run(emitter._aemit("click", x=x, y=0))
+
+
+def emit(emitter: EventEmitter, x: int):
+    emitter.emit("click", x=x, y=0)
+
+
+def main():
+    logging.disable(logging.WARNING)
+    number = 5000
+    print(f"{'method':>28} {'emits / s':>10}")
+
+    for name, func in {
+        "asyncio.run per emit": previous_emit,
+        "emit (persistent loop)": emit,
+    }.items():
+        emitter = make_emitter()
+        started = perf_counter()
+        for i in range(number):
+            func(emitter, i % 1000)
+        print(f"{name:>28} {number / (perf_counter() - started):>10.0f}")
+        emitter.close()
+
+    emitter = make_emitter()
+    started = perf_counter()
+    futures = [emitter.emit_nowait("click", x=i % 1000, y=0) for i in range(number)]
+    for future in futures:
+        future.result()
+    print(f"{'emit_nowait':>28} {number / (perf_counter() - started):>10.0f}")
+    emitter.close()
+
+    emitter = make_emitter(queue_size=number)
+    started = perf_counter()
+    for i in range(number):
+        emitter.emit("click", x=i % 1000, y=0)
+    enqueued = perf_counter() - started
+    emitter.flush()
+    print(f"{'queued emit':>28} {number / (perf_counter() - started):>10.0f}")
+    print(f"{'queued emit (caller only)':>28} {number / enqueued:>10.0f}")
+    emitter.close()
+
+
+if __name__ == "__main__":
+    main()
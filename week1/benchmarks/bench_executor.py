@@ -0,0 +1,36 @@
+"""
+Compares emit latency of blocking sync listeners run inline (on the loop) and in thread pool
+
+PYTHONPATH=. python week1/benchmarks/bench_executor.py
+"""
+
+import time
+from time import perf_counter
+
+from week1.emitter import Event, EventEmitter
+
+
+def blocking(event: Event):
+    # e.g. file or network io
+    time.sleep(0.01)
+
+
+def main():
+    number = 20
+    listeners = 8
+    print(f"{'executor':>10} {'ms / emit':>10}")
+
+    for executor in ("inline", "thread"):
+        emitter = EventEmitter()
+        for _ in range(listeners):
+            emitter.on("click", executor=executor)(blocking)
+
+        started = perf_counter()
+        for _ in range(number):
+            emitter.emit("click", x=0, y=0)
+        print(f"{executor:>10} {(perf_counter() - started) / number * 1e3:>10.1f}")
+        emitter.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Compares emits/sec of 1k listeners with lambda filters (each called per emit) and indexed Range filters
+
+PYTHONPATH=. python week1/benchmarks/bench_filters.py
+"""
+
+from time import perf_counter
+from typing import Any, Callable
+
+from week1.emitter import Event, EventEmitter
+from week1.filters import Range
+
+
+def callback(event: Event):
+    pass
+
+
+def lambda_filter(lo: int, hi: int) -> Callable[[Event], bool]:
+    return lambda event: lo <= event["x"] < hi
+
+
+def main():
+    size = 1000
+    number = 2000
+    print(f"{'filter':>12} {'emits / s':>10}")
+
+    filters: dict[str, Callable[[int], Any]] = {
+        "lambda": lambda i: lambda_filter(i, i + 10),
+        "Range": lambda i: Range("x", i, i + 10),
+    }
+    for name, make_filter in filters.items():
+        emitter = EventEmitter()
+        for i in range(size):
+            emitter.on("click", make_filter(i))(callback)
+
+        started = perf_counter()
+        for i in range(number):
+            emitter.emit("click", x=i % size, y=0)
+        print(f"{name:>12} {number / (perf_counter() - started):>10.0f}")
+        emitter.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Compares memory and throughput of 100k listeners, pydantic CallbackWrapper set (previous) and slots records
+
+PYTHONPATH=. python week1/benchmarks/bench_listeners.py
+"""
+
+import asyncio
+import tracemalloc
+from time import perf_counter
+from typing import Any, Callable, Coroutine
+
+from pydantic import BaseModel
+
+from week1.emitter import Event, EventEmitter
+
+
+class CallbackWrapper(BaseModel):
+    callback: Callable[..., Coroutine[Any, Any, Any]]
+    hash: int
+    count: int = -1
+
+    async def execute(self, event: Event):
+        await self.callback(event)
+        if self.count > 0:
+            self.count -= 1
+
+    @property
+    def is_valid(self):
+        return self.count != 0
+
+    def __hash__(self):
+        return hash(hash(self.callback) + self.count)
+
+
+class PreviousListeners:
+    def __init__(self):
+        self.listeners: set[CallbackWrapper] = set()
+
+    def on(self, callback: Callable[..., Any], count: int = -1):
+        async def filter_callback(event: Event):
+            callback(event)
+
+        self.listeners.add(
+            CallbackWrapper(callback=filter_callback, hash=hash(callback), count=count)
+        )
+
+    async def aemit(self, name: str):
+        await asyncio.gather(
+            *[wrapper.execute(Event(name=name)) for wrapper in self.listeners]
+        )
+        self.listeners = set(wrapper for wrapper in self.listeners if wrapper.is_valid)
+
+
+def callback(event: Event):
+    pass
+
+
+def measure(name: str, register: Callable[[int], None], emit: Callable[[], None]):
+    size = 100000
+    tracemalloc.start()
+    started = perf_counter()
+    for i in range(size):
+        # every 10th listener is `once`
+        register(1 if i % 10 == 0 else -1)
+    registered = perf_counter() - started
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    started = perf_counter()
+    emit()
+    first_emit = perf_counter() - started
+    started = perf_counter()
+    emit()
+    second_emit = perf_counter() - started
+    print(
+        f"{name:>24} {registered * 1e3:>12.1f} {memory / size:>8.0f}"
+        f" {first_emit * 1e3:>10.1f} {second_emit * 1e3:>10.1f}"
+    )
+
+
+def main():
+    print(
+        f"{'listeners':>24} {'register ms':>12} {'B / each':>8}"
+        f" {'emit1 ms':>10} {'emit2 ms':>10}"
+    )
+
+    previous = PreviousListeners()
+    measure(
+        "CallbackWrapper set",
+        lambda count: previous.on(callback, count),
+        lambda: asyncio.run(previous.aemit("test_event")),
+    )
+
+    emitter = EventEmitter()
+    measure(
+        "slots Listener dict",
+        lambda count: emitter._on_count("test_event", count=count)(callback),
+        lambda: emitter.emit("test_event"),
+    )
+    emitter.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Compares emit throughput of 10 listeners with metrics disabled and enabled
+
+PYTHONPATH=. python week1/benchmarks/bench_metrics.py
+"""
+
+from time import perf_counter
+
+from week1.emitter import Event, EventEmitter
+
+
+def callback(event: Event):
+    pass
+
+
+def measure(name: str, emitter: EventEmitter):
+    size = 20000
+    for _ in range(10):
+        emitter.on("test_event")(callback)
+
+    started = perf_counter()
+    for _ in range(size):
+        emitter.emit_nowait("test_event", value=1)
+    emitter.emit("test_event", value=1)
+    elapsed = perf_counter() - started
+    emitter.close()
+    print(f"{name:>10} {size / elapsed:>12.0f} {elapsed / size * 1e6:>10.1f}")
+    return emitter
+
+
+def main():
+    print(f"{'metrics':>10} {'emits / s':>12} {'us / emit':>10}")
+    measure("disabled", EventEmitter())
+    emitter = measure("enabled", EventEmitter(metrics=True))
+    latency = emitter.stats()["test_event"]["listeners"]
+    print(next(iter(latency.values()))["latency"])
+
+
+if __name__ == "__main__":
+    main()
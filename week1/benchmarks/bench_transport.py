@@ -0,0 +1,66 @@
+"""
+Measures event throughput of Publisher fanning out to 1, 2, 4 and 8 subscriber processes
+
+PYTHONPATH=. python week1/benchmarks/bench_transport.py
+"""
+
+import logging
+import multiprocessing
+import os
+import tempfile
+from multiprocessing.queues import Queue
+from time import perf_counter
+
+from week1.emitter import ClickEvent
+from week1.transport import Publisher, Subscriber
+
+
+def subscribe(path: str, queue: Queue):
+    logging.disable(logging.WARNING)
+    subscriber = Subscriber(path)
+    received = 0
+    total = 0
+
+    @subscriber.on("click", batch=True, max_batch=1024)
+    def on_clicks(events: list[ClickEvent]):
+        nonlocal received, total
+        received += len(events)
+        # some work per event, which is why listeners are moved out
+        total += sum(event["x"] * event["y"] for event in events)
+
+    subscriber.run()
+    queue.put(received)
+
+
+def main():
+    number = 200000
+    chunk = 1000
+    events = [{"x": i % 1000, "y": i % 700} for i in range(number)]
+    context = multiprocessing.get_context("fork")
+    print(f"{'processes':>10} {'published / s':>14} {'delivered / s':>14}")
+
+    for processes in (1, 2, 4, 8):
+        path = os.path.join(tempfile.mkdtemp(), "emitter.sock")
+        queue = context.Queue()
+        with Publisher(path) as publisher:
+            workers = [
+                context.Process(target=subscribe, args=(path, queue))
+                for _ in range(processes)
+            ]
+            for worker in workers:
+                worker.start()
+            publisher.wait_for_subscribers(processes)
+
+            started = perf_counter()
+            for start in range(0, number, chunk):
+                publisher.emit_many("click", events[start : start + chunk])
+        delivered = sum(queue.get() for _ in workers)
+        elapsed = perf_counter() - started
+        for worker in workers:
+            worker.join()
+        assert delivered == number * processes
+        print(f"{processes:>10} {number / elapsed:>14.0f} {delivered / elapsed:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Compares emits/sec of exact event name and wildcard subscriptions (memoized trie match)
+
+PYTHONPATH=. python week1/benchmarks/bench_wildcard.py
+"""
+
+from time import perf_counter
+
+from week1.emitter import Event, EventEmitter
+
+
+def callback(event: Event):
+    pass
+
+
+def main():
+    number = 10000
+    print(f"{'subscriptions':>32} {'emits / s':>10}")
+
+    cases = {
+        "ui.mouse.click": ["ui.mouse.click"],
+        "ui.*.click + 100 other patterns": ["ui.*.click"]
+        + [f"app{i}.**" for i in range(100)],
+        "ui.** + 100 other patterns": ["ui.**"] + [f"app{i}.*.x" for i in range(100)],
+    }
+    for name, patterns in cases.items():
+        emitter = EventEmitter()
+        for pattern in patterns:
+            emitter.on(pattern)(callback)
+
+        started = perf_counter()
+        for _ in range(number):
+            emitter.emit("ui.mouse.click", x=0, y=0)
+        print(f"{name:>32} {number / (perf_counter() - started):>10.0f}")
+        emitter.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,76 @@
 import asyncio
+import itertools
 import logging
-from typing import Any, Callable, Coroutine, TypedDict
-
-from pydantic import BaseModel
+import threading
+from collections import deque
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from time import perf_counter
+from typing import (
+    Any,
+    Callable,
+    Coroutine,
+    Iterable,
+    Literal,
+    Optional,
+    TypedDict,
+)
+
+from pydantic import BaseModel, ConfigDict, PrivateAttr
+
+from week1.filters import FilterIndex
+from week1.metrics import EventMetrics, EventStats, ListenerMetrics, MetricSample
+from week1.patterns import MAX_CACHED_NAMES, PatternTrie
 
 _logger = logging.getLogger(__name__)
 
+Callback = Callable[..., Any]
+
+# unique in process, so listener can be found by id only
+_listener_ids = itertools.count()
+
+# where sync callback runs: on the loop, in shared thread pool or shared process pool
+ExecutorPolicy = Literal["inline", "thread", "process"]
+
+_executors: dict[str, Executor] = {}
+_executor_workers: dict[str, Optional[int]] = {"thread": None, "process": None}
+_executors_lock = threading.Lock()
+
+
+def configure_executors(
+    thread_workers: Optional[int] = None, process_workers: Optional[int] = None
+) -> None:
+    """
+    Sets size of pools shared by every emitter (default of concurrent.futures if None).
+
+    Current pools are shut down after their pending calls, and new ones are created on demand.
+    """
+    with _executors_lock:
+        _executor_workers.update(thread=thread_workers, process=process_workers)
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=True)
+
+
+def _get_executor(policy: str) -> Executor:
+    if (executor := _executors.get(policy)) is not None:
+        return executor
+    with _executors_lock:
+        if (executor := _executors.get(policy)) is None:
+            if policy == "thread":
+                executor = ThreadPoolExecutor(
+                    _executor_workers["thread"], thread_name_prefix="listener"
+                )
+            else:
+                executor = ProcessPoolExecutor(_executor_workers["process"])
+            _executors[policy] = executor
+    return executor
+
 
 def _is_async(callback: Callable[..., Any]):
     return asyncio.iscoroutinefunction(callback)
@@ -20,109 +85,819 @@ class ClickEvent(Event):
     y: int
 
 
-class CallbackWrapper(BaseModel):
-    callback: Callable[..., Coroutine[Any, Any, Any]]
-    hash: int
-    count: int = -1
+Overflow = Literal["block", "drop_oldest", "drop_newest", "coalesce"]
+
+
+class QueueStats(TypedDict):
+    queued: int
+    enqueued: int
+    dispatched: int
+    dropped: int
+    coalesced: int
+
+
+class _QueuedEvent:
+    __slots__ = ("name", "kwargs", "emitted_at")
+
+    def __init__(
+        self, name: str, kwargs: dict[str, Any], emitted_at: Optional[float] = None
+    ):
+        self.name = name
+        self.kwargs = kwargs
+        self.emitted_at = emitted_at
+
+
+class Batch:
+    """
+    Events buffered for batch listener, delivered as list
+    when `max_batch` events are buffered or `max_delay` seconds passed since the first one
+    """
+
+    __slots__ = ("max_batch", "max_delay", "events", "timer")
+
+    def __init__(self, max_batch: int, max_delay: float):
+        if max_batch < 1:
+            raise ValueError("max_batch should be positive")
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.events: list[Event] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+    def take(self, size: Optional[int] = None) -> list[Event]:
+        if size is None or size >= len(self.events):
+            events, self.events = self.events, []
+        else:
+            events = self.events[:size]
+            del self.events[:size]
+        return events
+
+
+class Listener:
+    """
+    Registered callback, `count` is remaining calls (-1 for unlimited)
+    """
+
+    __slots__ = (
+        "id",
+        "name",
+        "callback",
+        "filter",
+        "count",
+        "is_async",
+        "batch",
+        "executor",
+    )
+
+    def __init__(
+        self,
+        id: int,
+        callback: Callback,
+        filter: Optional[Callable[[Event], bool]] = None,
+        count: int = -1,
+        batch: Optional[Batch] = None,
+        executor: ExecutorPolicy = "inline",
+    ):
+        self.id = id
+        # for metrics
+        self.name = f"{getattr(callback, '__qualname__', repr(callback))}#{id}"
+        self.callback = callback
+        self.filter = filter
+        self.count = count
+        self.is_async = _is_async(callback)
+        self.batch = batch
+        if self.is_async and executor != "inline":
+            raise ValueError(
+                "async callback runs on the loop, executor should be inline"
+            )
+        self.executor = executor
+
+
+class Subscription:
+    """
+    Returned by `on` / `once`, used as decorator which registers callback and returns it as is.
 
-    async def execute(self, event: Event):
-        await self.callback(event)
-        if self.count > 0:
-            self.count -= 1
+    ```python
+    subscription = emitter.on("click")
+
+    @subscription
+    def on_click(event: ClickEvent): ...
+
+    subscription.unsubscribe()
+
+    with emitter.on("click") as subscription:
+        subscription(on_click)
+    ```
+
+    Listeners are removed by id in O(1), also while emit is in flight.
+    """
+
+    __slots__ = (
+        "event_name",
+        "_emitter",
+        "_filter",
+        "_count",
+        "_batch",
+        "_executor",
+        "_ids",
+    )
+
+    def __init__(
+        self,
+        emitter: "EventEmitter",
+        event_name: str,
+        filter: Optional[Callable[[Event], bool]] = None,
+        count: int = -1,
+        batch: Optional[tuple[int, float]] = None,
+        executor: ExecutorPolicy = "inline",
+    ):
+        self.event_name = event_name
+        self._emitter = emitter
+        self._filter = filter
+        self._count = count
+        # (max_batch, max_delay)
+        self._batch = batch
+        self._executor = executor
+        self._ids: list[int] = []
+
+    def __call__(self, callback: Callback) -> Callback:
+        listener = Listener(
+            next(_listener_ids),
+            callback,
+            self._filter,
+            self._count,
+            Batch(*self._batch) if self._batch is not None else None,
+            self._executor,
+        )
+        self._emitter._add_listener(self.event_name, listener)
+        self._ids.append(listener.id)
+        return callback
 
     @property
-    def is_valid(self):
-        return self.count != 0
+    def active(self) -> bool:
+        listeners = self._emitter.listeners.get(self.event_name) or {}
+        return any(id in listeners for id in self._ids)
+
+    def unsubscribe(self) -> int:
+        """
+        Removes listeners registered through this subscription, returns how many were still active
+        """
+        removed = self._emitter._remove_listeners(self.event_name, self._ids)
+        self._ids.clear()
+        return len(removed)
 
-    def __hash__(self):
-        return hash(hash(self.callback) + self.count)
+    def __enter__(self) -> "Subscription":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.unsubscribe()
 
 
 class EventEmitter(BaseModel):
-    listeners: dict[str, set[CallbackWrapper]] = {}
+    """
+    Listeners run on one long-lived event loop.
+
+    The loop is owned by the emitter and runs on a daemon thread started on first emit,
+    unless caller's running loop is attached with `EventEmitter(loop=...)`.
+
+    With `queue_size > 0`, `emit` only puts event to a bounded queue and returns,
+    and queued events are dispatched one by one in order.
+    When queue is full, `overflow` decides:
+
+    - block: caller waits for room (event is dropped if emitted on the loop, e.g. in a listener)
+    - drop_oldest / drop_newest: oldest queued or emitted event is dropped
+    - coalesce: queued event of the same name is replaced by the new one (keeping its position),
+      otherwise oldest is dropped
+
+    Event names are dot separated (e.g. `ui.mouse.click`), and subscribed name may have
+    `*` (exactly one segment) or `**` (zero or more segments) as segment, e.g. `ui.*.click`, `ui.**`.
+    Listeners of every matching name are called, grouped by name in order of first subscription.
+
+    With `metrics=True`, emit latency (from emit to all listeners done, including queueing)
+    and per-listener calls, errors and latency are kept in log bucketed histograms, see `stats`.
+    Each sample is also passed to `metrics_hook` if given, e.g. for exporting.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    # event name -> listener id -> listener, in registration order
+    listeners: dict[str, dict[int, Listener]] = {}
+    queue_size: int = 0
+    overflow: Overflow = "block"
+    metrics: bool = False
+    metrics_hook: Optional[Callable[[MetricSample], None]] = None
+
+    # event name -> listener ids indexed by declarative filters
+    _filter_indexes: dict[str, FilterIndex] = PrivateAttr(default_factory=dict)
+    # subscribed event names and patterns
+    _patterns: PatternTrie = PrivateAttr(default_factory=PatternTrie)
+    # warned once
+    _unknown_names: set[str] = PrivateAttr(default_factory=set)
+    # guards listeners of event names being added or removed with their pattern
+    _listeners_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _executor_depths: dict[ExecutorPolicy, int] = PrivateAttr(
+        default_factory=lambda: {"thread": 0, "process": 0}
+    )
+    # event name -> metrics, when `metrics` is enabled
+    _metrics: dict[str, EventMetrics] = PrivateAttr(default_factory=dict)
+    _loop: Optional[asyncio.AbstractEventLoop] = PrivateAttr(default=None)
+    # callbacks of timed out batches
+    _batch_tasks: set["asyncio.Future[Any]"] = PrivateAttr(default_factory=set)
+    _thread: Optional[threading.Thread] = PrivateAttr(default=None)
+    _loop_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _queue: deque[_QueuedEvent] = PrivateAttr(default_factory=deque)
+    # queued event by name, for coalesce
+    _queued_by_name: dict[str, _QueuedEvent] = PrivateAttr(default_factory=dict)
+    _queue_cond: threading.Condition = PrivateAttr(default_factory=threading.Condition)
+    _dispatching: bool = PrivateAttr(default=False)
+    _stats: QueueStats = PrivateAttr(
+        default_factory=lambda: QueueStats(
+            queued=0, enqueued=0, dispatched=0, dropped=0, coalesced=0
+        )
+    )
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None, **data: Any):
+        super().__init__(**data)
+        self._loop = loop
+        for event_name, listeners in self.listeners.items():
+            if listeners:
+                self._patterns.add(event_name)
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is not None:
+            return self._loop
+        with self._loop_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=loop.run_forever, name="event-emitter", daemon=True
+                )
+                self._thread.start()
+                self._loop = loop
+        return self._loop
+
+    def _in_loop(self, loop: asyncio.AbstractEventLoop) -> bool:
+        try:
+            return asyncio.get_running_loop() is loop
+        except RuntimeError:
+            return False
+
+    def close(self) -> None:
+        """
+        Stops owned loop thread after queued events and buffered batches are delivered,
+        attached loop is left running
+        """
+        self.flush()
+        if (loop := self._loop) is not None and loop.is_running():
+            if self._in_loop(loop):
+                # batch callbacks which are coroutines are left to the running loop
+                self._flush_batches()
+            else:
+                asyncio.run_coroutine_threadsafe(self._aflush_batches(), loop).result()
+        with self._loop_lock:
+            loop, thread = self._loop, self._thread
+            if thread is None:
+                return
+            self._loop, self._thread = None, None
+        loop.call_soon_threadsafe(loop.stop)  # type: ignore
+        thread.join()
+        loop.close()  # type: ignore
 
     def _on_count(
         self,
         event_name: str,
-        filter: Callable[[Event], bool] = lambda _: True,
+        filter: Optional[Callable[[Event], bool]] = None,
         count: int = -1,
-    ):
-        if event_name not in self.listeners:
-            self.listeners[event_name] = set()
+        batch: Optional[tuple[int, float]] = None,
+        executor: ExecutorPolicy = "inline",
+    ) -> Subscription:
+        return Subscription(self, event_name, filter, count, batch, executor)
+
+    def _add_listener(self, event_name: str, listener: Listener) -> None:
+        with self._listeners_lock:
+            if not (listeners := self.listeners.setdefault(event_name, {})):
+                self._patterns.add(event_name)
+                self._unknown_names.clear()
+            listeners[listener.id] = listener
+            if (index := self._filter_indexes.get(event_name)) is None:
+                index = self._filter_indexes[event_name] = FilterIndex()
+            index.add(listener.id, listener.filter)
+
+    def _drop_if_empty(self, event_name: str, listeners: dict[int, Listener]) -> None:
+        """
+        Unsubscribes pattern of event name without listeners, with `_listeners_lock` held.
+
+        Name is kept in `listeners` (with no listeners) so that it can still be removed from.
+        """
+        if listeners or self.listeners.get(event_name) is not listeners:
+            return
+        self._filter_indexes.pop(event_name, None)
+        self._patterns.remove(event_name)
+        self._unknown_names.clear()
+
+    def _remove_listeners(self, event_name: str, ids: Iterable[int]) -> list[Listener]:
+        """
+        Removes listeners by id in O(1), pattern of event name is unsubscribed with its last listener
+        """
+        removed: list[Listener] = []
+        with self._listeners_lock:
+            if (listeners := self.listeners.get(event_name)) is None:
+                return removed
+            index = self._filter_indexes.get(event_name) or FilterIndex()
+            for id in ids:
+                if (listener := listeners.pop(id, None)) is not None:
+                    index.discard(id, listener.filter)
+                    removed.append(listener)
+            self._drop_if_empty(event_name, listeners)
+        for listener in removed:
+            self._on_listener_removed(listener)
+        return removed
+
+    def on(
+        self,
+        event_name: str,
+        filter: Optional[Callable[..., bool]] = None,
+        batch: bool = False,
+        max_batch: int = 256,
+        max_delay_ms: float = 5,
+        executor: ExecutorPolicy = "inline",
+    ) -> Subscription:
+        """
+        With `batch=True`, callback receives list of events,
+        at most `max_batch` events buffered for at most `max_delay_ms`.
+
+        Blocking sync callback can be run in shared thread pool with `executor="thread"`,
+        and CPU bound one in shared process pool with `executor="process"` (callback should be picklable).
+        """
+        return self._on_count(
+            event_name,
+            filter,
+            batch=(max_batch, max_delay_ms / 1000) if batch else None,
+            executor=executor,
+        )
 
-        def wrapper(callback: Callable[..., Any]):
-            if _is_async(callback):
+    def once(
+        self,
+        event_name: str,
+        filter: Optional[Callable[..., bool]] = None,
+        executor: ExecutorPolicy = "inline",
+    ) -> Subscription:
+        return self._on_count(event_name, filter, count=1, executor=executor)
 
-                async def filter_callback(event: Event):
-                    if filter(event):
-                        await callback(event)
+    async def _aemit(self, event_name: str, **kwargs: Any) -> None:
+        await self._aemit_many(event_name, [kwargs], flush_batch=False)
 
-            else:
+    async def _aemit_many(
+        self,
+        event_name: str,
+        events_kwargs: list[dict[str, Any]],
+        flush_batch: bool = True,
+        emitted_at: Optional[float] = None,
+    ) -> None:
+        if not (patterns := self._patterns.match(event_name)):
+            if event_name not in self._unknown_names:
+                if len(self._unknown_names) >= MAX_CACHED_NAMES:
+                    self._unknown_names.clear()
+                self._unknown_names.add(event_name)
+                _logger.warning(f"Event {event_name} has no listeners")
+            return
 
-                async def filter_callback(event: Event):
-                    if filter(event):
-                        callback(event)
+        # built once, shared by listeners
+        events = [
+            Event(name=event_name, **kwargs) for kwargs in events_kwargs  # type: ignore
+        ]
+        coroutines: list[Coroutine[Any, Any, Any]] = []
+        errors: list[Exception] = []
+        if not self.metrics:
+            for pattern in patterns:
+                self._dispatch(pattern, events, flush_batch, coroutines, errors)
+            if coroutines:
+                await asyncio.gather(*coroutines)
+            if errors:
+                raise errors[0]
+            return
 
-            self.listeners[event_name].add(
-                CallbackWrapper(
-                    callback=filter_callback, hash=hash(callback), count=count
+        metrics = self._get_metrics(event_name)
+        if emitted_at is None:
+            emitted_at = perf_counter()
+        failed = True
+        try:
+            for pattern in patterns:
+                self._dispatch(
+                    pattern, events, flush_batch, coroutines, errors, metrics
+                )
+            if coroutines:
+                await asyncio.gather(*coroutines)
+            failed = bool(errors)
+        finally:
+            metrics.emits += len(events)
+            self._record(metrics, None, perf_counter() - emitted_at, failed)
+        if errors:
+            raise errors[0]
+
+    def _get_metrics(self, event_name: str) -> EventMetrics:
+        if (metrics := self._metrics.get(event_name)) is None:
+            metrics = self._metrics[event_name] = EventMetrics(event_name)
+        return metrics
+
+    def _record(
+        self,
+        metrics: EventMetrics,
+        listener: Optional[Listener],
+        seconds: float,
+        error: bool,
+    ) -> None:
+        if listener is None:
+            metrics.latency.record(seconds)
+        else:
+            if (listener_metrics := metrics.listeners.get(listener.name)) is None:
+                listener_metrics = metrics.listeners[listener.name] = ListenerMetrics()
+            listener_metrics.calls += 1
+            listener_metrics.errors += error
+            listener_metrics.latency.record(seconds)
+        if self.metrics_hook is None:
+            return
+        try:
+            self.metrics_hook(
+                MetricSample(
+                    kind="emit" if listener is None else "listener",
+                    event_name=metrics.event_name,
+                    listener=None if listener is None else listener.name,
+                    seconds=seconds,
+                    error=error,
                 )
             )
-            return callback
+        except Exception:
+            _logger.exception("metrics hook failed")
 
-        return wrapper
+    async def _measure(
+        self,
+        coroutine: Coroutine[Any, Any, Any],
+        metrics: EventMetrics,
+        listener: Listener,
+    ) -> None:
+        started = perf_counter()
+        error = False
+        try:
+            await coroutine
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self._record(metrics, listener, perf_counter() - started, error)
+
+    def stats(self) -> dict[str, EventStats]:
+        """
+        Snapshot of metrics by event name, empty unless `metrics` is enabled
+        """
+        return {
+            event_name: metrics.stats()
+            for event_name, metrics in list(self._metrics.items())
+        }
+
+    def _dispatch(
+        self,
+        pattern: str,
+        events: list[Event],
+        flush_batch: bool,
+        coroutines: list[Coroutine[Any, Any, Any]],
+        errors: list[Exception],
+        metrics: Optional[EventMetrics] = None,
+    ) -> None:
+        if (listeners := self.listeners.get(pattern)) is None:
+            # unsubscribed after match
+            return
+        index = self._filter_indexes.get(pattern) or FilterIndex()
+        # snapshot, listeners may be changed by callbacks
+        if index.indexed:
+            # index is changed by other threads under the lock
+            with self._listeners_lock:
+                ids = index.candidates(events)
+            candidates = [
+                listener for id in ids if (listener := listeners.get(id)) is not None
+            ]
+        else:
+            candidates = list(listeners.values())
+        for listener in candidates:
+            if listeners.get(listener.id) is not listener:
+                # removed by preceding callback
+                continue
+            if listener.batch is not None:
+                self._add_to_batch(
+                    listeners,
+                    listener,
+                    events,
+                    flush_batch,
+                    coroutines,
+                    errors,
+                    metrics,
+                )
+                continue
+            for event in events:
+                if listener.filter is not None and not listener.filter(event):
+                    continue
+                if listener.count > 0:
+                    listener.count -= 1
+                    if listener.count == 0:
+                        # expired before call, as callback may emit same event again
+                        with self._listeners_lock:
+                            listeners.pop(listener.id, None)
+                            index.discard(listener.id, listener.filter)
+                            self._drop_if_empty(pattern, listeners)
+                self._call(listener, event, coroutines, errors, metrics)
+                if listener.count == 0:
+                    break
+
+    def _call(
+        self,
+        listener: Listener,
+        arg: Any,
+        coroutines: list[Coroutine[Any, Any, Any]],
+        errors: list[Exception],
+        metrics: Optional[EventMetrics] = None,
+    ) -> None:
+        if listener.is_async or listener.executor != "inline":
+            coroutine = (
+                listener.callback(arg)
+                if listener.is_async
+                else self._run_in_executor(listener, arg)
+            )
+            if metrics is not None:
+                coroutine = self._measure(coroutine, metrics, listener)
+            coroutines.append(coroutine)
+            return
+        if metrics is None:
+            try:
+                listener.callback(arg)
+            except Exception as e:
+                # other listeners are still called, like async ones
+                errors.append(e)
+            return
 
-    def on(self, event_name: str, filter: Callable[..., bool] = lambda _: True):
-        return self._on_count(event_name, filter)
+        started = perf_counter()
+        try:
+            listener.callback(arg)
+        except Exception as e:
+            errors.append(e)
+            self._record(metrics, listener, perf_counter() - started, True)
+        else:
+            self._record(metrics, listener, perf_counter() - started, False)
+
+    async def _run_in_executor(self, listener: Listener, arg: Any) -> None:
+        depths = self._executor_depths
+        depths[listener.executor] += 1
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                _get_executor(listener.executor), listener.callback, arg
+            )
+        finally:
+            depths[listener.executor] -= 1
 
-    def once(self, event_name: str, filter: Callable[..., bool] = lambda _: True):
-        return self._on_count(event_name, filter, count=1)
+    def executor_depths(self) -> dict[ExecutorPolicy, int]:
+        """
+        Calls of this emitter's listeners submitted to shared pools and not finished yet
+        """
+        return dict(self._executor_depths)
 
-    async def _aemit(self, event_name: str, **kwargs: Any) -> None:
-        if event_name not in self.listeners.keys():
-            _logger.warning(f"Event {event_name} has no listeners")
-            return
+    def _add_to_batch(
+        self,
+        listeners: dict[int, Listener],
+        listener: Listener,
+        events: list[Event],
+        flush: bool,
+        coroutines: list[Coroutine[Any, Any, Any]],
+        errors: list[Exception],
+        metrics: Optional[EventMetrics] = None,
+    ) -> None:
+        batch: Batch = listener.batch  # type: ignore
+        if listener.filter is not None:
+            events = [event for event in events if listener.filter(event)]
+        batch.events.extend(events)
+
+        while len(batch.events) >= batch.max_batch:
+            self._call(
+                listener, batch.take(batch.max_batch), coroutines, errors, metrics
+            )
+        if flush and batch.events:
+            self._call(listener, batch.take(), coroutines, errors, metrics)
+
+        if not batch.events and batch.timer is not None:
+            batch.timer.cancel()
+            batch.timer = None
+        elif batch.events and batch.timer is None:
+            batch.timer = asyncio.get_running_loop().call_later(
+                batch.max_delay, self._flush_batch, listeners, listener
+            )
 
-        await asyncio.gather(
-            *[
-                callback_wrapper.execute(Event(name=event_name, **kwargs))
-                for callback_wrapper in self.listeners[event_name]
-            ]
+    def _flush_batch(self, listeners: dict[int, Listener], listener: Listener) -> None:
+        listener.batch.timer = None  # type: ignore
+        if listeners.get(listener.id) is listener:
+            # removed listener is delivered by _on_listener_removed
+            self._deliver_batch(listener)
+
+    def _deliver_batch(self, listener: Listener) -> None:
+        """
+        Calls listener with buffered events before window ends, on the loop
+        """
+        batch: Batch = listener.batch  # type: ignore
+        if batch.timer is not None:
+            batch.timer.cancel()
+            batch.timer = None
+        if not (events := batch.take()):
+            return
+        coroutines: list[Coroutine[Any, Any, Any]] = []
+        errors: list[Exception] = []
+        metrics = self._get_metrics(events[0]["name"]) if self.metrics else None
+        self._call(listener, events, coroutines, errors, metrics)
+        for error in errors:
+            _logger.error(
+                f"batch listener of event {events[0]['name']} failed", exc_info=error
+            )
+        for coroutine in coroutines:
+            task = asyncio.ensure_future(coroutine)
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._on_batch_task_done)
+
+    def _flush_batches(self) -> None:
+        for listeners in list(self.listeners.values()):
+            for listener in list(listeners.values()):
+                if listener.batch is not None:
+                    self._deliver_batch(listener)
+
+    async def _aflush_batches(self) -> None:
+        self._flush_batches()
+        while self._batch_tasks:
+            await asyncio.gather(*list(self._batch_tasks), return_exceptions=True)
+
+    def _on_listener_removed(self, listener: Listener) -> None:
+        if listener.batch is None or (loop := self._loop) is None:
+            return
+        if self._in_loop(loop):
+            self._deliver_batch(listener)
+        elif not loop.is_closed():
+            loop.call_soon_threadsafe(self._deliver_batch, listener)
+
+    def _on_batch_task_done(self, task: "asyncio.Future[Any]") -> None:
+        self._batch_tasks.discard(task)
+        if not task.cancelled() and (error := task.exception()) is not None:
+            _logger.error("batch listener failed", exc_info=error)
+
+    def _schedule(self, coroutine: Coroutine[Any, Any, None]) -> "Future[None]":
+        loop = self._get_loop()
+        if self._in_loop(loop):
+            return asyncio.ensure_future(coroutine)  # type: ignore
+        return asyncio.run_coroutine_threadsafe(coroutine, loop)
+
+    def emit_nowait(self, event_name: str, **kwargs: Any) -> "Future[None]":
+        """
+        Schedules listeners on the loop, returns future done when all of them finish
+        """
+        return self._schedule(
+            self._aemit_many(
+                event_name,
+                [kwargs],
+                flush_batch=False,
+                emitted_at=perf_counter() if self.metrics else None,
+            )
         )
 
-        self.listeners[event_name] = set(
-            callback_wrapper
-            for callback_wrapper in self.listeners[event_name]
-            if callback_wrapper.is_valid
+    def emit(self, event_name: str, **kwargs: Any) -> None:
+        """
+        Waits until all listeners finish, except when called on the loop (e.g. in a listener).
+
+        Only enqueues event when `queue_size > 0`.
+        """
+        if self.queue_size > 0:
+            self._enqueue(event_name, kwargs)
+            return
+        future = self.emit_nowait(event_name, **kwargs)
+        if not self._in_loop(self._get_loop()):
+            future.result()
+
+    def emit_many(self, event_name: str, events: Iterable[dict[str, Any]]) -> None:
+        """
+        Emits events (kwargs of each) at once, batch listeners receive them without waiting for window.
+
+        Waits like `emit`, or enqueues each event when `queue_size > 0`.
+        """
+        events_kwargs = list(events)
+        if self.queue_size > 0:
+            for kwargs in events_kwargs:
+                self._enqueue(event_name, kwargs)
+            return
+        future = self._schedule(
+            self._aemit_many(
+                event_name,
+                events_kwargs,
+                emitted_at=perf_counter() if self.metrics else None,
+            )
         )
+        if not self._in_loop(self._get_loop()):
+            future.result()
 
-    def emit(self, event_name: str, **kwargs: Any) -> None:
-        asyncio.run(self._aemit(event_name, **kwargs))
+    async def aemit(self, event_name: str, **kwargs: Any) -> None:
+        loop = self._get_loop()
+        if asyncio.get_running_loop() is loop:
+            await self._aemit(event_name, **kwargs)
+            return
+        await asyncio.wrap_future(self.emit_nowait(event_name, **kwargs))
+
+    def _enqueue(self, event_name: str, kwargs: dict[str, Any]) -> None:
+        loop = self._get_loop()
+        stats = self._stats
+        with self._queue_cond:
+            queue = self._queue
+            if self.overflow == "coalesce" and (
+                queued := self._queued_by_name.get(event_name)
+            ):
+                queued.kwargs = kwargs
+                stats["coalesced"] += 1
+                return
+
+            if len(queue) >= self.queue_size:
+                if self.overflow == "block" and not self._in_loop(loop):
+                    self._queue_cond.wait_for(lambda: len(queue) < self.queue_size)
+                elif self.overflow in ("drop_oldest", "coalesce"):
+                    dropped = queue.popleft()
+                    if self._queued_by_name.get(dropped.name) is dropped:
+                        del self._queued_by_name[dropped.name]
+                    stats["dropped"] += 1
+                else:
+                    stats["dropped"] += 1
+                    return
+
+            event = _QueuedEvent(
+                event_name, kwargs, perf_counter() if self.metrics else None
+            )
+            queue.append(event)
+            if self.overflow == "coalesce":
+                self._queued_by_name[event_name] = event
+            stats["enqueued"] += 1
+            if self._dispatching:
+                return
+            self._dispatching = True
+
+        if self._in_loop(loop):
+            loop.create_task(self._dispatch_queue())
+        else:
+            asyncio.run_coroutine_threadsafe(self._dispatch_queue(), loop)
+
+    async def _dispatch_queue(self) -> None:
+        while True:
+            with self._queue_cond:
+                if not self._queue:
+                    self._dispatching = False
+                    self._queue_cond.notify_all()
+                    return
+                event = self._queue.popleft()
+                if self._queued_by_name.get(event.name) is event:
+                    del self._queued_by_name[event.name]
+                self._queue_cond.notify_all()
+
+            try:
+                await self._aemit_many(
+                    event.name,
+                    [event.kwargs],
+                    flush_batch=False,
+                    emitted_at=event.emitted_at,
+                )
+            except Exception:
+                _logger.exception(f"listener of event {event.name} failed")
+            self._stats["dispatched"] += 1
 
-    def remove_listener(self, event_name: str, callback: Callable[..., Any]) -> int:
-        if event_name not in self.listeners.keys():
-            raise ValueError(f"Event {event_name} has no listeners")
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Waits until queued events are dispatched, returns False on timeout.
 
-        callback_wrappers_to_remove = set(
-            callback_wrapper
-            for callback_wrapper in self.listeners[event_name]
-            if callback_wrapper.hash == hash(callback)
-        )
+        Should not be called on the loop (e.g. in a listener).
+        """
+        with self._queue_cond:
+            return self._queue_cond.wait_for(lambda: not self._dispatching, timeout)
 
-        self.listeners[event_name] = set(
-            callback_wrapper
-            for callback_wrapper in self.listeners[event_name]
-            if callback_wrapper not in callback_wrappers_to_remove
-        )
+    async def aflush(self, timeout: Optional[float] = None) -> bool:
+        return await asyncio.to_thread(self.flush, timeout)
 
-        return len(callback_wrappers_to_remove)
+    def queue_stats(self) -> QueueStats:
+        with self._queue_cond:
+            stats = self._stats.copy()
+            stats["queued"] = len(self._queue)
+        return stats
 
-    def remove_all_listeners(self, event_name: str) -> int:
-        if event_name not in self.listeners.keys():
+    def remove_listener(self, event_name: str, callback: Callable[..., Any]) -> int:
+        """
+        Scans listeners of the event, `Subscription.unsubscribe` removes in O(1)
+        """
+        if (listeners := self.listeners.get(event_name)) is None:
             raise ValueError(f"Event {event_name} has no listeners")
 
-        callback_wrappers_to_remove = self.listeners[event_name]
+        ids_to_remove = [
+            listener.id
+            for listener in list(listeners.values())
+            if listener.callback == callback
+        ]
+        return len(self._remove_listeners(event_name, ids_to_remove))
 
-        self.listeners[event_name] = set()
+    def remove_all_listeners(self, event_name: str) -> int:
+        if (listeners := self.listeners.get(event_name)) is None:
+            raise ValueError(f"Event {event_name} has no listeners")
 
-        return len(callback_wrappers_to_remove)
+        return len(self._remove_listeners(event_name, list(listeners)))
@@ -0,0 +1,205 @@
+from abc import ABC, abstractmethod
+from bisect import bisect_right
+from typing import Any, Hashable, Iterable, Optional, Union
+
+Number = Union[int, float]
+
+
+class FieldFilter(ABC):
+    """
+    Declarative filter on one field of event, indexed by emitter instead of called per listener.
+
+    Still callable, so it can be used wherever a filter function is.
+    """
+
+    __slots__ = ("field",)
+
+    def __init__(self, field: str):
+        self.field = field
+
+    @abstractmethod
+    def __call__(self, event: dict[str, Any]) -> bool: ...
+
+
+class Eq(FieldFilter):
+    __slots__ = ("value",)
+
+    def __init__(self, field: str, value: Hashable):
+        super().__init__(field)
+        self.value = value
+
+    def __call__(self, event: dict[str, Any]) -> bool:
+        return self.field in event and event[self.field] == self.value
+
+    def __repr__(self):
+        return f"Eq({self.field!r}, {self.value!r})"
+
+
+class In(FieldFilter):
+    __slots__ = ("values",)
+
+    def __init__(self, field: str, values: Iterable[Hashable]):
+        super().__init__(field)
+        self.values = frozenset(values)
+
+    def __call__(self, event: dict[str, Any]) -> bool:
+        try:
+            return self.field in event and event[self.field] in self.values
+        except TypeError:
+            # unhashable value
+            return False
+
+    def __repr__(self):
+        return f"In({self.field!r}, {set(self.values)!r})"
+
+
+class Range(FieldFilter):
+    """
+    lo <= event[field] < hi, None for unbounded
+    """
+
+    __slots__ = ("lo", "hi")
+
+    def __init__(
+        self, field: str, lo: Optional[Number] = None, hi: Optional[Number] = None
+    ):
+        super().__init__(field)
+        if lo is not None and hi is not None and lo >= hi:
+            raise ValueError(f"empty range [{lo}, {hi})")
+        self.lo = lo
+        self.hi = hi
+
+    def __call__(self, event: dict[str, Any]) -> bool:
+        if (value := event.get(self.field)) is None:
+            return False
+        try:
+            return (self.lo is None or self.lo <= value) and (
+                self.hi is None or value < self.hi
+            )
+        except TypeError:
+            return False
+
+    def __repr__(self):
+        return f"Range({self.field!r}, {self.lo!r}, {self.hi!r})"
+
+
+class _Segments:
+    """
+    Ranges of a field split into elementary segments between sorted boundaries,
+    each of which keeps ids of ranges covering it
+    """
+
+    __slots__ = ("boundaries", "ids")
+
+    def __init__(self, ranges: dict[int, Range]):
+        self.boundaries = sorted(
+            {r.lo for r in ranges.values() if r.lo is not None}
+            | {r.hi for r in ranges.values() if r.hi is not None}
+        )
+        # segment i is [boundaries[i - 1], boundaries[i])
+        self.ids: list[list[int]] = [[] for _ in range(len(self.boundaries) + 1)]
+        for id, r in ranges.items():
+            start = 0 if r.lo is None else bisect_right(self.boundaries, r.lo)
+            end = (
+                len(self.boundaries)
+                if r.hi is None
+                else bisect_right(self.boundaries, r.hi) - 1
+            )
+            for segment in range(start, end + 1):
+                self.ids[segment].append(id)
+
+    def lookup(self, value: Any) -> list[int]:
+        try:
+            return self.ids[bisect_right(self.boundaries, value)]
+        except TypeError:
+            return []
+
+
+class FilterIndex:
+    """
+    Listener ids of one event name, indexed by declarative filters.
+
+    `Eq`, `In` go to hash buckets of field value and `Range` to elementary segments,
+    so an event only visits listeners whose filter can match.
+    Listeners without (or with callable) filter are always candidates.
+    """
+
+    __slots__ = ("_others", "_buckets", "_ranges", "_segments")
+
+    def __init__(self):
+        self._others: dict[int, None] = {}
+        # field -> value -> ids
+        self._buckets: dict[str, dict[Hashable, dict[int, None]]] = {}
+        # field -> id -> range
+        self._ranges: dict[str, dict[int, Range]] = {}
+        # built lazily, dropped on change
+        self._segments: dict[str, _Segments] = {}
+
+    @property
+    def indexed(self) -> bool:
+        return bool(self._buckets or self._ranges)
+
+    def _bucket_values(self, filter: Union[Eq, In]) -> Iterable[Hashable]:
+        return (filter.value,) if isinstance(filter, Eq) else filter.values
+
+    def add(self, id: int, filter: Any) -> None:
+        if isinstance(filter, (Eq, In)):
+            buckets = self._buckets.setdefault(filter.field, {})
+            for value in self._bucket_values(filter):
+                buckets.setdefault(value, {})[id] = None
+        elif isinstance(filter, Range):
+            self._ranges.setdefault(filter.field, {})[id] = filter
+            self._segments.pop(filter.field, None)
+        else:
+            self._others[id] = None
+
+    def discard(self, id: int, filter: Any) -> None:
+        if isinstance(filter, (Eq, In)):
+            if (buckets := self._buckets.get(filter.field)) is None:
+                return
+            for value in self._bucket_values(filter):
+                if (ids := buckets.get(value)) is not None:
+                    ids.pop(id, None)
+                    if not ids:
+                        del buckets[value]
+            if not buckets:
+                del self._buckets[filter.field]
+        elif isinstance(filter, Range):
+            if (ranges := self._ranges.get(filter.field)) is None:
+                return
+            ranges.pop(id, None)
+            self._segments.pop(filter.field, None)
+            if not ranges:
+                del self._ranges[filter.field]
+        else:
+            self._others.pop(id, None)
+
+    def clear(self) -> None:
+        self._others.clear()
+        self._buckets.clear()
+        self._ranges.clear()
+        self._segments.clear()
+
+    def candidates(self, events: Iterable[dict[str, Any]]) -> list[int]:
+        """
+        Ids of listeners which may match any of events, in registration order
+        """
+        ids = set(self._others)
+        for event in events:
+            for field, buckets in self._buckets.items():
+                if field not in event:
+                    continue
+                try:
+                    if (matched := buckets.get(event[field])) is not None:
+                        ids.update(matched)
+                except TypeError:
+                    # unhashable value
+                    continue
+            for field, ranges in self._ranges.items():
+                if (value := event.get(field)) is None:
+                    continue
+                if (segments := self._segments.get(field)) is None:
+                    segments = self._segments[field] = _Segments(ranges)
+                ids.update(segments.lookup(value))
+        # ids are increasing in registration order
+        return sorted(ids)
@@ -4,19 +4,21 @@ from pynput import mouse
 
 from lib.logger import setup_logger
 from week1.emitter import ClickEvent, EventEmitter
+from week1.filters import Range
 
 _logger = logging.getLogger(__name__)
 
-emitter = EventEmitter()
+# input capture thread never waits for listeners
+emitter = EventEmitter(queue_size=1024, overflow="drop_oldest")
 setup_logger()
 
 
-@emitter.on("click", lambda x: x["x"] < 500)
+@emitter.on("click", Range("x", hi=500))
 async def on_click_left(event: ClickEvent):
     print("CLICK LEFT")
 
 
-@emitter.on("click", lambda x: x["x"] >= 500)
+@emitter.on("click", Range("x", lo=500))
 async def on_click_right(event: ClickEvent):
     print("CLICK RIGHT")
 
@@ -0,0 +1,122 @@
+import math
+from typing import Literal, Optional, TypedDict
+
+# buckets of histogram grow by 2 ** (1 / 8) (about 9%) from 1us, up to about 1000s
+_MIN_SECONDS = 1e-6
+_BUCKETS_PER_DOUBLING = 8
+_BUCKETS = 30 * _BUCKETS_PER_DOUBLING
+
+
+class Histogram:
+    """
+    Log bucketed latency histogram, O(1) to record and fixed in size
+    """
+
+    __slots__ = ("counts", "count", "total")
+
+    def __init__(self):
+        self.counts = [0] * (_BUCKETS + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def record(self, seconds: float) -> None:
+        if seconds <= _MIN_SECONDS:
+            bucket = 0
+        else:
+            bucket = min(
+                math.ceil(math.log2(seconds / _MIN_SECONDS) * _BUCKETS_PER_DOUBLING),
+                _BUCKETS,
+            )
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total += seconds
+
+    def quantile(self, q: float) -> float:
+        """
+        Upper bound of bucket where q-quantile lies, 0 if empty
+        """
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return _MIN_SECONDS * 2 ** (bucket / _BUCKETS_PER_DOUBLING)
+        return _MIN_SECONDS * 2 ** (_BUCKETS / _BUCKETS_PER_DOUBLING)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+class LatencyStats(TypedDict):
+    count: int
+    mean: float
+    p50: float
+    p99: float
+
+
+class ListenerStats(TypedDict):
+    calls: int
+    errors: int
+    latency: LatencyStats
+
+
+class EventStats(TypedDict):
+    emits: int
+    # emit to completion of all listeners
+    latency: LatencyStats
+    listeners: dict[str, ListenerStats]
+
+
+class MetricSample(TypedDict):
+    kind: Literal["emit", "listener"]
+    event_name: str
+    # None for emit
+    listener: Optional[str]
+    seconds: float
+    error: bool
+
+
+def _latency_stats(histogram: Histogram) -> LatencyStats:
+    return LatencyStats(
+        count=histogram.count,
+        mean=histogram.mean,
+        p50=histogram.quantile(0.5),
+        p99=histogram.quantile(0.99),
+    )
+
+
+class ListenerMetrics:
+    __slots__ = ("calls", "errors", "latency")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.latency = Histogram()
+
+    def stats(self) -> ListenerStats:
+        return ListenerStats(
+            calls=self.calls, errors=self.errors, latency=_latency_stats(self.latency)
+        )
+
+
+class EventMetrics:
+    __slots__ = ("event_name", "emits", "latency", "listeners")
+
+    def __init__(self, event_name: str):
+        self.event_name = event_name
+        self.emits = 0
+        self.latency = Histogram()
+        # listener name -> metrics
+        self.listeners: dict[str, ListenerMetrics] = {}
+
+    def stats(self) -> EventStats:
+        return EventStats(
+            emits=self.emits,
+            latency=_latency_stats(self.latency),
+            listeners={
+                name: metrics.stats() for name, metrics in list(self.listeners.items())
+            },
+        )
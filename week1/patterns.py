@@ -0,0 +1,97 @@
+import threading
+from typing import Optional
+
+SEPARATOR = "."
+# exactly one segment
+WILDCARD = "*"
+# zero or more segments
+GLOBSTAR = "**"
+
+MAX_CACHED_NAMES = 4096
+
+
+class _TrieNode:
+    __slots__ = ("children", "pattern")
+
+    def __init__(self):
+        self.children: dict[str, _TrieNode] = {}
+        self.pattern: Optional[str] = None
+
+
+class PatternTrie:
+    """
+    Subscribed event names (e.g. `ui.mouse.click`, `ui.*.click`, `ui.**`) by dot separated segment.
+
+    Patterns matching a concrete event name are memoized per name,
+    and the memo is dropped whenever a pattern is added or removed.
+    """
+
+    def __init__(self):
+        self._root = _TrieNode()
+        # pattern -> order of addition, matches are returned in this order
+        self._order: dict[str, int] = {}
+        # not reused by patterns added after removal
+        self._added = 0
+        self._cache: dict[str, tuple[str, ...]] = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, pattern: str) -> bool:
+        return pattern in self._order
+
+    def add(self, pattern: str) -> None:
+        with self._lock:
+            if pattern in self._order:
+                return
+            node = self._root
+            for segment in pattern.split(SEPARATOR):
+                node = node.children.setdefault(segment, _TrieNode())
+            node.pattern = pattern
+            self._order[pattern] = self._added
+            self._added += 1
+            self._cache = {}
+
+    def remove(self, pattern: str) -> None:
+        """
+        Removes pattern and nodes left without patterns below them
+        """
+        with self._lock:
+            if self._order.pop(pattern, None) is None:
+                return
+            segments = pattern.split(SEPARATOR)
+            path = [self._root]
+            for segment in segments:
+                path.append(path[-1].children[segment])
+            path[-1].pattern = None
+            for depth in range(len(segments), 0, -1):
+                node = path[depth]
+                if node.children or node.pattern is not None:
+                    break
+                del path[depth - 1].children[segments[depth - 1]]
+            self._cache = {}
+
+    def match(self, event_name: str) -> tuple[str, ...]:
+        if (patterns := self._cache.get(event_name)) is not None:
+            return patterns
+        with self._lock:
+            matched: set[str] = set()
+            self._match(self._root, event_name.split(SEPARATOR), 0, matched)
+            patterns = tuple(sorted(matched, key=self._order.__getitem__))
+            if len(self._cache) >= MAX_CACHED_NAMES:
+                self._cache = {}
+            self._cache[event_name] = patterns
+        return patterns
+
+    def _match(
+        self, node: _TrieNode, segments: list[str], start: int, matched: set[str]
+    ) -> None:
+        if (globstar := node.children.get(GLOBSTAR)) is not None:
+            for next_start in range(start, len(segments) + 1):
+                self._match(globstar, segments, next_start, matched)
+        if start == len(segments):
+            if node.pattern is not None:
+                matched.add(node.pattern)
+            return
+        if (child := node.children.get(segments[start])) is not None:
+            self._match(child, segments, start + 1, matched)
+        if (wildcard := node.children.get(WILDCARD)) is not None:
+            self._match(wildcard, segments, start + 1, matched)
@@ -5,4 +5,6 @@ from week1.emitter import EventEmitter
 
 @pytest.fixture(scope="function")
 def emitter():
-    return EventEmitter()
+    emitter = EventEmitter()
+    yield emitter
+    emitter.close()
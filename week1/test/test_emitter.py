@@ -1,13 +1,25 @@
 import asyncio
 import logging
+import os
+import threading
+import time
+from threading import Timer
 
 import pytest
 
 from week1.emitter import ClickEvent, Event, EventEmitter
+from week1.filters import Eq, FieldFilter, FilterIndex, In, Range
+from week1.patterns import PatternTrie
 
 _logger = logging.getLogger(__name__)
 
 
+def _write_pid(event: Event):
+    # runs in process pool
+    with open(event["path"], "a") as f:
+        f.write(f"{os.getpid()}\n")
+
+
 @pytest.mark.event_emitter
 class TestEventEmitter:
     def test_on(self, emitter: EventEmitter):
@@ -130,3 +142,490 @@ class TestEventEmitter:
         emitter.emit("test_event")
         assert flag_a is True
         assert flag_b is True
+
+    def test_persistent_loop(self, emitter: EventEmitter):
+        threads: list[threading.Thread] = []
+
+        @emitter.on("test_event")
+        async def _a(event: Event):
+            threads.append(threading.current_thread())
+
+        emitter.emit("test_event")
+        emitter.emit("test_event")
+        assert len(threads) == 2
+        assert threads[0] is threads[1] is not threading.current_thread()
+
+    def test_emit_nowait(self, emitter: EventEmitter):
+        released = threading.Event()
+        flag_a = False
+
+        @emitter.on("test_event")
+        async def _a(event: Event):
+            nonlocal flag_a
+            await asyncio.get_running_loop().run_in_executor(None, released.wait)
+            flag_a = True
+
+        future = emitter.emit_nowait("test_event")
+        assert flag_a is False
+        released.set()
+        future.result(timeout=1)
+        assert flag_a is True
+
+    async def test_aemit(self, emitter: EventEmitter):
+        events: list[Event] = []
+
+        @emitter.on("test_event")
+        async def _a(event: Event):
+            events.append(event)
+            if event["depth"] < 2:
+                # emit in listener should not wait for itself
+                emitter.emit("test_event", depth=event["depth"] + 1)
+
+        await emitter.aemit("test_event", depth=0)
+        await asyncio.sleep(0.1)
+        assert [event["depth"] for event in events] == [0, 1, 2]
+
+    async def test_attached_loop(self):
+        emitter = EventEmitter(loop=asyncio.get_running_loop())
+        threads: list[threading.Thread] = []
+
+        @emitter.on("test_event")
+        def _a(event: Event):
+            threads.append(threading.current_thread())
+
+        await emitter.aemit("test_event")
+        await asyncio.wrap_future(
+            await asyncio.to_thread(emitter.emit_nowait, "test_event")
+        )
+        assert threads == [threading.current_thread()] * 2
+        emitter.close()
+
+    @pytest.mark.parametrize(
+        "overflow, expected_xs, dropped, coalesced",
+        [
+            ("block", [0, 1, 2, 3, 4], 0, 0),
+            ("drop_oldest", [0, 3, 4], 2, 0),
+            ("drop_newest", [0, 1, 2], 2, 0),
+            ("coalesce", [0, 4], 0, 3),
+        ],
+    )
+    def test_queue(self, overflow, expected_xs, dropped, coalesced):
+        emitter = EventEmitter(queue_size=2, overflow=overflow)
+        released = threading.Event()
+        xs: list[int] = []
+
+        @emitter.on("click")
+        async def _a(event: ClickEvent):
+            # first event holds dispatcher until released
+            await asyncio.get_running_loop().run_in_executor(None, released.wait)
+            xs.append(event["x"])
+
+        if overflow == "block":
+            Timer(0.2, released.set).start()
+        started = time.perf_counter()
+        for x in range(5):
+            emitter.emit("click", x=x, y=0)
+            if x == 0:
+                # wait for dispatcher to take first event
+                while emitter.queue_stats()["queued"]:
+                    time.sleep(0.001)
+        assert (time.perf_counter() - started >= 0.2) is (overflow == "block")
+
+        released.set()
+        assert emitter.flush(timeout=1) is True
+        assert xs == expected_xs
+        stats = emitter.queue_stats()
+        assert stats["queued"] == 0
+        assert stats["dropped"] == dropped
+        assert stats["coalesced"] == coalesced
+        assert stats["dispatched"] == len(expected_xs)
+        emitter.close()
+
+    def test_listener_order(self, emitter: EventEmitter):
+        called: list[int] = []
+
+        for idx in range(10):
+            if idx % 3 == 0:
+                emitter.once("test_event")(lambda event, idx=idx: called.append(idx))
+            else:
+                emitter.on("test_event")(lambda event, idx=idx: called.append(idx))
+
+        emitter.emit("test_event")
+        assert called == list(range(10))
+        emitter.emit("test_event")
+        assert called[10:] == [idx for idx in range(10) if idx % 3]
+
+    def test_once_with_filter(self, emitter: EventEmitter):
+        xs: list[int] = []
+
+        @emitter.once("click", filter=lambda event: event["x"] >= 500)
+        def _a(event: ClickEvent):
+            xs.append(event["x"])
+
+        emitter.emit("click", x=100, y=0)
+        assert len(emitter.listeners["click"]) == 1
+        emitter.emit("click", x=600, y=0)
+        emitter.emit("click", x=700, y=0)
+        assert xs == [600]
+        assert len(emitter.listeners["click"]) == 0
+
+    def test_subscription(self, emitter: EventEmitter):
+        called: list[str] = []
+
+        def _a(event: Event):
+            called.append("a")
+
+        subscription = emitter.on("test_event")
+        assert subscription(_a) is _a
+        assert subscription.active is True
+
+        with emitter.once("test_event") as once:
+            once(lambda event: called.append("b"))
+            emitter.emit("test_event")
+        assert called == ["a", "b"]
+        assert once.unsubscribe() == 0
+
+        assert subscription.unsubscribe() == 1
+        assert subscription.active is False
+        assert len(emitter.listeners["test_event"]) == 0
+
+    def test_unsubscribe_in_emit(self, emitter: EventEmitter):
+        called: list[str] = []
+
+        @emitter.on("test_event")
+        def _a(event: Event):
+            called.append("a")
+            subscription.unsubscribe()
+
+        subscription = emitter.on("test_event")
+        subscription(lambda event: called.append("b"))
+
+        emitter.emit("test_event")
+        emitter.emit("test_event")
+        assert called == ["a", "a"]
+
+    def test_emit_many(self, emitter: EventEmitter):
+        xs: list[int] = []
+        batches: list[list[int]] = []
+
+        @emitter.on("click")
+        def _a(event: ClickEvent):
+            xs.append(event["x"])
+
+        @emitter.on("click", batch=True, max_batch=3, max_delay_ms=1000)
+        async def _b(events: list[ClickEvent]):
+            batches.append([event["x"] for event in events])
+
+        emitter.emit_many("click", [{"x": x, "y": 0} for x in range(7)])
+        assert xs == list(range(7))
+        assert batches == [[0, 1, 2], [3, 4, 5], [6]]
+
+    def test_batch_window(self, emitter: EventEmitter):
+        batches: list[list[int]] = []
+
+        @emitter.on(
+            "click",
+            filter=lambda event: event["x"] % 2 == 0,
+            batch=True,
+            max_batch=3,
+            max_delay_ms=50,
+        )
+        def _a(events: list[ClickEvent]):
+            batches.append([event["x"] for event in events])
+
+        for x in range(8):
+            emitter.emit("click", x=x, y=0)
+        # size window
+        assert batches == [[0, 2, 4]]
+
+        # time window
+        time.sleep(0.2)
+        assert batches == [[0, 2, 4], [6]]
+
+    def test_close_delivers_batches(self):
+        emitter = EventEmitter()
+        batches: list[list[int]] = []
+        async_batches: list[list[int]] = []
+
+        @emitter.on("click", batch=True, max_batch=100, max_delay_ms=1000)
+        def _a(events: list[ClickEvent]):
+            batches.append([event["x"] for event in events])
+
+        @emitter.on("click", batch=True, max_batch=100, max_delay_ms=1000)
+        async def _b(events: list[ClickEvent]):
+            await asyncio.sleep(0.01)
+            async_batches.append([event["x"] for event in events])
+
+        for x in range(5):
+            emitter.emit("click", x=x, y=0)
+        assert batches == []
+        emitter.close()
+        assert batches == [[0, 1, 2, 3, 4]]
+        assert async_batches == [[0, 1, 2, 3, 4]]
+
+    def test_unsubscribe_delivers_batch(self):
+        emitter = EventEmitter()
+        batches: list[list[int]] = []
+        delivered = threading.Event()
+
+        def _a(events: list[ClickEvent]):
+            batches.append([event["x"] for event in events])
+            delivered.set()
+
+        subscription = emitter.on("click", batch=True, max_delay_ms=1000)
+        subscription(_a)
+        for x in range(3):
+            emitter.emit("click", x=x, y=0)
+        subscription.unsubscribe()
+        assert delivered.wait(0.5)
+        assert batches == [[0, 1, 2]]
+
+        # not delivered again by the timer or on close
+        emitter.close()
+        assert batches == [[0, 1, 2]]
+
+    def test_declarative_filters(self, emitter: EventEmitter):
+        called: list[str] = []
+
+        def listen(name: str, filter):
+            subscription = emitter.on("click", filter)
+            subscription(lambda event: called.append(name))
+            return subscription
+
+        listen("left", Range("x", hi=500))
+        right = listen("right", Range("x", lo=500))
+        listen("middle", Range("x", 250, 750))
+        listen("top", Eq("y", 0))
+        listen("button", In("button", ["left", "middle"]))
+        listen("lambda", lambda event: event.get("x") == 100)
+
+        def emit(**kwargs) -> list[str]:
+            called.clear()
+            emitter.emit("click", **kwargs)
+            return called
+
+        assert emit(x=100, y=0) == ["left", "top", "lambda"]
+        assert emit(x=500, y=1, button="middle") == ["right", "middle", "button"]
+        assert emit(x=750, y="top", button=["unhashable"]) == ["right"]
+        assert emit(y=0) == ["top"]
+
+        right.unsubscribe()
+        assert emit(x=600, y=1) == ["middle"]
+
+    def test_field_filter_is_abstract(self):
+        class Gt(FieldFilter):
+            pass
+
+        with pytest.raises(TypeError):
+            Gt("x")
+        with pytest.raises(TypeError):
+            FieldFilter("x")  # type: ignore
+
+    def test_filter_index(self):
+        index = FilterIndex()
+        for id in range(1000):
+            index.add(id, Range("x", id, id + 10))
+        index.add(1000, Eq("x", 5))
+
+        assert index.candidates([{"x": 5}]) == list(range(6)) + [1000]
+        assert index.candidates([{"x": 5000}]) == []
+        assert index.candidates([{"x": 0}, {"x": 995}]) == [0] + list(range(986, 996))
+
+        for id in range(1000):
+            index.discard(id, Range("x", id, id + 10))
+        assert index.candidates([{"x": 5}]) == [1000]
+        index.discard(1000, Eq("x", 5))
+        assert index.indexed is False
+
+    def test_filters_changed_during_emit(self, emitter: EventEmitter):
+        class SlowHash(int):
+            def __hash__(self):
+                # lets subscribing thread run while index is being looked up
+                time.sleep(0.0001)
+                return super().__hash__()
+
+        stopped = threading.Event()
+        errors: list[Exception] = []
+
+        def churn():
+            try:
+                for i in range(2000):
+                    subscriptions = [
+                        emitter.on("click", Eq(f"eq{i}", i)),
+                        emitter.on("click", Range(f"range{i}", lo=i)),
+                    ]
+                    for subscription in subscriptions:
+                        subscription(lambda event: None)
+                    for subscription in subscriptions:
+                        subscription.unsubscribe()
+            except Exception as e:
+                errors.append(e)
+            finally:
+                stopped.set()
+
+        called: list[int] = []
+        for i in range(10):
+            emitter.on("click", Eq(f"field{i}", 0))(lambda event: called.append(1))
+        thread = threading.Thread(target=churn)
+        thread.start()
+        emitted = 0
+        while not stopped.is_set():
+            emitter.emit("click", **{f"field{i}": SlowHash(0) for i in range(10)})
+            emitted += 1
+        thread.join()
+        assert errors == []
+        assert len(called) == emitted * 10
+
+    def test_wildcard(self, emitter: EventEmitter, caplog: pytest.LogCaptureFixture):
+        called: list[tuple[str, str]] = []
+
+        def listen(pattern: str):
+            emitter.on(pattern)(lambda event: called.append((pattern, event["name"])))
+
+        def emit(event_name: str) -> list[str]:
+            called.clear()
+            emitter.emit(event_name)
+            return [pattern for pattern, name in called if name == event_name]
+
+        listen("ui.mouse.click")
+        listen("ui.*.click")
+        listen("ui.**")
+        assert emit("ui.mouse.click") == ["ui.mouse.click", "ui.*.click", "ui.**"]
+        assert emit("ui.key.click") == ["ui.*.click", "ui.**"]
+        assert emit("ui") == ["ui.**"]
+        assert emit("ui.mouse.move.x") == ["ui.**"]
+
+        # memo of matched names is invalidated by new pattern
+        listen("**.move.*")
+        assert emit("ui.mouse.move.x") == ["ui.**", "**.move.*"]
+        assert emit("move.y") == ["**.move.*"]
+
+        with caplog.at_level(logging.WARNING):
+            assert emit("app.start") == []
+            assert emit("app.start") == []
+        assert [r.message for r in caplog.records].count(
+            "Event app.start has no listeners"
+        ) == 1
+
+    def test_unsubscribed_patterns(self, emitter: EventEmitter):
+        called: list[str] = []
+
+        star = emitter.on("ui.*.click")
+        star(lambda event: called.append("star"))
+        emitter.on("ui.mouse.click")(lambda event: called.append("exact"))
+        emitter.emit("ui.mouse.click")
+        assert called == ["star", "exact"]
+
+        # memo of matched names is invalidated by removed pattern
+        star.unsubscribe()
+        assert len(emitter.listeners["ui.*.click"]) == 0
+        assert "ui.*.click" not in emitter._patterns
+        called.clear()
+        emitter.emit("ui.mouse.click")
+        assert called == ["exact"]
+
+        # name without listeners can still be removed from
+        assert emitter.remove_all_listeners("ui.*.click") == 0
+        assert emitter.remove_listener("ui.*.click", called.append) == 0
+
+        # subscribed again by the same subscription
+        star(lambda event: called.append("star"))
+        called.clear()
+        emitter.emit("ui.key.click")
+        assert called == ["star"]
+
+    def test_pattern_order_after_remove(self):
+        patterns = PatternTrie()
+        for pattern in ["a", "b", "x.y"]:
+            patterns.add(pattern)
+        patterns.remove("a")
+        patterns.remove("b")
+        patterns.add("x.*")
+        assert patterns.match("x.y") == ("x.y", "x.*")
+
+    def test_unique_names_not_leaked(self, emitter: EventEmitter):
+        for i in range(100):
+            with emitter.on(f"job.{i}.done") as subscription:
+                subscription(lambda event: None)
+                emitter.emit(f"job.{i}.done")
+        emitter.emit("job.unknown")
+        assert not any(emitter.listeners.values())
+        assert emitter._patterns.match("job.1.done") == ()
+        assert emitter._patterns._root.children == {}
+        assert emitter._filter_indexes == {}
+
+        # names warned as unknown are forgotten when patterns change
+        emitter.on("job.*")(lambda event: None)
+        assert emitter._unknown_names == set()
+
+    def test_thread_executor(self, emitter: EventEmitter):
+        released = threading.Event()
+        threads: list[threading.Thread] = []
+
+        for _ in range(4):
+
+            @emitter.on("test_event", executor="thread")
+            def _a(event: Event):
+                released.wait(timeout=1)
+                threads.append(threading.current_thread())
+
+        future = emitter.emit_nowait("test_event")
+        time.sleep(0.1)
+        assert emitter.executor_depths() == {"thread": 4, "process": 0}
+        released.set()
+        future.result(timeout=1)
+        assert emitter.executor_depths() == {"thread": 0, "process": 0}
+        assert len(set(threads)) == 4
+
+        with pytest.raises(ValueError):
+
+            @emitter.on("test_event", executor="thread")
+            async def _b(event: Event):
+                pass
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="fork is not supported")
+    def test_process_executor(self, emitter: EventEmitter, tmp_path):
+        path = tmp_path / "pids"
+        emitter.on("test_event", executor="process")(_write_pid)
+
+        emitter.emit_many("test_event", [{"path": str(path)}] * 2)
+        pids = path.read_text().split()
+        assert len(pids) == 2
+        assert str(os.getpid()) not in pids
+
+    def test_metrics(self):
+        samples = []
+        emitter = EventEmitter(metrics=True, metrics_hook=samples.append)
+
+        @emitter.on("test_event")
+        def _a(event: Event):
+            if event.get("fail"):
+                raise ValueError()
+
+        @emitter.on("test_event")
+        async def _b(event: Event):
+            await asyncio.sleep(0.01)
+
+        emitter.emit_many("test_event", [{}, {}])
+        with pytest.raises(ValueError):
+            emitter.emit("test_event", fail=True)
+        emitter.close()
+
+        stats = emitter.stats()["test_event"]
+        assert stats["emits"] == 3
+        assert stats["latency"]["count"] == 2
+        assert stats["latency"]["p99"] >= 0.01
+        a, b = stats["listeners"].values()
+        assert (a["calls"], a["errors"]) == (3, 1)
+        assert (b["calls"], b["errors"]) == (3, 0)
+        assert b["latency"]["p50"] >= 0.01
+        assert [s["kind"] for s in samples].count("emit") == 2
+        assert [s["error"] for s in samples if s["kind"] == "emit"] == [False, True]
+
+    def test_metrics_disabled(self, emitter: EventEmitter):
+        @emitter.on("test_event")
+        def _a(event: Event):
+            pass
+
+        emitter.emit("test_event")
+        assert emitter.stats() == {}
@@ -0,0 +1,81 @@
+import logging
+import multiprocessing
+import os
+from multiprocessing.queues import Queue
+
+import pytest
+
+from week1.emitter import ClickEvent, Event
+from week1.filters import Range
+from week1.transport import Publisher, Subscriber, decode_frames, encode_frame
+
+_logger = logging.getLogger(__name__)
+
+
+def _subscribe(path: str, queue: Queue):
+    subscriber = Subscriber(path)
+
+    @subscriber.on("ui.*.click", Range("x", hi=500))
+    def _a(event: ClickEvent):
+        queue.put(("a", event["name"], event["x"]))
+
+    @subscriber.once("ui.key")
+    def _b(event: Event):
+        queue.put(("b", event["name"], event["key"]))
+
+    subscriber.run()
+    queue.put(None)
+
+
+@pytest.mark.event_emitter
+class TestTransport:
+    def test_frames(self):
+        buffer = bytearray()
+        for i in range(3):
+            buffer += encode_frame(("click", {"x": i, "y": 0.5}))
+        buffer += encode_frame(("click", {"x": 3}))[:-1]
+
+        assert decode_frames(buffer) == [
+            ("click", {"x": i, "y": 0.5}) for i in range(3)
+        ]
+        buffer += encode_frame(("click", {"x": 3}))[-1:]
+        assert decode_frames(buffer) == [("click", {"x": 3})]
+        assert buffer == bytearray()
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="fork is not supported")
+    def test_fan_out(self, tmp_path):
+        path = str(tmp_path / "emitter.sock")
+        context = multiprocessing.get_context("fork")
+        queue = context.Queue()
+
+        with Publisher(path) as publisher:
+            processes = [
+                context.Process(target=_subscribe, args=(path, queue)) for _ in range(2)
+            ]
+            for process in processes:
+                process.start()
+            assert publisher.wait_for_subscribers(2, timeout=5)
+
+            publisher.emit("ui.mouse.click", x=100, y=0)
+            publisher.emit_many(
+                "ui.touch.click", [{"x": 200, "y": 0}, {"x": 600, "y": 0}]
+            )
+            publisher.emit("ui.key", key="a")
+            publisher.emit("ui.key", key="b")
+            publisher.emit("not.subscribed", x=0)
+
+        received = []
+        for _ in processes:
+            while (item := queue.get(timeout=5)) is not None:
+                received.append(item)
+        for process in processes:
+            process.join(timeout=5)
+
+        assert sorted(received) == sorted(
+            [
+                ("a", "ui.mouse.click", 100),
+                ("a", "ui.touch.click", 200),
+                ("b", "ui.key", "a"),
+            ]
+            * 2
+        )
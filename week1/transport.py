@@ -0,0 +1,224 @@
+import logging
+import marshal
+import os
+import socket
+import struct
+import threading
+from typing import Any, Callable, Iterable, Optional
+
+from week1.emitter import Event, EventEmitter, Subscription
+from week1.patterns import PatternTrie
+
+_logger = logging.getLogger(__name__)
+
+# frame is length prefix + marshal payload
+_LENGTH = struct.Struct("<I")
+_RECV_SIZE = 256 * 1024
+
+
+def encode_frame(payload: Any) -> bytes:
+    data = marshal.dumps(payload)
+    return _LENGTH.pack(len(data)) + data
+
+
+def decode_frames(buffer: bytearray) -> list[Any]:
+    """
+    Pops complete frames from the front of buffer
+    """
+    payloads: list[Any] = []
+    offset = 0
+    while len(buffer) - offset >= _LENGTH.size:
+        (length,) = _LENGTH.unpack_from(buffer, offset)
+        end = offset + _LENGTH.size + length
+        if len(buffer) < end:
+            break
+        payloads.append(marshal.loads(memoryview(buffer)[offset + _LENGTH.size : end]))
+        offset = end
+    del buffer[:offset]
+    return payloads
+
+
+class Publisher:
+    """
+    Fans events out to `Subscriber` processes over a Unix domain socket.
+
+    Each event is encoded once as `(event_name, kwargs)` frame (marshal, so values should be
+    builtin types) and written only to subscribers which declared a matching event name.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if os.path.exists(path):
+            os.unlink(path)
+        self._sock.bind(path)
+        self._sock.listen()
+        self._patterns = PatternTrie()
+        self._connections: dict[str, list[socket.socket]] = {}
+        self._subscribed = threading.Condition()
+        # frames of concurrent emits should not interleave
+        self._send_lock = threading.Lock()
+        self._closed = False
+        self._accept_thread = threading.Thread(
+            target=self._accept, name="publisher-accept", daemon=True
+        )
+        self._accept_thread.start()
+
+    def __enter__(self) -> "Publisher":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._subscribed:
+            return len({id(c) for cs in self._connections.values() for c in cs})
+
+    def _accept(self) -> None:
+        while not self._closed:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            # first frame is subscribed event names
+            buffer = bytearray()
+            while not (frames := decode_frames(buffer)):
+                if not (data := conn.recv(_RECV_SIZE)):
+                    break
+                buffer += data
+            if not frames:
+                conn.close()
+                continue
+            with self._subscribed:
+                for event_name in frames[0]:
+                    self._patterns.add(event_name)
+                    self._connections.setdefault(event_name, []).append(conn)
+                self._subscribed.notify_all()
+
+    def wait_for_subscribers(self, count: int, timeout: Optional[float] = None) -> bool:
+        with self._subscribed:
+            return self._subscribed.wait_for(
+                lambda: self.subscriber_count >= count, timeout
+            )
+
+    def _targets(self, event_name: str) -> list[socket.socket]:
+        with self._subscribed:
+            targets: dict[int, socket.socket] = {}
+            for pattern in self._patterns.match(event_name):
+                for conn in self._connections.get(pattern, ()):
+                    targets[id(conn)] = conn
+            return list(targets.values())
+
+    def _send(self, event_name: str, data: bytes) -> None:
+        with self._send_lock:
+            for conn in self._targets(event_name):
+                try:
+                    conn.sendall(data)
+                except OSError:
+                    _logger.warning("subscriber disconnected")
+                    self._drop(conn)
+
+    def _drop(self, conn: socket.socket) -> None:
+        with self._subscribed:
+            for event_name, connections in list(self._connections.items()):
+                if conn in connections:
+                    connections.remove(conn)
+                if not connections:
+                    del self._connections[event_name]
+                    self._patterns.remove(event_name)
+        conn.close()
+
+    def emit(self, event_name: str, **kwargs: Any) -> None:
+        self._send(event_name, encode_frame((event_name, kwargs)))
+
+    def emit_many(self, event_name: str, events: Iterable[dict[str, Any]]) -> None:
+        """
+        Written at once, subscribers dispatch them with `EventEmitter.emit_many`
+        """
+        self._send(
+            event_name,
+            b"".join(encode_frame((event_name, kwargs)) for kwargs in events),
+        )
+
+    def close(self) -> None:
+        """
+        Subscribers return from `run` after events already written
+        """
+        self._closed = True
+        self._sock.close()
+        with self._subscribed:
+            connections = {id(c): c for cs in self._connections.values() for c in cs}
+            self._connections.clear()
+        for conn in connections.values():
+            conn.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+class Subscriber:
+    """
+    Listeners of a subscriber process, declared same as `EventEmitter`.
+
+    ```python
+    subscriber = Subscriber(path)
+
+    @subscriber.on("click")
+    def on_click(event: ClickEvent): ...
+
+    subscriber.run()
+    ```
+
+    Event names are sent to publisher on `run`, so listeners should be declared before.
+    """
+
+    def __init__(self, path: str, emitter: Optional[EventEmitter] = None):
+        self.path = path
+        self.emitter = emitter if emitter is not None else EventEmitter()
+
+    def on(
+        self,
+        event_name: str,
+        filter: Optional[Callable[[Event], bool]] = None,
+        **kwargs: Any,
+    ) -> Subscription:
+        return self.emitter.on(event_name, filter, **kwargs)
+
+    def once(
+        self,
+        event_name: str,
+        filter: Optional[Callable[[Event], bool]] = None,
+        **kwargs: Any,
+    ) -> Subscription:
+        return self.emitter.once(event_name, filter, **kwargs)
+
+    def run(self) -> None:
+        """
+        Dispatches received events until publisher closes
+        """
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(self.path)
+            sock.sendall(encode_frame(list(self.emitter.listeners)))
+            buffer = bytearray()
+            while data := sock.recv(_RECV_SIZE):
+                buffer += data
+                self._dispatch(decode_frames(buffer))
+        self.emitter.close()
+
+    def _dispatch(self, frames: list[tuple[str, dict[str, Any]]]) -> None:
+        # consecutive events of same name are emitted at once
+        start = 0
+        for end in range(1, len(frames) + 1):
+            if end < len(frames) and frames[end][0] == frames[start][0]:
+                continue
+            event_name = frames[start][0]
+            try:
+                if end - start == 1:
+                    self.emitter.emit(event_name, **frames[start][1])
+                else:
+                    self.emitter.emit_many(
+                        event_name, [kwargs for _, kwargs in frames[start:end]]
+                    )
+            except Exception:
+                _logger.exception(f"listener of event {event_name} failed")
+            start = end
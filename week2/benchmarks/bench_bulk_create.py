@@ -0,0 +1,56 @@
+"""
+Compares ingest of cats one by one (previous list scan, indexed create) and in one batch
+
+PYTHONPATH=. python benchmarks/bench_bulk_create.py
+"""
+
+from time import perf_counter
+
+from cats.entity import Cat
+from cats.repository import CatsRepository
+from cats.service import CatsService
+from nestpy.common import ResponseCache
+
+
+def previous_create(cats: list[Cat], cat: Cat):
+    for c in cats:
+        if c.id == cat.id:
+            raise Exception("Cat already exists")
+    cats.append(cat)
+
+
+def make_cats(size: int) -> list[Cat]:
+    return [
+        Cat(id=f"bench-{i}", name=f"cat{i}", gender="M" if i % 2 else "F")
+        for i in range(size)
+    ]
+
+
+def main():
+    print(f"{'method':>24} {'cats':>8} {'s':>8}")
+
+    # quadratic, so measured on smaller ingest
+    size = 10000
+    new_cats = make_cats(size)
+    cats: list[Cat] = []
+    started = perf_counter()
+    for cat in new_cats:
+        previous_create(cats, cat)
+    print(f"{'previous create':>24} {size:>8} {perf_counter() - started:>8.3f}")
+
+    size = 100000
+    new_cats = make_cats(size)
+    cats_service = CatsService(CatsRepository(), ResponseCache())
+    started = perf_counter()
+    for cat in new_cats:
+        cats_service.create(cat)
+    print(f"{'create':>24} {size:>8} {perf_counter() - started:>8.3f}")
+
+    cats_service = CatsService(CatsRepository(), ResponseCache())
+    started = perf_counter()
+    cats_service.create_many(new_cats)
+    print(f"{'create_many':>24} {size:>8} {perf_counter() - started:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Compares bytes on the wire and compression cost by response size (json list of cats)
+
+PYTHONPATH=. python benchmarks/bench_compression.py
+"""
+
+from timeit import timeit
+
+from cats.entity import Cat
+from nestpy.core.compression import Compressor, supported_encodings
+from pydantic import TypeAdapter
+
+
+def main():
+    encode = TypeAdapter(list[Cat]).dump_json
+    compressors = [
+        ("gzip 1", "gzip", Compressor(gzip_level=1)),
+        ("gzip 6", "gzip", Compressor(gzip_level=6)),
+    ]
+    if "br" in supported_encodings():
+        compressors.append(("br 4", "br", Compressor(brotli_quality=4)))
+
+    print(
+        f"{'cats':>6} {'identity B':>11} "
+        + " ".join(
+            f"{name + ' B':>10} {name + ' us':>10}" for name, _, _ in compressors
+        )
+    )
+    for count in [10, 100, 1000, 10000]:
+        body = encode(
+            [
+                Cat(id=str(i), name=f"cat{i}", gender="M" if i % 2 else "F")
+                for i in range(count)
+            ]
+        )
+        number = max(10, 20000 // count)
+        columns = []
+        for _, encoding, compressor in compressors:
+            size = len(compressor.compress(body, encoding))
+            elapsed = timeit(lambda: compressor.compress(body, encoding), number=number)
+            columns.append(f"{size:>10} {elapsed / number * 1e6:>10.1f}")
+        print(f"{count:>6} {len(body):>11} " + " ".join(columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Compares per-request dispatch overhead of per-request introspection (previous implementation) and RouteBinder
+
+PYTHONPATH=. python benchmarks/bench_dispatch.py
+"""
+
+from inspect import _empty
+from json import loads
+from timeit import timeit
+from typing import Any, Optional
+from urllib.parse import parse_qs, urlparse
+
+from nestpy.common import (
+    APIInfo,
+    Body,
+    Controller,
+    Get,
+    Param,
+    Post,
+    Query,
+    get_api_info_list,
+)
+from nestpy.core.binder import RouteBinder
+from pydantic import BaseModel
+
+
+class Cat(BaseModel):
+    id: str
+    name: str
+    gender: str
+
+
+@Controller("cats")
+class CatsController:
+    def __init__(self):
+        pass
+
+    @Post(":group")
+    def create(self, group: Param[str], cat: Body[Cat]):
+        return cat.data
+
+    @Get()
+    def list(self, gender: Optional[Query[str]] = None):
+        return gender
+
+
+def previous_dispatch(
+    api_info: APIInfo, controller: Any, path: str, path_params: dict, body: bytes
+):
+    body_dict = loads(body.decode("utf-8")) if body else {}
+    controller_func = getattr(controller, api_info.func_name)
+    inputs: dict[str, Any] = {}
+    for param_name, param_info in api_info.body_param_info_dict.items():
+        if BaseModel in param_info.type.__bases__:
+            inputs[param_name] = Body(param_info.type(**body_dict))
+            continue
+        inputs[param_name] = Body(body_dict)
+    query_params = parse_qs(urlparse(path).query)
+    for param_name, param_info in api_info.query_param_info_dict.items():
+        try:
+            inputs[param_name] = Query(query_params[param_name][0])
+        except KeyError:
+            if param_info.required or param_info.default is _empty:
+                raise ValueError(f"missing required query param: {param_name}")
+            inputs[param_name] = Query(param_info.default)
+    for param_name in api_info.path_param_info_dict:
+        inputs[param_name] = Param(path_params[param_name])
+    return controller_func(**inputs)
+
+
+def main():
+    number = 20000
+    controller = CatsController()
+    api_infos = {
+        api_info.func_name: api_info for api_info in get_api_info_list(CatsController)
+    }
+    cases = [
+        (
+            "create",
+            "/cats/a",
+            {"group": "a"},
+            b'{"id": "1", "name": "Tom", "gender": "M"}',
+        ),
+        ("list", "/cats?gender=M", {}, b""),
+    ]
+
+    print(f"{'route':>8} {'previous (us)':>14} {'binder (us)':>12}")
+    for func_name, path, path_params, body in cases:
+        api_info = api_infos[func_name]
+        binder = RouteBinder(api_info, controller)
+        query_string = path.partition("?")[2]
+
+        previous = timeit(
+            lambda: previous_dispatch(api_info, controller, path, path_params, body),
+            number=number,
+        )
+        compiled = timeit(
+            lambda: binder(path_params, query_string, body), number=number
+        )
+        print(
+            f"{func_name:>8} {previous / number * 1e6:>14.2f} {compiled / number * 1e6:>12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
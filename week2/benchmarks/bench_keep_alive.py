@@ -0,0 +1,72 @@
+"""
+Compares requests/sec with and without keep-alive
+
+PYTHONPATH=. python benchmarks/bench_keep_alive.py
+"""
+
+import logging
+import time
+from http.client import HTTPConnection
+from threading import Thread
+
+from nestpy.common import Controller, Get, Injectable, Module
+from nestpy.core import NestFactory
+
+logging.disable(logging.WARNING)
+
+
+@Injectable()
+class PingService:
+    def __init__(self):
+        pass
+
+
+@Controller("ping")
+class PingController:
+    def __init__(self, service: PingService):
+        self.service = service
+
+    @Get()
+    def ping(self):
+        return {"message": "pong"}
+
+
+@Module({"controller": PingController, "provider": PingService})
+class PingModule:
+    pass
+
+
+def run(host: str, port: int, requests: int, keep_alive: bool) -> float:
+    conn = HTTPConnection(host, port)
+    headers = {} if keep_alive else {"Connection": "close"}
+    started = time.perf_counter()
+    for _ in range(requests):
+        conn.request("GET", "/ping", headers=headers)
+        conn.getresponse().read()
+        if not keep_alive:
+            conn.close()
+    elapsed = time.perf_counter() - started
+    conn.close()
+    return requests / elapsed
+
+
+def main():
+    requests = 2000
+    print(f"{'engine':>10} {'close (req/s)':>14} {'keep-alive (req/s)':>19}")
+    for engine in ["blocking", "asyncio"]:
+        app = NestFactory.create(
+            PingModule, port=0, workers=4, engine=engine, max_keep_alive_requests=requests + 1  # type: ignore
+        )
+        Thread(target=app.serve, daemon=True).start()
+        host, port = app.server_address[:2]
+
+        close = run(host, port, requests, keep_alive=False)
+        keep_alive = run(host, port, requests, keep_alive=True)
+        print(f"{engine:>10} {close:>14.0f} {keep_alive:>19.0f}")
+
+        app.shutdown()
+        app.server_close()
+
+
+if __name__ == "__main__":
+    main()
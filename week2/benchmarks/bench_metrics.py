@@ -0,0 +1,33 @@
+"""
+Compares per-request instrumentation overhead with metrics disabled and enabled
+
+PYTHONPATH=. python benchmarks/bench_metrics.py
+"""
+
+from timeit import timeit
+from typing import Optional
+
+from nestpy.core.metrics import PHASES, RequestMetrics, request_timer
+
+
+def instrumented_request(metrics: Optional[RequestMetrics]):
+    timer = request_timer(metrics, "GET")
+    timer.route = "/cats/:id"
+    for phase in range(len(PHASES)):
+        timer.lap(phase)
+    timer.finish(200, 64)
+
+
+def main():
+    number = 100000
+    metrics = RequestMetrics()
+    print(f"{'metrics':>10} {'us / request':>14}")
+    for name, target in [("disabled", None), ("enabled", metrics)]:
+        elapsed = timeit(lambda: instrumented_request(target), number=number)
+        print(f"{name:>10} {elapsed / number * 1e6:>14.2f}")
+    elapsed = timeit(metrics.render, number=100)
+    print(f"render of {len(metrics.snapshot())} route: {elapsed / 100 * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
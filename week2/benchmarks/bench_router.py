@@ -0,0 +1,60 @@
+"""
+Compares route lookup of linear scan (previous implementation) and Router
+
+PYTHONPATH=. python benchmarks/bench_router.py
+"""
+
+from timeit import timeit
+from typing import Optional
+
+from nestpy.core.router import Router
+
+
+def match_path(path: str, nestpy_path: str) -> Optional[dict[str, str]]:
+    splitted_path = path.strip("/").split("/")
+    splitted_nestpy_path = nestpy_path.strip("/").split("/")
+    if len(splitted_path) != len(splitted_nestpy_path):
+        return None
+    path_params: dict[str, str] = {}
+    for i in range(len(splitted_path)):
+        if splitted_nestpy_path[i].startswith(":"):
+            path_params[splitted_nestpy_path[i][1:]] = splitted_path[i]
+        elif splitted_nestpy_path[i] != splitted_path[i]:
+            return None
+    return path_params
+
+
+def linear_lookup(routes: list[tuple[str, str]], request_method: str, path: str):
+    for method, nestpy_path in routes:
+        if (
+            method == request_method
+            and (path_params := match_path(path, nestpy_path)) is not None
+        ):
+            return nestpy_path, path_params
+    return None
+
+
+def main():
+    number = 200
+    print(f"{'routes':>8} {'linear (us)':>12} {'router (us)':>12}")
+    for route_count in [10, 100, 1000, 10000]:
+        routes = [
+            ("GET", f"resource{i}/:id/items/:item_id") for i in range(route_count)
+        ]
+        router: Router[str] = Router()
+        for method, path in routes:
+            router.add(method, path, path)
+
+        # worst case for linear scan: the last registered route
+        path = f"/resource{route_count - 1}/42/items/7"
+        assert linear_lookup(routes, "GET", path) == router.lookup("GET", path)
+
+        linear = timeit(lambda: linear_lookup(routes, "GET", path), number=number)
+        tree = timeit(lambda: router.lookup("GET", path), number=number)
+        print(
+            f"{route_count:>8} {linear / number * 1e6:>12.2f} {tree / number * 1e6:>12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Compares json response serialization of 10k element list
+
+PYTHONPATH=. python benchmarks/bench_serialization.py
+"""
+
+from json import dumps
+from timeit import timeit
+
+from cats.entity import Cat
+from nestpy.core import encoder
+from nestpy.core.encoder import compile_encoder, encode_default
+
+
+def previous_encode(res: list[Cat]) -> bytes:
+    return dumps([x.model_dump() for x in res]).encode()
+
+
+def main():
+    number = 20
+    size = 10000
+    cats = [
+        Cat(id=str(i), name=f"cat{i}", gender="M" if i % 2 else "F")
+        for i in range(size)
+    ]
+
+    encoders = {
+        "previous (json.dumps)": previous_encode,
+        "TypeAdapter(list[Cat])": compile_encoder(list[Cat]),
+    }
+    if encoder.orjson is not None:
+        encoders["orjson (unannotated)"] = encode_default
+
+    print(f"{'encoder':>24} {'ms / response':>14} {'MB/s':>8}")
+    for name, encode in encoders.items():
+        body_len = len(encode(cats))
+        elapsed = timeit(lambda: encode(cats), number=number) / number
+        print(f"{name:>24} {elapsed * 1e3:>14.2f} {body_len / elapsed / 1e6:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
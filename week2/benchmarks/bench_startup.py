@@ -0,0 +1,137 @@
+"""
+Compares startup of an app with hundreds of controllers, compiling its manifest and reading it from cache
+
+PYTHONPATH=. python benchmarks/bench_startup.py
+"""
+
+import importlib
+import logging
+import os
+import sys
+import tempfile
+from time import perf_counter
+
+from nestpy.core.handler import NestPyHTTPRequestHandlerBuilder
+from nestpy.core.manifest import compile_manifest, load_manifest, save_manifest
+
+CONTROLLER_SOURCE = """
+from pydantic import BaseModel
+
+from nestpy.common import Body, Controller, Get, Injectable, Param, Post, Query
+
+
+class Item{i}(BaseModel):
+    id: str
+    name: str
+
+
+@Injectable()
+class Service{i}:
+    def __init__(self):
+        self.items: dict[str, Item{i}] = {{}}
+
+
+@Controller("resource{i}")
+class Controller{i}:
+    def __init__(self, service: Service{i}):
+        self.service = service
+
+    @Get(":id")
+    def get(self, id: Param[str]) -> Item{i}:
+        return self.service.items[id.data]
+
+    @Get("")
+    def list(self, limit: Query[int] = 10) -> list[Item{i}]:
+        return list(self.service.items.values())[: int(limit.data)]
+
+    @Post("")
+    def create(self, item: Body[Item{i}]) -> Item{i}:
+        self.service.items[item.data.id] = item.data
+        return item.data
+"""
+
+MODULE_SOURCE = """
+from nestpy.common import Module
+
+{imports}
+
+
+@Module({{"controller": {controller}, "provider": {provider}}})
+class {name}:
+    def __init__(self):
+        pass
+"""
+
+
+def write_app(package_dir: str, controller_count: int) -> str:
+    """
+    One file per controller, chained by modules since a module has one controller and one provider
+    """
+    os.makedirs(package_dir)
+    open(os.path.join(package_dir, "__init__.py"), "w").close()
+    package = os.path.basename(package_dir)
+    for i in range(controller_count):
+        with open(os.path.join(package_dir, f"controller{i}.py"), "w") as f:
+            f.write(CONTROLLER_SOURCE.format(i=i))
+    # module i serves controller i, and provides module i + 1
+    for i in reversed(range(controller_count)):
+        imports = f"from {package}.controller{i} import Controller{i}"
+        provider = f"Controller{i}"
+        if i + 1 < controller_count:
+            imports += f"\nfrom {package}.module{i + 1} import Module{i + 1}"
+            provider = f"Module{i + 1}"
+        with open(os.path.join(package_dir, f"module{i}.py"), "w") as f:
+            f.write(
+                MODULE_SOURCE.format(
+                    imports=imports,
+                    controller=f"Controller{i}",
+                    provider=provider,
+                    name=f"Module{i}",
+                )
+            )
+    return f"{package}.module0"
+
+
+def best_of(func, repeat: int = 5) -> float:
+    seconds = []
+    for _ in range(repeat):
+        started = perf_counter()
+        func()
+        seconds.append(perf_counter() - started)
+    return min(seconds)
+
+
+def main():
+    logging.disable(logging.INFO)
+    sys.setrecursionlimit(10000)
+    print(
+        f"{'controllers':>12} {'import (ms)':>12} {'compile (ms)':>13} {'load (ms)':>10}"
+        f" {'start compiled (ms)':>20} {'start cached (ms)':>18}"
+    )
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        sys.path.insert(0, tmp_dir)
+        for controller_count in [10, 100, 500]:
+            package = f"startup_app{controller_count}"
+            module_name = write_app(os.path.join(tmp_dir, package), controller_count)
+            started = perf_counter()
+            root = getattr(importlib.import_module(module_name), "Module0")
+            imported = perf_counter() - started
+
+            cache_path = os.path.join(tmp_dir, f"{package}.json")
+            compiled = best_of(lambda: compile_manifest(root))
+            assert save_manifest(compile_manifest(root), cache_path)
+            loaded = best_of(lambda: load_manifest(cache_path, root))
+            assert load_manifest(cache_path, root) is not None
+
+            start_compiled = best_of(lambda: NestPyHTTPRequestHandlerBuilder(root))
+            start_cached = best_of(
+                lambda: NestPyHTTPRequestHandlerBuilder(root, manifest_cache=cache_path)
+            )
+            print(
+                f"{controller_count:>12} {imported * 1e3:>12.1f} {compiled * 1e3:>13.2f}"
+                f" {loaded * 1e3:>10.2f} {start_compiled * 1e3:>20.1f} {start_cached * 1e3:>18.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
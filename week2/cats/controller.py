@@ -1,8 +1,8 @@
-from typing import Optional
+from typing import Iterator, Optional
 
 from cats.entity import Cat
 from cats.service import CatsService
-from nestpy.common import Body, Controller, Get, Param, Post, Query
+from nestpy.common import Body, Cache, Controller, ETag, Get, Param, Post, Query
 
 
 @Controller("cats")
@@ -11,13 +11,24 @@ class CatsController:
         self.service = service
 
     @Post()
-    def create(self, cat: Body[Cat]):
+    def create(self, cat: Body[Cat]) -> Cat:
         return self.service.create(cat.data)
 
+    @Post("bulk")
+    def create_many(self, cats: Body[list[Cat]]) -> list[Cat]:
+        return self.service.create_many(cats.data)
+
     @Get()
+    @Cache(ttl=60, tags=("cats",))
+    @ETag(lambda self: self.service.repository.version)
     def list(self, gender: Optional[Query[str]] = None) -> list[Cat]:
         return self.service.list(gender=gender.data if gender else None)
 
+    @Get("stream")
+    def stream(self, gender: Optional[Query[str]] = None) -> Iterator[Cat]:
+        return self.service.iterate(gender=gender.data if gender else None)
+
     @Get(":id")
-    def get(self, id: Param[str]):
+    @Cache(ttl=60, tags=("cats",))
+    def get(self, id: Param[str]) -> Cat:
         return self.service.get(id.data)
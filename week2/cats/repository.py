@@ -0,0 +1,17 @@
+from cats.entity import Cat
+from nestpy.common import Injectable, Repository
+
+
+@Injectable()
+class CatsRepository(Repository[Cat]):
+    primary_key = "id"
+    indexes = ("gender",)
+
+    def __init__(self):
+        super().__init__()
+        self.insert_many(
+            [
+                Cat(id="1", name="Garfield", gender="M"),
+                Cat(id="2", name="Tom", gender="F"),
+            ]
+        )
@@ -1,31 +1,44 @@
-from typing import Optional
+from typing import Iterator, Optional
 
 from cats.entity import Cat
-from nestpy.common import Injectable
-
-cats: list[Cat] = [
-    Cat(id="1", name="Garfield", gender="M"),
-    Cat(id="2", name="Tom", gender="F"),
-]
+from cats.repository import CatsRepository
+from nestpy.common import Injectable, ResponseCache
 
 
 @Injectable()
 class CatsService:
+    def __init__(self, repository: CatsRepository, cache: ResponseCache):
+        self.repository = repository
+        self.cache = cache
+
     def create(self, cat: Cat):
-        for c in cats:
-            if c.id == cat.id:
-                raise Exception("Cat already exists")
-        cats.append(cat)
+        try:
+            cat = self.repository.insert(cat)
+        except ValueError:
+            raise Exception("Cat already exists")
+        self.cache.invalidate("cats")
         return cat
 
+    def create_many(self, cats: list[Cat]):
+        """
+        All or nothing, duplicate ids are checked once per batch
+        """
+        try:
+            cats = self.repository.insert_many(cats)
+        except ValueError:
+            raise Exception("Cat already exists")
+        self.cache.invalidate("cats")
+        return cats
+
     def list(self, gender: Optional[str] = None):
-        def filter(cat):
-            return cat.gender == gender if gender else True
+        if gender:
+            return self.repository.find(gender=gender)
+        return self.repository.all()
 
-        return [cat for cat in cats if filter(cat)]
+    def iterate(self, gender: Optional[str] = None) -> Iterator[Cat]:
+        return iter(self.list(gender=gender))
 
     def get(self, id: str):
-        for cat in cats:
-            if cat.id == id:
-                return cat
-        raise Exception("Cat not found")
+        if (cat := self.repository.get(id)) is None:
+            raise Exception("Cat not found")
+        return cat
@@ -11,7 +11,8 @@ logging.basicConfig(
 
 
 def bootstrap():
-    app = NestFactory.create(CatsModule)
+    # idle keep-alive connections hold no worker on asyncio engine, sync controllers run on 8 threads
+    app = NestFactory.create(CatsModule, engine="asyncio", workers=8, compression=True)
     app.serve()
 
 
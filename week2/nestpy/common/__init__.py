@@ -1,20 +1,29 @@
+from .cache import Cache, CachedResponse, ResponseCache, get_cache
 from .controller import Controller, get_api_info_list
+from .etag import ETag, get_etag
 from .injectable import Injectable
 from .methods import APIInfo, Get, ParameterInfo, Post, get_api_info
 from .module import Module
-from .request import Body, Param, Query
+from .repository import Repository
+from .request import Body, Param, Query, RequestArgument
 from .token import AddingTokenDecorator, InstanceInitiator, InstanceManager
 from .types import Class, Instance, MethodFunction, Token
 
 __all__ = [
     "Module",
     "Injectable",
+    "Repository",
+    "Cache",
+    "CachedResponse",
+    "ResponseCache",
+    "ETag",
     "Controller",
     "Get",
     "Post",
     "Param",
     "Query",
     "Body",
+    "RequestArgument",
     "InstanceInitiator",
     "InstanceManager",
     "AddingTokenDecorator",
@@ -26,4 +35,6 @@ __all__ = [
     "ParameterInfo",
     "get_api_info",
     "get_api_info_list",
+    "get_cache",
+    "get_etag",
 ]
@@ -0,0 +1,126 @@
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+from typing import Hashable, Iterable, Optional
+
+from .constants import CACHE_ATTR
+from .injectable import Injectable
+from .types import MethodFunction
+
+
+class Cache:
+    """
+    Caches serialized response of GET route, used with `@Get` in any order.
+
+    ```python
+    @Get(":id")
+    @Cache(ttl=30, max_entries=1024, tags=("cats",))
+    def get(self, id: Param[str]) -> Cat: ...
+    ```
+
+    Responses are keyed by path and query params, and dropped after `ttl` seconds,
+    when route has more than `max_entries` (least recently used first)
+    or when `ResponseCache.invalidate` is called with one of `tags`.
+    """
+
+    def __init__(self, ttl: float, max_entries: int = 1024, tags: Iterable[str] = ()):
+        if ttl <= 0:
+            raise ValueError(f"ttl should be positive, got {ttl}")
+        if max_entries <= 0:
+            raise ValueError(f"max_entries should be positive, got {max_entries}")
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.tags = frozenset(tags)
+
+    def __call__(self, func):
+        setattr(func, CACHE_ATTR, self)
+        return func
+
+
+def get_cache(func: MethodFunction) -> Optional[Cache]:
+    return getattr(func, CACHE_ATTR, None)
+
+
+class CachedResponse:
+    __slots__ = ("body", "etag", "expires_at", "tags", "encoded")
+
+    def __init__(self, body: bytes, etag: str, expires_at: float, tags: frozenset[str]):
+        self.body = body
+        self.etag = etag
+        self.expires_at = expires_at
+        self.tags = tags
+        # coding -> compressed body, filled on demand
+        self.encoded: dict[str, bytes] = {}
+
+
+@Injectable()
+class ResponseCache:
+    """
+    Responses of `@Cache` routes, one LRU per route.
+
+    Inject it to invalidate responses after changes:
+
+    ```python
+    @Injectable()
+    class CatsService:
+        def __init__(self, repository: CatsRepository, cache: ResponseCache):
+            ...
+
+        def create(self, cat: Cat):
+            self.repository.insert(cat)
+            self.cache.invalidate("cats")
+    ```
+    """
+
+    def __init__(self):
+        # route -> key -> response, least recently used first
+        self._routes: dict[str, OrderedDict[Hashable, CachedResponse]] = {}
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return sum(len(responses) for responses in self._routes.values())
+
+    def get(self, route: str, key: Hashable) -> Optional[CachedResponse]:
+        with self._lock:
+            if (responses := self._routes.get(route)) is None:
+                return None
+            if (response := responses.get(key)) is None:
+                return None
+            if response.expires_at <= monotonic():
+                del responses[key]
+                return None
+            responses.move_to_end(key)
+            return response
+
+    def put(
+        self, route: str, key: Hashable, body: bytes, etag: str, cache: Cache
+    ) -> CachedResponse:
+        response = CachedResponse(body, etag, monotonic() + cache.ttl, cache.tags)
+        with self._lock:
+            responses = self._routes.setdefault(route, OrderedDict())
+            responses[key] = response
+            responses.move_to_end(key)
+            while len(responses) > cache.max_entries:
+                responses.popitem(last=False)
+        return response
+
+    def invalidate(self, *tags: str) -> int:
+        """
+        Drops responses of any of `tags`, or every response without tags.
+        Returns how many were dropped.
+        """
+        dropped = 0
+        with self._lock:
+            for responses in self._routes.values():
+                if not tags:
+                    dropped += len(responses)
+                    responses.clear()
+                    continue
+                for key in [
+                    key
+                    for key, response in responses.items()
+                    if not response.tags.isdisjoint(tags)
+                ]:
+                    del responses[key]
+                    dropped += 1
+        return dropped
@@ -3,6 +3,8 @@ API_INFO_ATTR = "_nestpy_api_info"
 MODULE_CONTROLLER_ATTR = "_nestpy_module_controller"
 MODULE_PROVIDER_ATTR = "_nestpy_module_provider"
 TOKEN_ATTR = "_nestpy_token"
+CACHE_ATTR = "_nestpy_cache"
+ETAG_ATTR = "_nestpy_etag"
 
 
 CONTROLLER_TOKEN_PREFIX = "controller:"
@@ -23,15 +23,20 @@ class Controller(AddingTokenDecorator):
     def __call__(self, cls):
         cls = super().__call__(cls)
 
-        api_info_list: list[APIInfo] = []
+        # methods of base classes are overridden by subclasses
+        methods: dict[str, object] = {}
+        for klass in reversed(cls.__mro__):
+            methods.update(vars(klass))
 
-        for method_name in dir(cls):
-            method = getattr(cls, method_name)
+        api_info_list: list[APIInfo] = []
+        for method_name in sorted(methods):
+            method = methods[method_name]
             if hasattr(method, API_INFO_ATTR):
-                api_info = get_api_info(method)
-                api_info = api_info.copy(deep=True)
-                api_info.path = f"{self.path}/{api_info.path}"
-                api_info_list.append(api_info)
+                api_info = get_api_info(method)  # type: ignore
+                # shallow, param infos are not changed after decoration
+                api_info_list.append(
+                    api_info.model_copy(update={"path": f"{self.path}/{api_info.path}"})
+                )
 
         setattr(cls, API_INFO_LIST_ATTR, api_info_list)
         return cls
@@ -0,0 +1,34 @@
+from typing import Any, Callable, Hashable, Optional
+
+from .constants import ETAG_ATTR
+from .types import MethodFunction
+
+Version = Callable[[Any], Hashable]
+
+
+class ETag:
+    """
+    Derives ETag of GET route from a cheap version of its data instead of response body,
+    used with `@Get` in any order.
+
+    ```python
+    @Get()
+    @ETag(lambda self: self.service.repository.version)
+    def list(self) -> list[Cat]: ...
+    ```
+
+    `version` is called with controller instance before controller method,
+    and request with matching `If-None-Match` is answered with 304 without calling controller method.
+    ETag also depends on path and query params.
+    """
+
+    def __init__(self, version: Version):
+        self.version = version
+
+    def __call__(self, func):
+        setattr(func, ETAG_ATTR, self)
+        return func
+
+
+def get_etag(func: MethodFunction) -> Optional[ETag]:
+    return getattr(func, ETAG_ATTR, None)
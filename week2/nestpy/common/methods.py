@@ -1,16 +1,17 @@
 from abc import ABC
-from inspect import _empty, signature
+from inspect import _empty, iscoroutinefunction, signature
 from typing import Any, Literal, Union
 
 from pydantic import BaseModel
 
 from .constants import API_INFO_ATTR
-from .types import Class, MethodFunction
+from .types import MethodFunction
 
 
 class ParameterInfo(BaseModel):
     name: str
-    type: Class
+    # class or generic alias, e.g. Iterator[Cat]
+    type: Any
     default: Any | _empty
     required: bool
 
@@ -22,6 +23,8 @@ class APIInfo(BaseModel):
     path: str
     request_method: Literal["GET", "POST"]
     func_name: str
+    is_coroutine: bool = False
+    return_type: Any = None
     path_param_info_dict: dict[str, ParameterInfo] = {}
     query_param_info_dict: dict[str, ParameterInfo] = {}
     body_param_info_dict: dict[str, ParameterInfo] = {}
@@ -50,7 +53,13 @@ class Method(ABC):
             raise NotImplementedError("only get and post are supported")
 
         api_info = APIInfo(
-            path=self.path, request_method=request_method_name, func_name=func.__name__
+            path=self.path,
+            request_method=request_method_name,
+            func_name=func.__name__,
+            is_coroutine=iscoroutinefunction(func),
+            return_type=(
+                None if sig.return_annotation == _empty else sig.return_annotation
+            ),
         )
 
         for var_name, param in func_params.items():
@@ -0,0 +1,134 @@
+from threading import Lock
+from typing import Any, Generic, Iterable, Iterator, Optional, TypeVar
+
+M = TypeVar("M")
+
+
+class Repository(Generic[M]):
+    """
+    In-memory store of models, injectable as provider by subclassing.
+
+    Models are kept in insertion order in a primary key hash index,
+    and each field of `indexes` has a hash index of value to primary keys (also insertion ordered).
+    So `get` is O(1) and `find` on an indexed field is O(matches).
+
+    ```python
+    @Injectable()
+    class CatsRepository(Repository[Cat]):
+        primary_key = "id"
+        indexes = ("gender",)
+
+        def __init__(self):
+            super().__init__()
+    ```
+    """
+
+    primary_key: str = "id"
+    indexes: tuple[str, ...] = ()
+
+    def __init__(self):
+        self._items: dict[Any, M] = {}
+        # field -> value -> primary keys, dict is used as insertion ordered set
+        self._indexes: dict[str, dict[Any, dict[Any, None]]] = {
+            field: {} for field in self.indexes
+        }
+        self._lock = Lock()
+        # increased on every change, e.g. for cache validation
+        self.version = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, pk: Any) -> bool:
+        return pk in self._items
+
+    def __iter__(self) -> Iterator[M]:
+        return iter(self.all())
+
+    def _pk(self, item: M) -> Any:
+        return getattr(item, self.primary_key)
+
+    def _add_to_indexes(self, pk: Any, item: M) -> None:
+        for field, index in self._indexes.items():
+            index.setdefault(getattr(item, field), {})[pk] = None
+
+    def insert(self, item: M) -> M:
+        """
+        Raises ValueError if primary key already exists
+        """
+        pk = self._pk(item)
+        with self._lock:
+            if pk in self._items:
+                raise ValueError(f"{self.primary_key} {pk} already exists")
+            self._items[pk] = item
+            self._add_to_indexes(pk, item)
+            self.version += 1
+        return item
+
+    def insert_many(self, items: Iterable[M]) -> list[M]:
+        """
+        All or nothing, raises ValueError if any primary key is duplicated
+        """
+        items = list(items)
+        pks = [self._pk(item) for item in items]
+        with self._lock:
+            if len(set(pks)) != len(pks):
+                raise ValueError(f"duplicate {self.primary_key} in batch")
+            if not self._items.keys().isdisjoint(pks):
+                raise ValueError(f"{self.primary_key} already exists")
+            self._items.update(zip(pks, items))
+            for pk, item in zip(pks, items):
+                self._add_to_indexes(pk, item)
+            self.version += 1
+        return items
+
+    def get(self, pk: Any) -> Optional[M]:
+        return self._items.get(pk)
+
+    def all(self) -> list[M]:
+        return list(self._items.values())
+
+    def find(self, **conditions: Any) -> list[M]:
+        """
+        Models whose fields equal all `conditions`, in insertion order.
+
+        Narrowed by the smallest matching index first, other conditions are checked one by one.
+        """
+        candidates: Optional[Iterable[Any]] = None
+        for field, value in conditions.items():
+            if (index := self._indexes.get(field)) is None:
+                continue
+            pks = index.get(value)
+            if not pks:
+                return []
+            if candidates is None or len(pks) < len(candidates):  # type: ignore
+                candidates = pks
+
+        if candidates is None:
+            items: Iterable[M] = self.all()
+        else:
+            # model may be removed meanwhile
+            items = [
+                item
+                for pk in list(candidates)
+                if (item := self._items.get(pk)) is not None
+            ]
+        return [
+            item
+            for item in items
+            if all(getattr(item, field) == value for field, value in conditions.items())
+        ]
+
+    def remove(self, pk: Any) -> M:
+        """
+        Raises KeyError if primary key does not exist
+        """
+        with self._lock:
+            item = self._items.pop(pk)
+            for field, index in self._indexes.items():
+                value = getattr(item, field)
+                del index[value][pk]
+                if not index[value]:
+                    del index[value]
+            self.version += 1
+        return item
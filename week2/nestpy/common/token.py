@@ -1,7 +1,7 @@
 import logging
 from abc import ABC
 from inspect import _empty, signature
-from typing import Any
+from typing import Optional
 
 from pydantic import BaseModel
 
@@ -54,6 +54,8 @@ class InstanceWrapper(BaseModel):
     cls: Class
     instance: Instance | None = None
     pending: bool = False
+    # dependencies are resolved, ready to be initiated
+    resolved: bool = False
 
     @property
     def instance_registered(self):
@@ -62,16 +64,21 @@ class InstanceWrapper(BaseModel):
     def register_instance(self, instance: Instance):
         if self.instance_registered:
             raise ValueError(f"{self} should be registered only once")
-        if self.pending is False:
-            raise ValueError(f"{self} has not been marked first")
+        if self.resolved is False:
+            raise ValueError(f"{self} has not been resolved first")
         self.instance = instance
-        self.pending = False
 
     def mark_pending(self):
         if self.pending is True:
             raise ValueError("Already marked... maybe circular reference occurred")
         self.pending = True
 
+    def mark_resolved(self):
+        if self.pending is False:
+            raise ValueError(f"{self} has not been marked first")
+        self.pending = False
+        self.resolved = True
+
 
 class InstanceManager:
     """
@@ -81,7 +88,8 @@ class InstanceManager:
 
     1. register class
     2. mark pending to class
-    3. register instance
+    3. mark resolved, after its dependencies
+    4. register instance
     """
 
     def __init__(self):
@@ -98,10 +106,19 @@ class InstanceManager:
             raise ValueError(f"class {cls.__name__} should be registered first")
         return self._instances[token]
 
+    def is_registered(self, cls: Class) -> bool:
+        return getattr(cls, TOKEN_ATTR, None) in self._instances
+
     def register_cls(self, cls: Class) -> None:
         token = self._get_token(cls)
         self._instances[token] = InstanceWrapper(cls=cls)
 
+    def get_classes(self) -> list[Class]:
+        """
+        Returns all classes in order of registration
+        """
+        return [wrapper.cls for wrapper in self._instances.values()]
+
     def mark_pending(self, cls: Class) -> None:
         token = self._get_token(cls)
         if token not in self._instances.keys():
@@ -109,6 +126,9 @@ class InstanceManager:
         wrapper = self._instances[token]
         wrapper.mark_pending()
 
+    def mark_resolved(self, cls: Class) -> None:
+        self.get_wrapper(cls).mark_resolved()
+
     def register_instance(self, instance: Instance) -> None:
         token = self._get_token(instance.__class__)
         if token not in self._instances.keys():
@@ -135,13 +155,28 @@ class InstanceManager:
 
 
 class InstanceInitiator:
-    def __init__(self):
+    """
+    `dependencies` of classes known in advance (e.g. from a manifest) are not inspected again
+    """
+
+    def __init__(
+        self, dependencies: Optional[dict[Class, tuple[tuple[str, Class], ...]]] = None
+    ):
         self._instance_manager = InstanceManager()
+        # signature of __init__ is inspected once per class
+        self._dependencies: dict[Class, tuple[tuple[str, Class], ...]] = dict(
+            dependencies or {}
+        )
 
-    def register_cls(self, cls: Class):
-        sig = signature(cls.__init__)
+    def dependencies(self, cls: Class) -> tuple[tuple[str, Class], ...]:
+        """
+        (param name, class) of __init__ params, which are injected
+        """
+        if (dependencies := self._dependencies.get(cls)) is not None:
+            return dependencies
 
-        for var_name, param in sig.parameters.items():
+        params: list[tuple[str, Class]] = []
+        for var_name, param in signature(cls.__init__).parameters.items():
             if var_name == "self":
                 continue
 
@@ -152,8 +187,18 @@ class InstanceInitiator:
                 raise ValueError(
                     f"set annotation to {var_name} in  {cls.__name__} init function"
                 )
-            self.register_cls(param_cls)
+            params.append((var_name, param_cls))
+        dependencies = self._dependencies[cls] = tuple(params)
+        return dependencies
+
+    def register_cls(self, cls: Class):
+        if self._instance_manager.is_registered(cls):
+            # shared dependency, or circular reference which is detected on init
+            return
+        # registered before dependencies, so that circular reference terminates
         self._instance_manager.register_cls(cls)
+        for _, param_cls in self.dependencies(cls):
+            self.register_cls(param_cls)
         _logger.info(f"{cls.__name__} registered")
 
         # TODO checking module dependency: is this best?
@@ -163,45 +208,57 @@ class InstanceInitiator:
         if hasattr(cls, MODULE_PROVIDER_ATTR):
             self.register_cls(getattr(cls, MODULE_PROVIDER_ATTR))
 
-    def get_or_init_instance(self, cls: Class) -> Instance:
-        wrapper = self._instance_manager.get_wrapper(cls)
-        if wrapper.instance_registered:
-            return wrapper.instance
-        instance = self._init_instance(cls)
-        _logger.info(f"{cls.__name__} initialized")
-        self._instance_manager.register_instance(instance)
-
-        # TODO checking module dependency: is this best?
-        if hasattr(cls, MODULE_CONTROLLER_ATTR):
-            self.get_or_init_instance(getattr(cls, MODULE_CONTROLLER_ATTR))
-
-        if hasattr(cls, MODULE_PROVIDER_ATTR):
-            self.get_or_init_instance(getattr(cls, MODULE_PROVIDER_ATTR))
+    def is_registered(self, cls: Class) -> bool:
+        """
+        Whether cls is a dependency of registered classes
+        """
+        return self._instance_manager.is_registered(cls)
 
-        return instance
+    def get_registered_classes(self) -> list[Class]:
+        return self._instance_manager.get_classes()
 
-    def _init_instance(self, cls: Class) -> Instance:
-        sig = signature(cls.__init__)
+    def resolve(self, cls: Class) -> list[Class]:
+        """
+        Registered classes reachable from cls which are not resolved yet,
+        in order of initiation (dependencies first)
+        """
+        order: list[Class] = []
+        self._resolve(cls, order)
+        return order
 
-        params: dict[str, Any] = {}
+    def _resolve(self, cls: Class, order: list[Class]) -> None:
+        if self._instance_manager.get_wrapper(cls).resolved:
+            return
         self._instance_manager.mark_pending(cls)
+        for _, param_cls in self.dependencies(cls):
+            self._resolve(param_cls, order)
 
-        for var_name, param in sig.parameters.items():
-            if var_name == "self":
-                continue
-
-            if var_name in ["args", "kwargs"]:
-                raise ValueError("args or kwargs signature not allowed")
+        # controller and provider of a module are initiated with it, though not injected to it
+        if hasattr(cls, MODULE_CONTROLLER_ATTR):
+            self._resolve(getattr(cls, MODULE_CONTROLLER_ATTR), order)
 
-            if (param_cls := param.annotation) == _empty:
-                raise ValueError(
-                    f"set annotation to {var_name} in  {cls.__name__} init function"
-                )
+        if hasattr(cls, MODULE_PROVIDER_ATTR):
+            self._resolve(getattr(cls, MODULE_PROVIDER_ATTR), order)
 
-            param_instance = self.get_or_init_instance(param_cls)
-            params[var_name] = param_instance
+        self._instance_manager.mark_resolved(cls)
+        order.append(cls)
 
-        return cls(**params)
+    def get_or_init_instance(self, cls: Class) -> Instance:
+        wrapper = self._instance_manager.get_wrapper(cls)
+        if not wrapper.instance_registered:
+            for resolved_cls in self.resolve(cls):
+                self._init_instance(resolved_cls)
+        if not wrapper.instance_registered:
+            raise ValueError(f"{cls.__name__} has been resolved but not initiated")
+        return wrapper.instance
+
+    def _init_instance(self, cls: Class) -> None:
+        params = {
+            var_name: self._instance_manager.get_wrapper(param_cls).instance
+            for var_name, param_cls in self.dependencies(cls)
+        }
+        self._instance_manager.register_instance(cls(**params))
+        _logger.info(f"{cls.__name__} initialized")
 
     def get_controllers(self) -> list[Instance]:
         return self._instance_manager.get_controllers()
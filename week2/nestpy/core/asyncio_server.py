@@ -0,0 +1,498 @@
+import asyncio
+import logging
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
+from functools import lru_cache, partial
+from http import HTTPStatus
+from http.client import HTTPMessage, parse_headers
+from io import BytesIO
+from typing import Optional
+
+from .body import DEFAULT_MAX_BODY_SIZE, RequestBody, parse_content_length
+from .handler import SUPPORTED_METHODS, NestPyHTTPRequestHandlerBuilder
+from .manifest import StartupTimings
+from .metrics import WRITE, RequestMetrics, Timer
+from .response import ControllerCall
+from .stream import ResponseStream
+from .worker import ServeMode, fork_workers, validate_serve_options
+
+_logger = logging.getLogger(__name__)
+
+MAX_HEADER_SIZE = 64 * 1024
+READ_HIGH_WATER_MARK = 1024 * 1024
+
+
+@lru_cache(maxsize=1)
+def _http_date(second: int) -> str:
+    """
+    Date header value, formatted once per second
+    """
+    return formatdate(second, usegmt=True)
+
+
+class _HTTPError(Exception):
+    def __init__(self, status: int):
+        self.status = status
+
+
+class _Request:
+    __slots__ = ("command", "path", "request_version", "headers", "body")
+
+    def __init__(
+        self,
+        command: str,
+        path: str,
+        request_version: str,
+        headers: HTTPMessage,
+        body: bytes,
+    ):
+        self.command = command
+        self.path = path
+        self.request_version = request_version
+        self.headers = headers
+        self.body = body
+
+    @property
+    def keep_alive(self) -> bool:
+        connection = (self.headers.get("Connection") or "").lower()
+        if self.request_version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+
+class NestPyHTTPProtocol(asyncio.Protocol):
+    """
+    One protocol instance per connection.
+
+    Requests are parsed in data_received and handled one at a time,
+    so an idle connection holds no task and pipelined requests are answered in order.
+    """
+
+    def __init__(
+        self,
+        builder: NestPyHTTPRequestHandlerBuilder,
+        executor: ThreadPoolExecutor,
+        connections: set["NestPyHTTPProtocol"],
+        keep_alive_timeout: Optional[float] = 5.0,
+        max_keep_alive_requests: int = 100,
+        max_body_size: int = DEFAULT_MAX_BODY_SIZE,
+    ):
+        self._builder = builder
+        self._executor = executor
+        self._connections = connections
+        self._keep_alive_timeout = keep_alive_timeout
+        self._max_keep_alive_requests = max_keep_alive_requests
+        self._max_body_size = max_body_size
+        self._loop = asyncio.get_running_loop()
+        self._transport: Optional[asyncio.Transport] = None
+        self._buffer = bytearray()
+        self._request_task: Optional[asyncio.Task[None]] = None
+        self._reading_paused = False
+        self._idle_timer: Optional[asyncio.TimerHandle] = None
+        self._handled_requests = 0
+        self._can_write = asyncio.Event()
+        self._can_write.set()
+
+    def connection_made(self, transport: asyncio.BaseTransport):
+        self._transport = transport  # type: ignore
+        self._connections.add(self)
+        self._start_idle_timer()
+
+    def connection_lost(self, exc: Optional[Exception]):
+        self._transport = None
+        self._connections.discard(self)
+        self._cancel_idle_timer()
+        if self._request_task is not None:
+            self._request_task.cancel()
+
+    def data_received(self, data: bytes):
+        self._cancel_idle_timer()
+        self._buffer += data
+        if self._request_task is None:
+            self._process_next_request()
+        elif len(self._buffer) > READ_HIGH_WATER_MARK and not self._reading_paused:
+            self._transport.pause_reading()  # type: ignore
+            self._reading_paused = True
+
+    def pause_writing(self):
+        self._can_write.clear()
+
+    def resume_writing(self):
+        self._can_write.set()
+
+    def close(self):
+        if self._transport is not None:
+            self._transport.close()
+
+    def _start_idle_timer(self):
+        if self._keep_alive_timeout is not None and self._idle_timer is None:
+            self._idle_timer = self._loop.call_later(
+                self._keep_alive_timeout, self.close
+            )
+
+    def _cancel_idle_timer(self):
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+            self._idle_timer = None
+
+    def _process_next_request(self):
+        try:
+            request = self._parse_request()
+        except _HTTPError as e:
+            self._write(e.status, b"", keep_alive=False)
+            return
+        if request is None:
+            # waiting for (rest of) next request
+            self._start_idle_timer()
+            return
+        self._request_task = self._loop.create_task(self._handle_request(request))
+        self._request_task.add_done_callback(self._on_request_done)
+
+    def _on_request_done(self, _task: "asyncio.Task[None]"):
+        self._request_task = None
+        if self._transport is None or self._transport.is_closing():
+            return
+        if self._reading_paused:
+            self._transport.resume_reading()
+            self._reading_paused = False
+        self._process_next_request()
+
+    def _parse_request(self) -> Optional[_Request]:
+        # skip empty lines between pipelined requests
+        while self._buffer.startswith(b"\r\n"):
+            del self._buffer[:2]
+
+        if (header_end := self._buffer.find(b"\r\n\r\n")) < 0:
+            if len(self._buffer) > MAX_HEADER_SIZE:
+                raise _HTTPError(431)
+            return None
+
+        request_line, _, header_block = bytes(self._buffer[:header_end]).partition(
+            b"\r\n"
+        )
+        try:
+            command, path, request_version = request_line.decode("latin-1").split()
+        except ValueError:
+            raise _HTTPError(400)
+        headers = parse_headers(BytesIO(header_block + b"\r\n\r\n"))
+
+        if headers.get("Transfer-Encoding") is not None:
+            raise _HTTPError(501)
+        try:
+            content_len = parse_content_length(headers.get("Content-Length"))
+        except ValueError:
+            raise _HTTPError(400)
+        if content_len > self._max_body_size:
+            # body is not read, so connection can't be reused
+            raise _HTTPError(413)
+
+        body_start = header_end + 4
+        if len(self._buffer) < body_start + content_len:
+            return None
+        body = bytes(self._buffer[body_start : body_start + content_len])
+        del self._buffer[: body_start + content_len]
+        return _Request(command, path, request_version, headers, body)
+
+    async def _handle_request(self, request: _Request) -> None:
+        builder = self._builder
+        self._handled_requests += 1
+        keep_alive = (
+            request.keep_alive
+            and self._handled_requests < self._max_keep_alive_requests
+        )
+        request_version = request.request_version
+        if request.command not in SUPPORTED_METHODS:
+            # same as blocking engine, which has no do_* handler for it
+            self._write(
+                501,
+                b'{"message": "unsupported method"}',
+                keep_alive=False,
+                request_version=request_version,
+            )
+            return
+        response = builder.begin(
+            request.command,
+            request.path,
+            request.headers,
+            RequestBody.from_bytes(request.body),
+        )
+        if isinstance(response, ControllerCall):
+            call = response
+            try:
+                if call.is_coroutine:
+                    res = await call.func(**call.inputs)
+                else:
+                    res = await self._loop.run_in_executor(
+                        self._executor, partial(call.func, **call.inputs)
+                    )
+            except Exception as e:
+                response = builder.fail(call, e)
+            else:
+                response = builder.complete(call, res)
+        if (
+            response.pending_encoding is not None
+            and len(response.body) >= builder.compressor.offload_size  # type: ignore
+        ):
+            # large body is compressed on executor, not to block other connections
+            await self._loop.run_in_executor(
+                self._executor, builder.compress_response, response
+            )
+        else:
+            builder.compress_response(response)
+        if response.stream is not None:
+            await self._write_stream(
+                response.stream, keep_alive, request_version, response.timer  # type: ignore
+            )
+            return
+        self._write(
+            response.status,
+            response.body,
+            keep_alive,
+            request_version,
+            content_type=response.content_type,
+            timer=response.timer,
+            etag=response.etag,
+            encoding=response.encoding,
+            vary=response.vary,
+        )
+
+    def _write(
+        self,
+        status: int,
+        body: bytes,
+        keep_alive: bool,
+        request_version: str = "HTTP/1.1",
+        content_type: Optional[str] = None,
+        timer: Optional[Timer] = None,
+        etag: Optional[str] = None,
+        encoding: Optional[str] = None,
+        vary: bool = False,
+    ):
+        if self._transport is None:
+            return
+        head = self._head(
+            status,
+            keep_alive,
+            request_version,
+            content_type,
+            None if status == 304 else len(body),
+            etag=etag,
+            encoding=encoding,
+            vary=vary,
+        )
+        self._transport.write(head + body)
+        if not keep_alive:
+            self._transport.close()
+        if timer is not None:
+            timer.lap(WRITE)
+            timer.finish(status, len(body))
+
+    async def _write_stream(
+        self,
+        stream: ResponseStream,
+        keep_alive: bool,
+        request_version: str,
+        timer: Timer,
+    ):
+        """
+        Body is chunked, or ends with closing connection for HTTP/1.0 client.
+
+        Items are encoded while writing, so both are timed as write phase.
+        """
+        chunked = request_version != "HTTP/1.0"
+        keep_alive = keep_alive and chunked
+        if self._transport is None:
+            return
+        self._transport.write(
+            self._head(200, keep_alive, request_version, stream.content_type, None)
+        )
+
+        response_bytes = 0
+        try:
+            if stream.is_async:
+                async for chunk in stream.aiter_chunks():
+                    await self._write_chunk(chunk, chunked)
+                    response_bytes += len(chunk)
+            else:
+                # sync generator may block, e.g. reading from database
+                chunks = stream.iter_chunks()
+                while (
+                    chunk := await self._loop.run_in_executor(
+                        self._executor, next, chunks, None
+                    )
+                ) is not None:
+                    await self._write_chunk(chunk, chunked)
+                    response_bytes += len(chunk)
+        except Exception:
+            _logger.exception("error while streaming response")
+            # response has already started, closing connection is the only way to tell client
+            self.close()
+            return
+        finally:
+            timer.lap(WRITE)
+            timer.finish(200, response_bytes)
+
+        if self._transport is None:
+            return
+        if chunked:
+            self._transport.write(b"0\r\n\r\n")
+        if not keep_alive:
+            self._transport.close()
+
+    async def _write_chunk(self, chunk: bytes, chunked: bool):
+        if self._transport is None:
+            raise ConnectionError("connection lost while streaming response")
+        if not chunk:
+            # empty chunk terminates chunked body
+            return
+        if chunked:
+            chunk = b"%X\r\n%b\r\n" % (len(chunk), chunk)
+        self._transport.write(chunk)
+        await self._can_write.wait()
+
+    def _head(
+        self,
+        status: int,
+        keep_alive: bool,
+        request_version: str,
+        content_type: Optional[str],
+        content_length: Optional[int],
+        etag: Optional[str] = None,
+        encoding: Optional[str] = None,
+        vary: bool = False,
+    ) -> bytes:
+        """
+        Body without content length is chunked, 304 has no body
+        """
+        header_lines = [
+            f"HTTP/1.1 {status} {HTTPStatus(status).phrase}",
+            f"Date: {_http_date(int(time.time()))}",
+        ]
+        if content_length is not None:
+            header_lines.append(f"Content-Length: {content_length}")
+        elif request_version != "HTTP/1.0" and status != 304:
+            header_lines.append("Transfer-Encoding: chunked")
+        if content_type is not None:
+            header_lines.append(f"Content-type: {content_type}")
+        if etag is not None:
+            header_lines.append(f"ETag: {etag}")
+        if encoding is not None:
+            header_lines.append(f"Content-Encoding: {encoding}")
+        if vary:
+            header_lines.append("Vary: Accept-Encoding")
+        if not keep_alive:
+            header_lines.append("Connection: close")
+        elif request_version == "HTTP/1.0":
+            header_lines.append("Connection: keep-alive")
+        header_lines.append("\r\n")
+        return "\r\n".join(header_lines).encode("latin-1")
+
+
+class NestPyAsyncioServer:
+    """
+    Serves nestpy app with asyncio transports.
+
+    `async def` controller methods are awaited on the event loop,
+    sync controller methods run on a thread pool executor (sized by `workers` in thread mode).
+    mode "process" forks `workers` processes, each running its own event loop on the shared socket.
+    """
+
+    def __init__(
+        self,
+        server_address: tuple[str, int],
+        builder: NestPyHTTPRequestHandlerBuilder,
+        workers: int = 1,
+        mode: ServeMode = "thread",
+        backlog: int = 1024,
+        keep_alive: bool = True,
+        keep_alive_timeout: Optional[float] = 5.0,
+        max_keep_alive_requests: int = 100,
+        max_body_size: int = DEFAULT_MAX_BODY_SIZE,
+    ):
+        validate_serve_options(workers, mode)
+        self.builder = builder
+        self.workers = workers
+        self.mode = mode
+        self.keep_alive = keep_alive
+        self.keep_alive_timeout = keep_alive_timeout
+        self.max_keep_alive_requests = max_keep_alive_requests
+        self.max_body_size = max_body_size
+        self.backlog = backlog
+        self.socket = socket.create_server(server_address, backlog=backlog)
+        self.server_address: tuple[str, int] = self.socket.getsockname()[:2]
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._started = threading.Event()
+        self._stopped = threading.Event()
+
+    @property
+    def metrics(self) -> Optional[RequestMetrics]:
+        return self.builder.metrics
+
+    @property
+    def startup(self) -> StartupTimings:
+        return self.builder.startup
+
+    def serve(self):
+        _logger.info(
+            f"Server is running on {self.server_address} (asyncio, {self.mode} x {self.workers})"
+        )
+        if self.mode == "process" and self.workers > 1:
+            fork_workers(self.serve_forever, self.workers)
+            return
+        self.serve_forever()
+
+    def serve_forever(self):
+        self._stopped.clear()
+        try:
+            asyncio.run(self._serve_forever())
+        finally:
+            self._stopped.set()
+
+    async def _serve_forever(self):
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        executor = ThreadPoolExecutor(
+            max_workers=(
+                self.workers if self.mode == "thread" and self.workers > 1 else None
+            ),
+            thread_name_prefix="nestpy-executor",
+        )
+        connections: set[NestPyHTTPProtocol] = set()
+        server = await self._loop.create_server(
+            lambda: NestPyHTTPProtocol(
+                self.builder,
+                executor,
+                connections,
+                keep_alive_timeout=self.keep_alive_timeout,
+                max_keep_alive_requests=(
+                    self.max_keep_alive_requests if self.keep_alive else 1
+                ),
+                max_body_size=self.max_body_size,
+            ),
+            sock=self.socket,
+            backlog=self.backlog,
+        )
+        self._started.set()
+        try:
+            await self._stop.wait()
+        finally:
+            server.close()
+            for connection in list(connections):
+                connection.close()
+            await server.wait_closed()
+            executor.shutdown(wait=False)
+
+    def shutdown(self):
+        """
+        Stops serve_forever from another thread and waits for it
+        """
+        self._started.wait()
+        self._loop.call_soon_threadsafe(self._stop.set)  # type: ignore
+        self._stopped.wait()
+
+    def server_close(self):
+        self.socket.close()
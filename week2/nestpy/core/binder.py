@@ -0,0 +1,127 @@
+from collections.abc import Iterable, Iterator
+from json import loads
+from typing import Any, Callable, Optional, Union, get_args, get_origin
+from urllib.parse import parse_qs
+
+from nestpy.common import APIInfo, Body, Instance, Param, Query, RequestArgument
+from pydantic import TypeAdapter
+
+from .body import RequestBody
+from .encoder import type_adapter
+
+
+class RouteBinder:
+    """
+    APIInfo compiled once at startup into the call of its controller method.
+
+    Controller method is bound, parameter kinds are resolved and pydantic validators are built here,
+    so a request only pays for validating its own (path params, query string, body bytes).
+    """
+
+    __slots__ = (
+        "api_info",
+        "func",
+        "is_coroutine",
+        "_path_param_names",
+        "_query_params",
+        "_body_adapters",
+        "_streamed_body",
+    )
+
+    def __init__(self, api_info: APIInfo, controller_instance: Instance):
+        self.api_info = api_info
+        self.func: Callable[..., Any] = getattr(controller_instance, api_info.func_name)
+        self.is_coroutine = api_info.is_coroutine
+
+        self._path_param_names = tuple(api_info.path_param_info_dict.keys())
+        self._query_params = tuple(
+            (param_name, param_info.required, param_info.default)
+            for param_name, param_info in api_info.query_param_info_dict.items()
+        )
+        self._body_adapters = tuple(
+            (param_name, type_adapter(param_info.type))
+            for param_name, param_info in api_info.body_param_info_dict.items()
+            if get_origin(param_info.type) not in (Iterator, Iterable)
+        )
+
+        # Body[Iterator[Model]] is parsed from ndjson body while controller iterates it
+        self._streamed_body: Optional[tuple[str, TypeAdapter]] = None
+        for param_name, param_info in api_info.body_param_info_dict.items():
+            if get_origin(param_info.type) not in (Iterator, Iterable):
+                continue
+            if len(api_info.body_param_info_dict) > 1:
+                raise ValueError(
+                    f"streamed body {param_name} of {api_info.func_name} should be the only body param"
+                )
+            (item_type,) = get_args(param_info.type) or (Any,)
+            self._streamed_body = (param_name, type_adapter(item_type))
+
+    def parse_body(self, request_body: RequestBody) -> dict[str, Body[Any]]:
+        """
+        Every body param is validated against the whole body, empty body is regarded as {}
+        """
+        if self._streamed_body is not None:
+            param_name, adapter = self._streamed_body
+            return {param_name: Body(request_body.iter_models(adapter))}
+        if not self._body_adapters:
+            return {}
+
+        body = request_body.read()
+        if not body:
+            return {
+                param_name: Body(adapter.validate_python({}))
+                for param_name, adapter in self._body_adapters
+            }
+        if len(self._body_adapters) == 1:
+            param_name, adapter = self._body_adapters[0]
+            return {param_name: Body(adapter.validate_json(body))}
+        loaded = loads(body)
+        return {
+            param_name: Body(adapter.validate_python(loaded))
+            for param_name, adapter in self._body_adapters
+        }
+
+    def bind(
+        self,
+        path_params: dict[str, str],
+        query_string: str,
+        body: Union[bytes, RequestBody],
+    ) -> dict[str, RequestArgument[Any]]:
+        """
+        Raises ValueError (pydantic ValidationError included) for invalid request
+        """
+        if isinstance(body, bytes):
+            body = RequestBody.from_bytes(body)
+        return self.bind_params(self.parse_body(body), path_params, query_string)  # type: ignore
+
+    def bind_params(
+        self,
+        inputs: dict[str, RequestArgument[Any]],
+        path_params: dict[str, str],
+        query_string: str,
+    ) -> dict[str, RequestArgument[Any]]:
+        """
+        Adds path and query params to parsed body params
+        """
+        for param_name in self._path_param_names:
+            inputs[param_name] = Param(path_params[param_name])
+
+        if self._query_params:
+            query = parse_qs(query_string) if query_string else {}
+            for param_name, required, default in self._query_params:
+                if (values := query.get(param_name)) is not None:
+                    inputs[param_name] = Query(values[0])
+                elif required:
+                    raise ValueError(f"missing required query param: {param_name}")
+                else:
+                    inputs[param_name] = Query(default)
+
+        return inputs
+
+    def __call__(
+        self,
+        path_params: dict[str, str],
+        query_string: str,
+        body: Union[bytes, RequestBody],
+    ):
+        return self.func(**self.bind(path_params, query_string, body))
@@ -0,0 +1,85 @@
+from io import BytesIO
+from typing import BinaryIO, Iterator, Optional
+
+from pydantic import TypeAdapter, ValidationError
+
+DEFAULT_MAX_BODY_SIZE = 16 * 1024 * 1024
+_DRAIN_CHUNK_SIZE = 64 * 1024
+
+
+def parse_content_length(value: Optional[str]) -> int:
+    """
+    Content-Length header, 0 when absent.
+    Raises ValueError unless it is digits only, e.g. `-5` or `+5` would desync the connection.
+    """
+    if not value:
+        return 0
+    if not (value := value.strip()).isascii() or not value.isdigit():
+        raise ValueError(f"invalid content length {value!r}")
+    return int(value)
+
+
+class InvalidBody(ValueError):
+    """
+    Raised while controller consumes streamed body, responded with 400
+    """
+
+
+class RequestBody:
+    """
+    Request body read lazily from connection, at most `content_length` bytes.
+
+    Size limit is checked against Content-Length header before constructing this.
+    """
+
+    __slots__ = ("_file", "_remaining")
+
+    def __init__(self, file: BinaryIO, content_length: int):
+        self._file = file
+        self._remaining = content_length
+
+    @classmethod
+    def from_bytes(cls, body: bytes) -> "RequestBody":
+        return cls(BytesIO(body), len(body))
+
+    @property
+    def remaining(self) -> int:
+        return self._remaining
+
+    def read(self) -> bytes:
+        if self._remaining <= 0:
+            return b""
+        body = self._file.read(self._remaining)
+        self._remaining = 0
+        return body
+
+    def iter_lines(self) -> Iterator[bytes]:
+        while self._remaining > 0:
+            if not (line := self._file.readline(self._remaining)):
+                # connection closed
+                self._remaining = 0
+                return
+            self._remaining -= len(line)
+            yield line
+
+    def iter_models(self, adapter: TypeAdapter) -> Iterator:
+        """
+        Parses ndjson body line by line off the connection
+        """
+        for line in self.iter_lines():
+            if not line.strip():
+                continue
+            try:
+                yield adapter.validate_json(line)
+            except ValidationError as e:
+                raise InvalidBody(str(e)) from e
+
+    def drain(self) -> None:
+        """
+        Discards unread body, so that next request of persistent connection can be parsed
+        """
+        while self._remaining > 0:
+            if not (chunk := self._file.read(min(self._remaining, _DRAIN_CHUNK_SIZE))):
+                self._remaining = 0
+                return
+            self._remaining -= len(chunk)
@@ -0,0 +1,94 @@
+import gzip
+from typing import Optional
+
+try:
+    import brotli
+except ImportError:  # optional backend
+    brotli = None
+
+DEFAULT_MIN_SIZE = 1024
+# compressed on worker thread by asyncio engine from this size
+DEFAULT_OFFLOAD_SIZE = 256 * 1024
+
+
+def supported_encodings() -> tuple[str, ...]:
+    """
+    In order of preference
+    """
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def parse_accept_encoding(accept_encoding: Optional[str]) -> dict[str, float]:
+    """
+    Coding -> q value, e.g. `gzip, br;q=0.5` -> {"gzip": 1.0, "br": 0.5}
+    """
+    if not accept_encoding:
+        return {}
+    qvalues: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        if not (coding := coding.strip().lower()):
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qvalues[coding] = q
+    return qvalues
+
+
+class Compressor:
+    """
+    Compresses response body of at least `min_size` bytes with the best coding client accepts,
+    brotli (if installed) or gzip.
+    """
+
+    def __init__(
+        self,
+        min_size: int = DEFAULT_MIN_SIZE,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        offload_size: int = DEFAULT_OFFLOAD_SIZE,
+    ):
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.offload_size = offload_size
+        self.encodings = supported_encodings()
+
+    def negotiate(self, accept_encoding: Optional[str]) -> Optional[str]:
+        """
+        Coding of response, None for identity
+        """
+        qvalues = parse_accept_encoding(accept_encoding)
+        if not qvalues:
+            return None
+        default = qvalues.get("*", 0.0)
+        best: Optional[str] = None
+        best_q = 0.0
+        for encoding in self.encodings:
+            if (q := qvalues.get(encoding, default)) > best_q:
+                best, best_q = encoding, q
+        return best
+
+    def should_compress(self, body: bytes) -> bool:
+        return len(body) >= self.min_size
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)  # type: ignore
+        # mtime is fixed, so same body is compressed to same bytes
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+
+def encoded_etag(etag: str, encoding: Optional[str]) -> str:
+    """
+    Compressed representation has its own strong ETag
+    """
+    if encoding is None:
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
@@ -0,0 +1,101 @@
+from collections.abc import (
+    AsyncGenerator,
+    AsyncIterable,
+    AsyncIterator,
+    Generator,
+    Iterable,
+    Iterator,
+)
+from typing import Any, Callable, Optional, get_args, get_origin
+
+from pydantic import BaseModel, TypeAdapter
+from pydantic_core import to_json
+
+try:
+    import orjson
+except ImportError:  # optional backend
+    orjson = None
+
+Encoder = Callable[[Any], bytes]
+
+# type -> adapter, shared by routes of same model as building its schema dominates startup
+_type_adapters: dict[Any, TypeAdapter] = {}
+
+_STREAM_ORIGINS = (
+    Iterator,
+    Iterable,
+    Generator,
+    AsyncIterator,
+    AsyncIterable,
+    AsyncGenerator,
+)
+
+
+def _orjson_default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    raise TypeError(f"unsupported type: {type(obj)}")
+
+
+def encode_default(res: Any) -> bytes:
+    """
+    Encoder of controller method without return annotation
+    """
+    if isinstance(res, bytes):
+        return res
+    if isinstance(res, str):
+        return res.encode()
+    if isinstance(res, int) and not isinstance(res, bool):
+        return res.to_bytes()
+    if isinstance(res, BaseModel):
+        return res.__pydantic_serializer__.to_json(res)
+    if isinstance(res, (dict, list)):
+        if orjson is not None:
+            return orjson.dumps(res, default=_orjson_default)
+        return to_json(res)
+    raise Exception(f"unsupported type: {type(res)}")
+
+
+def type_adapter(tp: Any) -> TypeAdapter:
+    """
+    Adapter of tp, built once per type
+    """
+    try:
+        if (adapter := _type_adapters.get(tp)) is None:
+            adapter = _type_adapters[tp] = TypeAdapter(tp)
+    except TypeError:
+        # unhashable, e.g. Annotated with unhashable metadata
+        return TypeAdapter(tp)
+    return adapter
+
+
+def compile_encoder(return_type: Optional[Any]) -> Encoder:
+    """
+    Derives response encoder from return annotation of controller method (e.g. `-> list[Cat]`).
+
+    Annotated result is dumped to json bytes by pydantic at once, without intermediate dicts and str.
+    """
+    if return_type is None:
+        return encode_default
+
+    dump_json = type_adapter(return_type).dump_json
+
+    def encode(res: Any) -> bytes:
+        if isinstance(res, bytes):
+            return res
+        return dump_json(res)
+
+    return encode
+
+
+def is_stream_type(return_type: Optional[Any]) -> bool:
+    return get_origin(return_type) in _STREAM_ORIGINS
+
+
+def compile_item_encoder(return_type: Optional[Any]) -> Encoder:
+    """
+    Encoder of each item of streamed response (e.g. `-> Iterator[Cat]`)
+    """
+    if is_stream_type(return_type) and (args := get_args(return_type)):
+        return compile_encoder(args[0])
+    return encode_default
@@ -0,0 +1,23 @@
+from hashlib import blake2b
+from typing import Optional
+
+
+def compute_etag(body: bytes) -> str:
+    """
+    Strong ETag of response body
+    """
+    return f'"{blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether If-None-Match header matches etag, compared weakly as RFC 9110 requires
+    """
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag.removeprefix("W/")
+        for candidate in if_none_match.split(",")
+    )
@@ -1,23 +1,164 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from http.server import HTTPServer
+from threading import BoundedSemaphore
+from typing import Literal, Optional
 
 from nestpy.common import Class
 
-from .handler import NestPyHTTPRequestHandlerBuilder
+from .asyncio_server import NestPyAsyncioServer
+from .body import DEFAULT_MAX_BODY_SIZE
+from .compression import DEFAULT_MIN_SIZE, Compressor
+from .handler import NestPyHTTPRequestHandler, NestPyHTTPRequestHandlerBuilder
+from .manifest import StartupTimings
+from .metrics import RequestMetrics
+from .worker import ServeMode, fork_workers, validate_serve_options
 
 _logger = logging.getLogger(__name__)
 
+Engine = Literal["blocking", "asyncio"]
+
 
 class NestFactory(HTTPServer):
+    """
+    workers == 1 serves requests one by one in the serving thread.
+
+    mode "thread": requests are handled by a bounded pool of `workers` threads.
+    When every worker is busy, accepting stops and new connections wait in the listen backlog.
+
+    mode "process": `workers` processes are forked and share the listening socket.
+    Route table and DI singletons are built before fork, so each process owns its copy of them.
+    """
+
+    request_queue_size = 128
+    # set by create(metrics=True)
+    metrics: Optional[RequestMetrics] = None
+    # set by create
+    startup: Optional[StartupTimings] = None
+
+    def __init__(
+        self,
+        server_address: tuple[str, int],
+        handler_cls: type[NestPyHTTPRequestHandler],
+        workers: int = 1,
+        mode: ServeMode = "thread",
+    ):
+        validate_serve_options(workers, mode)
+        super().__init__(server_address, handler_cls)
+        self.workers = workers
+        self.mode = mode
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._worker_slots: Optional[BoundedSemaphore] = None
+        if mode == "thread" and workers > 1:
+            self._executor = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="nestpy-worker"
+            )
+            self._worker_slots = BoundedSemaphore(workers)
+
     def serve(self):
-        _logger.info(f"Server is running on {self.server_address}")
+        _logger.info(
+            f"Server is running on {self.server_address} ({self.mode} x {self.workers})"
+        )
+        if self.mode == "process" and self.workers > 1:
+            fork_workers(self.serve_forever, self.workers)
+            return
         self.serve_forever()
 
+    def process_request(self, request, client_address):
+        if self._executor is None or self._worker_slots is None:
+            return super().process_request(request, client_address)
+        self._worker_slots.acquire()
+        self._executor.submit(self._process_request_worker, request, client_address)
+
+    def _process_request_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._worker_slots.release()  # type: ignore
+
+    def server_close(self):
+        super().server_close()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
     @staticmethod
     def create(
-        root_module_cls: Class, host: str = "localhost", port: int = 3000
-    ) -> "NestFactory":
+        root_module_cls: Class,
+        host: str = "localhost",
+        port: int = 3000,
+        workers: int = 1,
+        mode: ServeMode = "thread",
+        engine: Engine = "blocking",
+        keep_alive: Optional[bool] = None,
+        keep_alive_timeout: Optional[float] = 5.0,
+        max_keep_alive_requests: int = 100,
+        max_body_size: int = DEFAULT_MAX_BODY_SIZE,
+        metrics: bool = False,
+        metrics_path: str = "metrics",
+        etag: bool = True,
+        compression: bool = False,
+        compression_min_size: int = DEFAULT_MIN_SIZE,
+        manifest_cache: Optional[str] = None,
+    ) -> "NestFactory | NestPyAsyncioServer":
+        """
+        engine "blocking" serves with http.server, engine "asyncio" serves with NestPyAsyncioServer
+
+        Persistent connections are closed after `keep_alive_timeout` seconds of idle or `max_keep_alive_requests` requests.
+        By default keep-alive is disabled when blocking engine serves connections one by one in a process,
+        because one idle persistent connection would block every other client.
+
+        Request body larger than `max_body_size` bytes is rejected with 413.
+
+        With `metrics`, requests are counted and timed by route and phase,
+        readable in process as `app.metrics` and served at GET `metrics_path` in prometheus text.
+
+        With `etag`, GET responses have ETag of their body, and are answered with 304
+        when it matches If-None-Match (routes with `@ETag` or `@Cache` have ETag regardless).
+
+        With `compression`, response bodies of at least `compression_min_size` bytes are compressed
+        with brotli (if installed) or gzip, as negotiated by Accept-Encoding.
+
+        Module graph is compiled into a manifest of providers and routes on start.
+        With `manifest_cache` (file path), it is kept on disk and reused while sources of its classes are unchanged.
+        Cold start is readable as `app.startup`.
+        """
+        if engine not in ["blocking", "asyncio"]:
+            raise ValueError(f"invalid engine {engine}")
+        validate_serve_options(workers, mode)
+
         server_address = (host, port)
-        handler_builder = NestPyHTTPRequestHandlerBuilder(root_module_cls)
-        httpd = NestFactory(server_address, handler_builder.build_handler())
+        handler_builder = NestPyHTTPRequestHandlerBuilder(
+            root_module_cls, manifest_cache=manifest_cache
+        )
+        handler_builder.etag = etag
+        if compression:
+            handler_builder.compressor = Compressor(min_size=compression_min_size)
+        if metrics:
+            handler_builder.enable_metrics(metrics_path)
+        if engine == "asyncio":
+            return NestPyAsyncioServer(
+                server_address,
+                handler_builder,
+                workers=workers,
+                mode=mode,
+                keep_alive=True if keep_alive is None else keep_alive,
+                keep_alive_timeout=keep_alive_timeout,
+                max_keep_alive_requests=max_keep_alive_requests,
+                max_body_size=max_body_size,
+            )
+
+        if keep_alive is None:
+            keep_alive = mode == "thread" and workers > 1
+        handler_cls = handler_builder.build_handler(
+            keep_alive=keep_alive,
+            keep_alive_timeout=keep_alive_timeout,
+            max_keep_alive_requests=max_keep_alive_requests,
+            max_body_size=max_body_size,
+        )
+        httpd = NestFactory(server_address, handler_cls, workers=workers, mode=mode)
+        httpd.metrics = handler_builder.metrics
+        httpd.startup = handler_builder.startup
         return httpd
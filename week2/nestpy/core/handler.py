@@ -1,27 +1,71 @@
+import asyncio
 import logging
+from http.client import HTTPMessage
 from http.server import BaseHTTPRequestHandler
-from inspect import _empty
-from json import dumps, loads
+from inspect import iscoroutine
+from time import perf_counter
 from typing import Any, Optional
-from urllib.parse import parse_qs, urlparse
 
 from nestpy.common import (
     APIInfo,
-    Body,
+    CachedResponse,
     Class,
-    Instance,
-    InstanceInitiator,
-    Param,
-    ParameterInfo,
-    Query,
+    ResponseCache,
     get_api_info_list,
 )
-from pydantic import BaseModel
+
+from .body import (
+    DEFAULT_MAX_BODY_SIZE,
+    InvalidBody,
+    RequestBody,
+    parse_content_length,
+)
+from .compression import Compressor, encoded_etag
+from .etag import compute_etag, etag_matches
+from .manifest import StartupTimings, class_path, get_manifest
+from .metrics import (
+    BIND,
+    BODY,
+    CONTROLLER,
+    PROMETHEUS_CONTENT_TYPE,
+    ROUTING,
+    SERIALIZE,
+    WRITE,
+    RequestMetrics,
+    Timer,
+    request_timer,
+)
+from .response import (
+    BAD_REQUEST,
+    INTERNAL_SERVER_ERROR,
+    NOT_FOUND,
+    ControllerCall,
+    Response,
+)
+from .route import Route
+from .router import Router
+from .stream import ResponseStream, accepts_ndjson, is_stream
 
 _logger = logging.getLogger(__name__)
 
+# request methods served by both engines, others are answered with 501
+SUPPORTED_METHODS = ("GET", "POST")
+
 
 class NestPyHTTPRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # headers and body are written separately, don't wait for delayed ACK between them
+    disable_nagle_algorithm = True
+    # idle timeout of persistent connection in seconds
+    timeout: Optional[float] = 5.0
+    keep_alive = True
+    max_keep_alive_requests = 100
+    max_body_size = DEFAULT_MAX_BODY_SIZE
+    handled_requests = 0
+
+    def log_message(self, format: str, *args: Any) -> None:
+        _logger.info(f"{self.address_string()} {format % args}")
+
     def do_GET(self):
         """
         This will be replace by NestPyHTTPRequestHandlerBuilder
@@ -36,151 +80,443 @@ class NestPyHTTPRequestHandler(BaseHTTPRequestHandler):
 
 
 class NestPyHTTPRequestHandlerBuilder:
-    def __init__(self, root_module_cls: Class):
+    """
+    Builds DI singletons and route table from manifest of root module,
+    read from `manifest_cache` when sources are unchanged (see nestpy.core.manifest)
+    """
+
+    def __init__(self, root_module_cls: Class, manifest_cache: Optional[str] = None):
         self._handler = NestPyHTTPRequestHandler
-        self._instance_initiator = InstanceInitiator()
-        self._instance_initiator.register_cls(root_module_cls)
-        self._instance_initiator.get_or_init_instance(root_module_cls)
-
-        controllers = self._instance_initiator.get_controllers()
-        self.api_info_with_controller_list: list[tuple[APIInfo, Instance]] = []
-        for controller in controllers:
-            for api_info in get_api_info_list(controller):
-                self.api_info_with_controller_list.append((api_info, controller))
-
-    def _match_path(self, path: str, nestpy_path: str) -> Optional[dict[str, str]]:
-        splitted_path = path.strip("/").split("/")
-        splitted_nestpy_path = nestpy_path.strip("/").split("/")
-        if len(splitted_path) != len(splitted_nestpy_path):
+        # per route request metrics, see enable_metrics
+        self.metrics: Optional[RequestMetrics] = None
+        # ETag from body of GET responses, routes with @ETag or @Cache have it regardless
+        self.etag = True
+        # compresses large responses when set
+        self.compressor: Optional[Compressor] = None
+
+        started = perf_counter()
+        manifest, manifest_source = get_manifest(root_module_cls, manifest_cache)
+        compiled = perf_counter()
+        instances = manifest.instantiate()
+        initiated = perf_counter()
+
+        self.router: Router[Route] = Router()
+        # controller -> func name -> APIInfo, with path prefixed by controller
+        api_infos: dict[str, dict[str, APIInfo]] = {}
+        cached = False
+        for entry in manifest.routes:
+            controller = instances[entry.controller]
+            if (controller_api_infos := api_infos.get(entry.controller)) is None:
+                controller_api_infos = api_infos[entry.controller] = {
+                    api_info.func_name: api_info
+                    for api_info in get_api_info_list(type(controller))
+                }
+            route = Route(controller_api_infos[entry.func_name], controller)
+            cached = cached or route.cache is not None
+            self.router.add(entry.request_method, entry.path, route)
+
+        # responses of @Cache routes, same instance as injected to services for invalidation
+        self.response_cache: Optional[ResponseCache] = None
+        if cached:
+            self.response_cache = instances.get(class_path(ResponseCache))
+            if self.response_cache is None:
+                self.response_cache = ResponseCache()
+        finished = perf_counter()
+
+        # cold start of this process, also readable as `app.startup`
+        self.startup = StartupTimings(
+            manifest=manifest_source,
+            providers=len(manifest.providers),
+            routes=len(manifest.routes),
+            manifest_seconds=compiled - started,
+            instances_seconds=initiated - compiled,
+            routes_seconds=finished - initiated,
+            total_seconds=finished - started,
+        )
+        _logger.info(
+            f"{len(manifest.providers)} providers and {len(manifest.routes)} routes "
+            f"started in {self.startup['total_seconds'] * 1000:.1f}ms ({manifest_source} manifest)"
+        )
+
+    def enable_metrics(self, path: str = "metrics") -> RequestMetrics:
+        """
+        Starts recording requests of both engines and serves them at GET `path` in prometheus text
+        """
+        self.metrics = RequestMetrics()
+        api_info = APIInfo(
+            path=path.strip("/"), request_method="GET", func_name="render"
+        )
+        self.router.add(
+            "GET",
+            api_info.path,
+            Route(api_info, self.metrics, content_type=PROMETHEUS_CONTENT_TYPE),
+        )
+        return self.metrics
+
+    def not_modified(self, headers: HTTPMessage, etag: str) -> Optional[str]:
+        """
+        ETag of any representation matching If-None-Match, for 304 before body is built
+        """
+        if (if_none_match := headers.get("If-None-Match")) is None:
             return None
-        path_params: dict[str, str] = {}
-        for i in range(len(splitted_path)):
-            if splitted_nestpy_path[i].startswith(":"):
-                path_params[splitted_nestpy_path[i][1:]] = splitted_path[i]
-            elif splitted_nestpy_path[i] != splitted_path[i]:
-                return None
-        return path_params
-
-    def _build_path_param_inputs(
-        self,
-        path_param_info_dict: dict[str, ParameterInfo],
-        path_params: dict[str, str],
-    ) -> dict[str, Param[Any]]:
-        return_val: dict[str, Param[Any]] = {}
-        for param_name, _param_info in path_param_info_dict.items():
-            return_val[param_name] = Param(path_params[param_name])
-        return return_val
-
-    def _build_body_param_inputs(
-        self, body_param_info_dict: dict[str, ParameterInfo], body: dict[str, Any]
-    ) -> dict[str, Body[Any]]:
-        return_val: dict[str, Body[Any]] = {}
-        for param_name, param_info in body_param_info_dict.items():
-            if BaseModel in param_info.type.__bases__:
-                print(body)
-                return_val[param_name] = Body(param_info.type(**body))
-                continue
-            return_val[param_name] = Body(body)
-        return return_val
-
-    def _build_query_param_inputs(
-        self,
-        query_param_info_dict: dict[str, ParameterInfo],
-        query_params: dict[str, Any],
-    ) -> dict[str, Query[Any]]:
-        return_val: dict[str, Query[Any]] = {}
-        for param_name, param_info in query_param_info_dict.items():
-            try:
-                return_val[param_name] = Query(query_params[param_name][0])
-            except KeyError:
-                if param_info.required:
-                    raise ValueError(f"missing required query param: {param_name}")
-                if param_info.default is _empty:
-                    raise Exception(
-                        f"missing value for query param: {param_name} {param_info}"
-                    )
-                return_val[param_name] = Query(param_info.default)
-        return return_val
-
-    def _process_response(self, res: Any) -> bytes:
-        if isinstance(res, BaseModel):
-            res = res.json()
-        if isinstance(res, dict):
-            res = dumps(res)
-        if isinstance(res, list):
-            res = [x.dict() for x in res]
-            res = dumps(res)
-        if isinstance(res, str):
-            res = res.encode()
-        if isinstance(res, int):
-            res = res.to_bytes()
-        if not isinstance(res, bytes):
-            raise Exception(f"unsupported type: {type(res)}")
-        return res
-
-    def _get_body(self, handler: NestPyHTTPRequestHandler) -> dict[str, Any]:
-        if handler.headers.get("Content-Length") is None:
-            return {}
-        content_len = int(handler.headers.get("Content-Length"))
-        body = handler.rfile.read(content_len)
-        body = body.decode("utf-8")
-        body = loads(body)
-        return body
+        if etag_matches(if_none_match, etag):
+            return etag
+        if self.compressor is not None and (
+            encoding := self.compressor.negotiate(headers.get("Accept-Encoding"))
+        ):
+            if etag_matches(if_none_match, encoded := encoded_etag(etag, encoding)):
+                return encoded
+        return None
+
+    def response_encoding(self, headers: HTTPMessage, body: bytes) -> Optional[str]:
+        """
+        Content coding of 200 response body, None for identity
+        """
+        if self.compressor is None or not self.compressor.should_compress(body):
+            return None
+        return self.compressor.negotiate(headers.get("Accept-Encoding"))
+
+    def compress(
+        self, body: bytes, encoding: str, cached: Optional[CachedResponse] = None
+    ) -> bytes:
+        """
+        Compressed body of cached response is kept with it
+        """
+        if cached is not None and (encoded := cached.encoded.get(encoding)):
+            return encoded
+        encoded = self.compressor.compress(body, encoding)  # type: ignore
+        if cached is not None:
+            cached.encoded[encoding] = encoded
+        return encoded
+
+    def _get_request_body(
+        self, handler: NestPyHTTPRequestHandler
+    ) -> Optional[RequestBody]:
+        """
+        Returns None after responding error, when body can't be read
+        """
+        if handler.headers.get("Transfer-Encoding") is not None:
+            self._send(
+                handler,
+                501,
+                b'{"message": "chunked request body is not supported"}',
+                close=True,
+            )
+            return None
+        try:
+            content_len = parse_content_length(handler.headers.get("Content-Length"))
+        except ValueError:
+            self._send(
+                handler, 400, b'{"message": "invalid content length"}', close=True
+            )
+            return None
+        if content_len > handler.max_body_size:
+            # body is not read, so connection can't be reused
+            self._send(
+                handler, 413, b'{"message": "request body too large"}', close=True
+            )
+            return None
+        return RequestBody(handler.rfile, content_len)
 
     def _nestpy_process_request(self, handler: NestPyHTTPRequestHandler):
-        for api_info, controller_instance in self.api_info_with_controller_list:
-            if (
-                handler.command == api_info.request_method
-                and (path_params := self._match_path(handler.path, api_info.path))
-                is not None
-            ):
-                body = self._get_body(handler)
-                controller_func = getattr(controller_instance, api_info.func_name)
-                body_param_inputs = self._build_body_param_inputs(
-                    api_info.body_param_info_dict, body
-                )
+        if (body := self._get_request_body(handler)) is None:
+            return
+        try:
+            self._dispatch(handler, body)
+        finally:
+            # unread body would be parsed as next request of persistent connection
+            body.drain()
 
-                query_param_inputs = self._build_query_param_inputs(
-                    api_info.query_param_info_dict,
-                    parse_qs(urlparse(handler.path).query),
-                )
+    def begin(
+        self, command: str, path: str, headers: HTTPMessage, body: RequestBody
+    ) -> Response | ControllerCall:
+        """
+        Response path shared by both engines, up to calling controller:
+        routing, `@ETag` version (304), `@Cache` lookup and binding of params.
+
+        Returns response when controller needs not be called.
+        """
+        timer = request_timer(self.metrics, command)
+        matched = self.router.lookup(command, path)
+        timer.lap(ROUTING)
+        if matched is None:
+            return Response(404, NOT_FOUND, timer)
+
+        route, path_params = matched
+        timer.route = route.template
+        query_string = path.partition("?")[2]
+        try:
+            etag = route.version_etag(path_params, query_string)
+        except Exception:
+            _logger.exception("error while computing version etag")
+            return Response(500, INTERNAL_SERVER_ERROR, timer)
+        if etag is not None and (matched_etag := self.not_modified(headers, etag)):
+            return Response(
+                304, timer=timer, etag=matched_etag, vary=self.compressor is not None
+            )
+        cache_key = None
+        if route.cache is not None:
+            cache_key = route.cache_key(path_params, query_string)
+            cached = self.response_cache.get(route.template, cache_key)  # type: ignore
+            # also stale when version changed
+            if cached is not None and (etag is None or cached.etag == etag):
+                return self._ok(headers, route, cached.body, cached.etag, timer, cached)
+        try:
+            inputs = route.binder.parse_body(body)
+            timer.lap(BODY)
+            route.binder.bind_params(inputs, path_params, query_string)  # type: ignore
+            timer.lap(BIND)
+        except ValueError:
+            _logger.warning("invalid request", exc_info=True)
+            return Response(400, BAD_REQUEST, timer)
+        return ControllerCall(command, headers, route, inputs, etag, cache_key, timer)
 
-                path_param_inputs = self._build_path_param_inputs(
-                    api_info.path_param_info_dict, path_params
+    def complete(self, call: ControllerCall, res: Any) -> Response:
+        """
+        Response path shared by both engines, from result of controller:
+        stream or encoded body with ETag, stored to `@Cache`
+        """
+        timer = call.timer
+        timer.lap(CONTROLLER)
+        route = call.route
+        try:
+            if is_stream(res):
+                stream = ResponseStream(
+                    res,
+                    route.encode_item,
+                    ndjson=accepts_ndjson(call.headers.get("Accept")),
                 )
+                timer.lap(SERIALIZE)
+                return Response(
+                    200, timer=timer, content_type=stream.content_type, stream=stream
+                )
+            body = route.encode(res)
+            timer.lap(SERIALIZE)
+        except Exception as e:
+            return self.fail(call, e)
+
+        etag = call.etag
+        if etag is None and (
+            call.cache_key is not None or (self.etag and call.command == "GET")
+        ):
+            etag = compute_etag(body)
+        cached = None
+        if call.cache_key is not None:
+            cached = self.response_cache.put(  # type: ignore
+                route.template, call.cache_key, body, etag, route.cache  # type: ignore
+            )
+        return self._ok(call.headers, route, body, etag, timer, cached)
+
+    def fail(self, call: ControllerCall, error: Exception) -> Response:
+        """
+        Response to exception raised by controller or while encoding its result
+        """
+        if isinstance(error, InvalidBody):
+            _logger.warning("invalid request body", exc_info=error)
+            return Response(400, BAD_REQUEST, call.timer)
+        _logger.error("error while processing request", exc_info=error)
+        return Response(500, INTERNAL_SERVER_ERROR, call.timer)
+
+    def _ok(
+        self,
+        headers: HTTPMessage,
+        route: Route,
+        body: bytes,
+        etag: Optional[str],
+        timer: Timer,
+        cached: Optional[CachedResponse] = None,
+    ) -> Response:
+        """
+        200 response (to be compressed if negotiated), or 304 without body when If-None-Match has etag
+        """
+        vary = self.compressor is not None
+        encoding = self.response_encoding(headers, body)
+        if etag is not None:
+            etag = encoded_etag(etag, encoding)
+            if etag_matches(headers.get("If-None-Match"), etag):
+                return Response(304, timer=timer, etag=etag, vary=vary)
+        return Response(
+            200,
+            body,
+            timer,
+            content_type=route.content_type,
+            etag=etag,
+            vary=vary,
+            pending_encoding=encoding,
+            cached=cached,
+        )
+
+    def compress_response(self, response: Response) -> None:
+        """
+        Compresses body with negotiated encoding, if any
+        """
+        if (encoding := response.pending_encoding) is None:
+            return
+        response.body = self.compress(response.body, encoding, response.cached)
+        response.encoding = encoding
+        response.pending_encoding = None
+        if response.timer is not None:
+            response.timer.lap(SERIALIZE)
+
+    def _dispatch(self, handler: NestPyHTTPRequestHandler, body: RequestBody):
+        response = self.begin(handler.command, handler.path, handler.headers, body)
+        if isinstance(response, ControllerCall):
+            call = response
+            try:
+                res = call.func(**call.inputs)
+                if iscoroutine(res):
+                    # async controller served by blocking engine
+                    res = asyncio.run(res)
+            except Exception as e:
+                response = self.fail(call, e)
+            else:
+                response = self.complete(call, res)
+        self.compress_response(response)
+        if response.stream is not None:
+            self._send_stream(handler, response.stream, response.timer)  # type: ignore
+            return
+        self._send(
+            handler,
+            response.status,
+            response.body,
+            content_type=response.content_type,
+            timer=response.timer,
+            etag=response.etag,
+            encoding=response.encoding,
+            vary=response.vary,
+        )
+
+    def _send(
+        self,
+        handler: NestPyHTTPRequestHandler,
+        status: int,
+        body: bytes,
+        content_type: Optional[str] = None,
+        close: bool = False,
+        timer: Optional[Timer] = None,
+        etag: Optional[str] = None,
+        encoding: Optional[str] = None,
+        vary: bool = False,
+    ):
+        self._send_headers(
+            handler,
+            status,
+            content_type,
+            None if status == 304 else len(body),
+            close=close,
+            etag=etag,
+            encoding=encoding,
+            vary=vary,
+        )
+        handler.wfile.write(body)
+        if timer is not None:
+            timer.lap(WRITE)
+            timer.finish(status, len(body))
+
+    def _send_stream(
+        self,
+        handler: NestPyHTTPRequestHandler,
+        stream: ResponseStream,
+        timer: Timer,
+    ):
+        """
+        Items are encoded while writing, so both are timed as write phase
+        """
+        chunked = self._send_headers(handler, 200, stream.content_type, None)
+        response_bytes = 0
+        try:
+            for chunk in stream.iter_chunks():
+                if not chunk:
+                    # empty chunk terminates chunked body
+                    continue
+                response_bytes += len(chunk)
+                if chunked:
+                    chunk = b"%X\r\n%b\r\n" % (len(chunk), chunk)
+                handler.wfile.write(chunk)
+            if chunked:
+                handler.wfile.write(b"0\r\n\r\n")
+        except Exception:
+            _logger.exception("error while streaming response")
+            # response has already started, closing connection is the only way to tell client
+            handler.close_connection = True
+        timer.lap(WRITE)
+        timer.finish(200, response_bytes)
+
+    def _send_headers(
+        self,
+        handler: NestPyHTTPRequestHandler,
+        status: int,
+        content_type: Optional[str],
+        content_length: Optional[int],
+        close: bool = False,
+        etag: Optional[str] = None,
+        encoding: Optional[str] = None,
+        vary: bool = False,
+    ) -> bool:
+        """
+        Sends status line and headers, returns whether body should be chunked.
+
+        Body without content length is chunked, or ends with closing connection for HTTP/1.0 client.
+        304 has no body.
+        """
+        handler.send_response(status)
+        if content_type is not None:
+            handler.send_header("Content-type", content_type)
+        if etag is not None:
+            handler.send_header("ETag", etag)
+        if encoding is not None:
+            handler.send_header("Content-Encoding", encoding)
+        if vary:
+            handler.send_header("Vary", "Accept-Encoding")
+
+        chunked = False
+        has_body = status != 304
+        if content_length is not None:
+            handler.send_header("Content-Length", str(content_length))
+        elif handler.request_version != "HTTP/1.0" and has_body:
+            handler.send_header("Transfer-Encoding", "chunked")
+            chunked = True
+
+        handler.handled_requests += 1
+        if (
+            close
+            or not handler.keep_alive
+            or handler.handled_requests >= handler.max_keep_alive_requests
+            or (content_length is None and not chunked and has_body)
+        ):
+            # also sets handler.close_connection
+            handler.send_header("Connection", "close")
+        elif handler.request_version == "HTTP/1.0" and not handler.close_connection:
+            handler.send_header("Connection", "keep-alive")
 
-                try:
-                    res = controller_func(
-                        **body_param_inputs,
-                        **query_param_inputs,
-                        **path_param_inputs,
-                    )
-                except Exception:
-                    _logger.exception("error while processing request")
-                    handler.send_response(500)
-                    handler.end_headers()
-                    handler.wfile.write(b'{"message": "internal server error"}')
-                    return
-                handler.send_response(200)
-                handler.send_header("Content-type", "application/json")
-                handler.end_headers()
-                handler.wfile.write(self._process_response(res))
-                return
-        handler.send_response(404)
         handler.end_headers()
-        handler.wfile.write(b'{"message": "path not found"}')
+        return chunked
 
-    def build_handler(self) -> type[NestPyHTTPRequestHandler]:
+    def build_handler(
+        self,
+        keep_alive: bool = True,
+        keep_alive_timeout: Optional[float] = 5.0,
+        max_keep_alive_requests: int = 100,
+        max_body_size: int = DEFAULT_MAX_BODY_SIZE,
+    ) -> type[NestPyHTTPRequestHandler]:
         builder = self
-        self._handler._nestpy_process_request = builder._nestpy_process_request
+        # subclass per builder, so several apps can be served in one process
+        handler_cls: type[NestPyHTTPRequestHandler] = type(
+            self._handler.__name__, (self._handler,), {}
+        )
+        handler_cls._nestpy_process_request = builder._nestpy_process_request
+        handler_cls.keep_alive = keep_alive
+        handler_cls.timeout = keep_alive_timeout
+        handler_cls.max_keep_alive_requests = max_keep_alive_requests
+        handler_cls.max_body_size = max_body_size
 
         def do_GET(self: NestPyHTTPRequestHandler):
             builder._nestpy_process_request(self)
 
-        self._handler.do_GET = do_GET
+        handler_cls.do_GET = do_GET
 
         def do_POST(self: NestPyHTTPRequestHandler):
             builder._nestpy_process_request(self)
 
-        self._handler.do_POST = do_POST
-        return self._handler
+        handler_cls.do_POST = do_POST
+        return handler_cls
@@ -0,0 +1,237 @@
+import logging
+import os
+import sys
+from importlib import import_module
+from typing import Literal, Optional, TypedDict
+
+from nestpy.common import Class, Instance, InstanceInitiator, get_api_info_list
+from nestpy.common.constants import CONTROLLER_TOKEN_PREFIX, TOKEN_ATTR
+from pydantic import BaseModel, ConfigDict, PrivateAttr, ValidationError
+
+_logger = logging.getLogger(__name__)
+
+# bumped when layout of cached manifest changes
+MANIFEST_VERSION = 1
+
+
+def class_path(cls: Class) -> str:
+    """
+    e.g. `cats.service:CatsService`, importable unless qualname has `<locals>`
+    """
+    return f"{cls.__module__}:{cls.__qualname__}"
+
+
+def resolve_class(path: str) -> Class:
+    module_name, _, qualname = path.partition(":")
+    obj = import_module(module_name)
+    for name in qualname.split("."):
+        obj = getattr(obj, name)
+    return obj
+
+
+class ProviderEntry(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    cls: str
+    # (param name, class path) of __init__, injected in order
+    dependencies: tuple[tuple[str, str], ...] = ()
+    controller: bool = False
+
+
+class RouteEntry(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    request_method: Literal["GET", "POST"]
+    # full path, e.g. cats/:id
+    path: str
+    controller: str
+    func_name: str
+
+
+class Manifest(BaseModel):
+    """
+    Module graph of an app compiled once by InstanceInitiator: providers in order of resolution
+    (dependencies first) and routes of controllers in order of registration.
+
+    Written to disk with source mtimes of every class, so unchanged apps skip inspecting
+    `__init__` signatures and walking the graph on next start.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    version: int = MANIFEST_VERSION
+    root: str
+    providers: tuple[ProviderEntry, ...]
+    routes: tuple[RouteEntry, ...]
+    # source file -> mtime in ns
+    sources: dict[str, int]
+    # False when any class is not importable by its path, e.g. defined in function
+    cacheable: bool = True
+    # class path -> class, filled on compile or on resolve
+    _classes: dict[str, Class] = PrivateAttr(default_factory=dict)
+
+    def resolve(self, path: str) -> Class:
+        if (cls := self._classes.get(path)) is None:
+            cls = self._classes[path] = resolve_class(path)
+        return cls
+
+    def instantiate(self) -> dict[str, Instance]:
+        """
+        Class path -> singleton, initiated by InstanceInitiator without inspecting `__init__` again
+        """
+        classes = {entry.cls: self.resolve(entry.cls) for entry in self.providers}
+        initiator = InstanceInitiator(
+            {
+                classes[entry.cls]: tuple(
+                    (name, classes[dep]) for name, dep in entry.dependencies
+                )
+                for entry in self.providers
+            }
+        )
+        root = classes[self.root]
+        initiator.register_cls(root)
+        initiator.get_or_init_instance(root)
+        return {
+            path: initiator.get_or_init_instance(cls) for path, cls in classes.items()
+        }
+
+    def is_fresh(self) -> bool:
+        """
+        Whether no source file changed since compile
+        """
+        for source, mtime_ns in self.sources.items():
+            try:
+                if os.stat(source).st_mtime_ns != mtime_ns:
+                    return False
+            except OSError:
+                return False
+        return True
+
+
+def _source(cls: Class) -> Optional[str]:
+    module = sys.modules.get(cls.__module__)
+    return getattr(module, "__file__", None)
+
+
+def compile_manifest(root_module_cls: Class) -> Manifest:
+    """
+    Registers and resolves module graph from root module with InstanceInitiator, without initiating it
+    """
+    initiator = InstanceInitiator()
+    initiator.register_cls(root_module_cls)
+    resolved = initiator.resolve(root_module_cls)
+    classes = {class_path(cls): cls for cls in resolved}
+    providers = tuple(
+        ProviderEntry(
+            cls=class_path(cls),
+            dependencies=tuple(
+                (name, class_path(param_cls))
+                for name, param_cls in initiator.dependencies(cls)
+            ),
+            controller=getattr(cls, TOKEN_ATTR).startswith(CONTROLLER_TOKEN_PREFIX),
+        )
+        for cls in resolved
+    )
+
+    routes: list[RouteEntry] = []
+    # controllers are routed in order of registration
+    for cls in initiator.get_registered_classes():
+        if not getattr(cls, TOKEN_ATTR).startswith(CONTROLLER_TOKEN_PREFIX):
+            continue
+        for api_info in get_api_info_list(cls):
+            routes.append(
+                RouteEntry(
+                    request_method=api_info.request_method,
+                    path=api_info.path,
+                    controller=class_path(cls),
+                    func_name=api_info.func_name,
+                )
+            )
+
+    sources: dict[str, int] = {}
+    cacheable = True
+    for path, cls in classes.items():
+        if "<locals>" in path:
+            cacheable = False
+        # base classes declare routes and __init__ too
+        for klass in cls.__mro__[:-1]:
+            if (source := _source(klass)) is None:
+                cacheable = cacheable and klass is not cls
+                continue
+            if source not in sources:
+                try:
+                    sources[source] = os.stat(source).st_mtime_ns
+                except OSError:
+                    cacheable = False
+
+    manifest = Manifest(
+        root=class_path(root_module_cls),
+        providers=providers,
+        routes=tuple(routes),
+        sources=sources,
+        cacheable=cacheable,
+    )
+    manifest._classes.update(classes)
+    return manifest
+
+
+def load_manifest(path: str, root_module_cls: Class) -> Optional[Manifest]:
+    """
+    Cached manifest of root module, None when it is missing, invalid or stale
+    """
+    try:
+        with open(path, "rb") as f:
+            manifest = Manifest.model_validate_json(f.read())
+    except (OSError, ValidationError) as e:
+        _logger.info(f"manifest cache {path} is not loaded: {e.__class__.__name__}")
+        return None
+    if manifest.version != MANIFEST_VERSION or manifest.root != class_path(
+        root_module_cls
+    ):
+        return None
+    if not manifest.is_fresh():
+        _logger.info(f"manifest cache {path} is stale")
+        return None
+    manifest._classes[manifest.root] = root_module_cls
+    return manifest
+
+
+def save_manifest(manifest: Manifest, path: str) -> bool:
+    """
+    Written atomically, False when manifest is not cacheable
+    """
+    if not manifest.cacheable:
+        _logger.warning(f"manifest of {manifest.root} is not cacheable")
+        return False
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(manifest.model_dump_json())
+    os.replace(tmp_path, path)
+    return True
+
+
+class StartupTimings(TypedDict):
+    manifest: Literal["compiled", "cached"]
+    providers: int
+    routes: int
+    # seconds of each phase
+    manifest_seconds: float
+    instances_seconds: float
+    routes_seconds: float
+    total_seconds: float
+
+
+def get_manifest(
+    root_module_cls: Class, cache_path: Optional[str] = None
+) -> tuple[Manifest, Literal["compiled", "cached"]]:
+    """
+    Loads manifest from `cache_path` if fresh, otherwise compiles and writes it there
+    """
+    if cache_path is not None and (
+        manifest := load_manifest(cache_path, root_module_cls)
+    ):
+        return manifest, "cached"
+    manifest = compile_manifest(root_module_cls)
+    if cache_path is not None:
+        save_manifest(manifest, cache_path)
+    return manifest, "compiled"
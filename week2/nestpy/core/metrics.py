@@ -0,0 +1,276 @@
+from bisect import bisect_left
+from threading import Lock
+from time import perf_counter
+from typing import Optional, TypedDict, Union
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# phases of a request, in order
+ROUTING, BODY, BIND, CONTROLLER, SERIALIZE, WRITE = range(6)
+PHASES = ("routing", "body", "bind", "controller", "serialize", "write")
+
+# upper bounds in seconds, as prometheus `le` labels
+LATENCY_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+# route label of requests which matched no route
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "sum")
+
+    def __init__(self):
+        # last one is +Inf
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q: float) -> float:
+        """
+        Upper bound of bucket where q-quantile lies, 0 if empty
+        """
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                break
+        return (
+            LATENCY_BUCKETS[bucket] if bucket < len(LATENCY_BUCKETS) else float("inf")
+        )
+
+
+class LatencyStats(TypedDict):
+    count: int
+    sum: float
+    p50: float
+    p99: float
+
+
+class RouteStats(TypedDict):
+    method: str
+    route: str
+    # status code -> count
+    requests: dict[int, int]
+    response_bytes: int
+    latency: LatencyStats
+    phases: dict[str, LatencyStats]
+
+
+def _latency_stats(histogram: Histogram) -> LatencyStats:
+    return LatencyStats(
+        count=histogram.count,
+        sum=histogram.sum,
+        p50=histogram.quantile(0.5),
+        p99=histogram.quantile(0.99),
+    )
+
+
+class _RouteMetrics:
+    __slots__ = ("requests", "response_bytes", "latency", "phases")
+
+    def __init__(self):
+        self.requests: dict[int, int] = {}
+        self.response_bytes = 0
+        self.latency = Histogram()
+        self.phases = tuple(Histogram() for _ in PHASES)
+
+
+class RequestTimer:
+    """
+    Times phases of one request, `lap(phase)` ends the phase started at previous lap.
+
+    Phases which are never lapped (e.g. controller of 404, 304 or cache hit) are not recorded.
+    """
+
+    __slots__ = ("_metrics", "method", "route", "_started", "_last", "_durations")
+
+    def __init__(self, metrics: "RequestMetrics", method: str):
+        self._metrics = metrics
+        self.method = method
+        # route template, set after routing
+        self.route = UNMATCHED_ROUTE
+        self._started = self._last = perf_counter()
+        # None for phases not reached
+        self._durations: list[Optional[float]] = [None] * len(PHASES)
+
+    def lap(self, phase: int) -> None:
+        now = perf_counter()
+        self._durations[phase] = (self._durations[phase] or 0.0) + now - self._last
+        self._last = now
+
+    def finish(self, status: int, response_bytes: int) -> None:
+        self._metrics.record(
+            self.method,
+            self.route,
+            status,
+            self._last - self._started,
+            self._durations,
+            response_bytes,
+        )
+
+
+class _DisabledTimer:
+    __slots__ = ("route",)
+
+    def __init__(self):
+        self.route = UNMATCHED_ROUTE
+
+    def lap(self, phase: int) -> None:
+        pass
+
+    def finish(self, status: int, response_bytes: int) -> None:
+        pass
+
+
+DISABLED_TIMER = _DisabledTimer()
+
+Timer = Union[RequestTimer, _DisabledTimer]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class RequestMetrics:
+    """
+    Request counts, response sizes and phase latencies keyed by route template (e.g. `/cats/:id`).
+
+    Kept per process, so each worker of process mode reports its own requests.
+    """
+
+    def __init__(self):
+        # (method, route) -> metrics
+        self._routes: dict[tuple[str, str], _RouteMetrics] = {}
+        self._lock = Lock()
+
+    def start(self, method: str) -> RequestTimer:
+        return RequestTimer(self, method)
+
+    def record(
+        self,
+        method: str,
+        route: str,
+        status: int,
+        seconds: float,
+        phases: list[Optional[float]],
+        response_bytes: int,
+    ) -> None:
+        with self._lock:
+            if (metrics := self._routes.get((method, route))) is None:
+                metrics = self._routes[(method, route)] = _RouteMetrics()
+            metrics.requests[status] = metrics.requests.get(status, 0) + 1
+            metrics.response_bytes += response_bytes
+            metrics.latency.observe(seconds)
+            for histogram, phase_seconds in zip(metrics.phases, phases):
+                if phase_seconds is not None:
+                    histogram.observe(phase_seconds)
+
+    def snapshot(self) -> list[RouteStats]:
+        with self._lock:
+            return [
+                RouteStats(
+                    method=method,
+                    route=route,
+                    requests=dict(metrics.requests),
+                    response_bytes=metrics.response_bytes,
+                    latency=_latency_stats(metrics.latency),
+                    phases={
+                        phase: _latency_stats(histogram)
+                        for phase, histogram in zip(PHASES, metrics.phases)
+                    },
+                )
+                for (method, route), metrics in self._routes.items()
+            ]
+
+    def render(self) -> bytes:
+        """
+        Prometheus text exposition format
+        """
+        lines = [
+            "# HELP nestpy_requests_total Requests by route and status.",
+            "# TYPE nestpy_requests_total counter",
+        ]
+        bytes_lines = [
+            "# HELP nestpy_response_bytes_total Response body bytes by route.",
+            "# TYPE nestpy_response_bytes_total counter",
+        ]
+        latency_lines = [
+            "# HELP nestpy_request_duration_seconds Request duration by route.",
+            "# TYPE nestpy_request_duration_seconds histogram",
+        ]
+        phase_lines = [
+            "# HELP nestpy_request_phase_seconds Request duration by route and phase.",
+            "# TYPE nestpy_request_phase_seconds histogram",
+        ]
+        with self._lock:
+            for (method, route), metrics in self._routes.items():
+                labels = f'method="{_escape(method)}",route="{_escape(route)}"'
+                for status, count in sorted(metrics.requests.items()):
+                    lines.append(
+                        f'nestpy_requests_total{{{labels},status="{status}"}} {count}'
+                    )
+                bytes_lines.append(
+                    f"nestpy_response_bytes_total{{{labels}}} {metrics.response_bytes}"
+                )
+                _render_histogram(
+                    latency_lines,
+                    "nestpy_request_duration_seconds",
+                    labels,
+                    metrics.latency,
+                )
+                for phase, histogram in zip(PHASES, metrics.phases):
+                    _render_histogram(
+                        phase_lines,
+                        "nestpy_request_phase_seconds",
+                        f'{labels},phase="{phase}"',
+                        histogram,
+                    )
+        return (
+            "\n".join(lines + bytes_lines + latency_lines + phase_lines) + "\n"
+        ).encode()
+
+
+def _render_histogram(
+    lines: list[str], name: str, labels: str, histogram: Histogram
+) -> None:
+    cumulative = 0
+    for bound, count in zip(LATENCY_BUCKETS + (None,), histogram.counts):
+        cumulative += count
+        le = "+Inf" if bound is None else repr(bound)
+        lines.append(f'{name}_bucket{{{labels},le="{le}"}} {cumulative}')
+    lines.append(f"{name}_sum{{{labels}}} {histogram.sum!r}")
+    lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+
+def request_timer(metrics: Optional[RequestMetrics], method: str) -> Timer:
+    """
+    Timer of a request, no-op unless metrics are enabled
+    """
+    if metrics is None:
+        return DISABLED_TIMER
+    return metrics.start(method)
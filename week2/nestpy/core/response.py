@@ -0,0 +1,96 @@
+from http.client import HTTPMessage
+from typing import Any, Callable, Optional
+
+from nestpy.common import CachedResponse
+
+from .metrics import Timer
+from .route import Route
+from .stream import ResponseStream
+
+BAD_REQUEST = b'{"message": "bad request"}'
+NOT_FOUND = b'{"message": "path not found"}'
+INTERNAL_SERVER_ERROR = b'{"message": "internal server error"}'
+
+
+class Response:
+    """
+    Status, headers and body (or stream) built by NestPyHTTPRequestHandlerBuilder for both engines,
+    which only write it.
+
+    Body is compressed with `pending_encoding` by `compress_response` of builder,
+    so that engine decides where to run it.
+    """
+
+    __slots__ = (
+        "status",
+        "body",
+        "timer",
+        "content_type",
+        "etag",
+        "encoding",
+        "pending_encoding",
+        "vary",
+        "stream",
+        "cached",
+    )
+
+    def __init__(
+        self,
+        status: int,
+        body: bytes = b"",
+        timer: Optional[Timer] = None,
+        content_type: Optional[str] = None,
+        etag: Optional[str] = None,
+        vary: bool = False,
+        pending_encoding: Optional[str] = None,
+        stream: Optional[ResponseStream] = None,
+        cached: Optional[CachedResponse] = None,
+    ):
+        self.status = status
+        self.body = body
+        self.timer = timer
+        self.content_type = content_type
+        self.etag = etag
+        # Content-Encoding of body, set once compressed
+        self.encoding: Optional[str] = None
+        self.pending_encoding = pending_encoding
+        self.vary = vary
+        self.stream = stream
+        # compressed body is kept with cached response
+        self.cached = cached
+
+
+class ControllerCall:
+    """
+    Bound controller method of a request, called by engine (awaited, on executor or inline)
+    """
+
+    __slots__ = ("command", "headers", "route", "inputs", "etag", "cache_key", "timer")
+
+    def __init__(
+        self,
+        command: str,
+        headers: HTTPMessage,
+        route: Route,
+        inputs: dict[str, Any],
+        etag: Optional[str],
+        cache_key: Any,
+        timer: Timer,
+    ):
+        self.command = command
+        self.headers = headers
+        self.route = route
+        self.inputs = inputs
+        # from `@ETag` version hook
+        self.etag = etag
+        # set for `@Cache` route
+        self.cache_key = cache_key
+        self.timer = timer
+
+    @property
+    def func(self) -> Callable[..., Any]:
+        return self.route.binder.func
+
+    @property
+    def is_coroutine(self) -> bool:
+        return self.route.binder.is_coroutine
@@ -0,0 +1,87 @@
+from typing import Hashable, Optional
+from urllib.parse import parse_qsl
+
+from nestpy.common import APIInfo, Instance, get_cache, get_etag
+
+from .binder import RouteBinder
+from .encoder import compile_encoder, compile_item_encoder, is_stream_type
+from .etag import compute_etag
+from .stream import JSON_CONTENT_TYPE
+
+
+class Route:
+    """
+    Everything needed to serve one APIInfo, compiled once at startup
+    """
+
+    __slots__ = (
+        "api_info",
+        "template",
+        "content_type",
+        "binder",
+        "encode",
+        "encode_item",
+        "cache",
+        "etag",
+        "_controller_instance",
+    )
+
+    def __init__(
+        self,
+        api_info: APIInfo,
+        controller_instance: Instance,
+        content_type: str = JSON_CONTENT_TYPE,
+    ):
+        self.api_info = api_info
+        # e.g. /cats/:id, label of metrics
+        self.template = "/" + api_info.path.strip("/")
+        self.content_type = content_type
+        self.binder = RouteBinder(api_info, controller_instance)
+        return_type = api_info.return_type
+        self.encode = compile_encoder(
+            None if is_stream_type(return_type) else return_type
+        )
+        # for generator results, see ResponseStream
+        self.encode_item = compile_item_encoder(return_type)
+
+        if (cache := get_cache(self.binder.func)) is not None and (
+            api_info.request_method != "GET" or is_stream_type(return_type)
+        ):
+            raise ValueError(
+                f"only non streamed GET response can be cached: {api_info.func_name}"
+            )
+        self.cache = cache
+
+        if (etag := get_etag(self.binder.func)) is not None and (
+            api_info.request_method != "GET" or is_stream_type(return_type)
+        ):
+            raise ValueError(
+                f"only non streamed GET response can have ETag: {api_info.func_name}"
+            )
+        self.etag = etag
+        self._controller_instance = controller_instance
+
+    def version_etag(
+        self, path_params: dict[str, str], query_string: str
+    ) -> Optional[str]:
+        """
+        ETag from `@ETag` version hook, None without hook
+        """
+        if self.etag is None:
+            return None
+        version = self.etag.version(self._controller_instance)
+        key = self.cache_key(path_params, query_string)
+        return compute_etag(repr((self.template, key, version)).encode())
+
+    def cache_key(self, path_params: dict[str, str], query_string: str) -> Hashable:
+        """
+        Order of query params doesn't matter
+        """
+        return (
+            tuple(sorted(path_params.items())),
+            (
+                tuple(sorted(parse_qsl(query_string, keep_blank_values=True)))
+                if query_string
+                else ()
+            ),
+        )
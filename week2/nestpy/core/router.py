@@ -0,0 +1,94 @@
+from typing import Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+def split_path(path: str) -> list[str]:
+    """
+    Splits url path (query string is ignored) into segments
+    """
+    path = path.split("?", 1)[0].strip("/")
+    if not path:
+        return []
+    return path.split("/")
+
+
+class _RouteNode(Generic[T]):
+    __slots__ = ("static_children", "param_child", "param_name", "value")
+
+    def __init__(self):
+        self.static_children: dict[str, _RouteNode[T]] = {}
+        self.param_child: Optional[_RouteNode[T]] = None
+        self.param_name: Optional[str] = None
+        self.value: Optional[T] = None
+
+
+class Router(Generic[T]):
+    """
+    Prefix tree keyed on path segments, one tree per request method.
+
+    Static segments are looked up by hash, `:param` segments are stored as a single capture node per level.
+    Static segments take precedence over capture nodes, so lookup cost depends on path depth, not route count.
+    """
+
+    def __init__(self):
+        self._trees: dict[str, _RouteNode[T]] = {}
+
+    def add(self, request_method: str, path: str, value: T) -> None:
+        node = self._trees.setdefault(request_method, _RouteNode())
+
+        for segment in split_path(path):
+            if segment.startswith(":"):
+                param_name = segment[1:]
+                if node.param_child is None:
+                    node.param_child = _RouteNode()
+                    node.param_name = param_name
+                elif node.param_name != param_name:
+                    raise ValueError(
+                        f"conflicting path param :{param_name} and :{node.param_name} in {path}"
+                    )
+                node = node.param_child
+                continue
+            if (child := node.static_children.get(segment)) is None:
+                child = node.static_children[segment] = _RouteNode()
+            node = child
+
+        if node.value is not None:
+            raise ValueError(f"duplicated route: {request_method} {path}")
+        node.value = value
+
+    def lookup(
+        self, request_method: str, path: str
+    ) -> Optional[tuple[T, dict[str, str]]]:
+        if (root := self._trees.get(request_method)) is None:
+            return None
+        path_params: dict[str, str] = {}
+        node = self._match(root, split_path(path), 0, path_params)
+        if node is None:
+            return None
+        return node.value, path_params  # type: ignore
+
+    def _match(
+        self,
+        node: _RouteNode[T],
+        segments: list[str],
+        idx: int,
+        path_params: dict[str, str],
+    ) -> Optional[_RouteNode[T]]:
+        if idx == len(segments):
+            return node if node.value is not None else None
+
+        segment = segments[idx]
+        if (child := node.static_children.get(segment)) is not None:
+            if (
+                matched := self._match(child, segments, idx + 1, path_params)
+            ) is not None:
+                return matched
+
+        if node.param_child is not None:
+            matched = self._match(node.param_child, segments, idx + 1, path_params)
+            if matched is not None:
+                path_params[node.param_name] = segment  # type: ignore
+                return matched
+
+        return None
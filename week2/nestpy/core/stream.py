@@ -0,0 +1,108 @@
+import asyncio
+from collections.abc import AsyncIterator, Iterator
+from typing import Any, Optional, Union
+
+from .encoder import Encoder
+
+CHUNK_SIZE = 16 * 1024
+
+JSON_CONTENT_TYPE = "application/json"
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+
+
+def is_stream(res: Any) -> bool:
+    return isinstance(res, (Iterator, AsyncIterator))
+
+
+def iterate_sync(items: AsyncIterator[Any]) -> Iterator[Any]:
+    """
+    Iterates async iterator on a private event loop, for blocking engine
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(items.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
+
+
+class _ChunkBuilder:
+    __slots__ = ("_encode_item", "_ndjson", "_chunk_size", "_buffer", "_started")
+
+    def __init__(self, encode_item: Encoder, ndjson: bool, chunk_size: int):
+        self._encode_item = encode_item
+        self._ndjson = ndjson
+        self._chunk_size = chunk_size
+        self._buffer = bytearray()
+        self._started = False
+
+    def add(self, item: Any) -> Optional[bytes]:
+        encoded = self._encode_item(item)
+        if self._ndjson:
+            self._buffer += encoded
+            self._buffer += b"\n"
+        else:
+            self._buffer += b"," if self._started else b"["
+            self._buffer += encoded
+
+        # first item is flushed right away for low time to first byte
+        if not self._started or len(self._buffer) >= self._chunk_size:
+            self._started = True
+            return self._flush()
+        return None
+
+    def finish(self) -> bytes:
+        if not self._ndjson:
+            self._buffer += b"]" if self._started else b"[]"
+        return self._flush()
+
+    def _flush(self) -> bytes:
+        chunk = bytes(self._buffer)
+        self._buffer.clear()
+        return chunk
+
+
+class ResponseStream:
+    """
+    Generator (or async iterator) returned by controller, written as chunked json array or ndjson.
+
+    Items are encoded one by one and written in chunks of about `chunk_size` bytes,
+    so memory is bounded regardless of collection size.
+    """
+
+    def __init__(
+        self,
+        items: Union[Iterator[Any], AsyncIterator[Any]],
+        encode_item: Encoder,
+        ndjson: bool = False,
+        chunk_size: int = CHUNK_SIZE,
+    ):
+        self.items = items
+        self.ndjson = ndjson
+        self.is_async = isinstance(items, AsyncIterator)
+        self._chunk_builder = _ChunkBuilder(encode_item, ndjson, chunk_size)
+
+    @property
+    def content_type(self) -> str:
+        return NDJSON_CONTENT_TYPE if self.ndjson else JSON_CONTENT_TYPE
+
+    def iter_chunks(self) -> Iterator[bytes]:
+        items = iterate_sync(self.items) if self.is_async else self.items  # type: ignore
+        for item in items:
+            if (chunk := self._chunk_builder.add(item)) is not None:
+                yield chunk
+        yield self._chunk_builder.finish()
+
+    async def aiter_chunks(self) -> AsyncIterator[bytes]:
+        async for item in self.items:  # type: ignore
+            if (chunk := self._chunk_builder.add(item)) is not None:
+                yield chunk
+        yield self._chunk_builder.finish()
+
+
+def accepts_ndjson(accept: Optional[str]) -> bool:
+    return accept is not None and NDJSON_CONTENT_TYPE in accept
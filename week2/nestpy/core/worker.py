@@ -0,0 +1,55 @@
+import logging
+import os
+import signal
+from typing import Callable, Literal
+
+_logger = logging.getLogger(__name__)
+
+ServeMode = Literal["thread", "process"]
+
+
+def validate_serve_options(workers: int, mode: ServeMode) -> None:
+    if workers < 1:
+        raise ValueError(f"workers should be positive, got {workers}")
+    if mode not in ["thread", "process"]:
+        raise ValueError(f"invalid serve mode {mode}")
+    if mode == "process" and not hasattr(os, "fork"):
+        raise NotImplementedError("process mode requires os.fork")
+
+
+def fork_workers(serve: Callable[[], None], workers: int) -> None:
+    """
+    Forks `workers` processes running `serve` and waits for them.
+
+    Everything built before calling this (listening socket, route table, DI singletons) is shared by fork.
+    """
+    pids: list[int] = []
+    for _ in range(workers):
+        if (pid := os.fork()) == 0:
+            exit_code = 0
+            try:
+                serve()
+            except KeyboardInterrupt:
+                pass
+            except Exception:
+                _logger.exception("worker process crashed")
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+        pids.append(pid)
+    _logger.info(f"worker processes forked: {pids}")
+
+    try:
+        for pid in pids:
+            os.waitpid(pid, 0)
+    except KeyboardInterrupt:
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in pids:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
@@ -1,6 +1,104 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock, Thread
+
 import pytest
 from httpx import Client
-from nestpy.common import Controller, Injectable, InstanceInitiator, Module
+from nestpy.common import (
+    Class,
+    Controller,
+    Get,
+    Injectable,
+    InstanceInitiator,
+    Module,
+    Param,
+)
+from nestpy.core import NestFactory
+
+# overlapping handlers wait for each other at most this long
+OVERLAP_TIMEOUT = 5.0
+
+
+@Injectable()
+class WaitService:
+    """
+    Counts handlers in flight on the server, so that tests of concurrency do not depend on wall clock
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def enter(self) -> None:
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def leave(self) -> None:
+        with self.lock:
+            self.in_flight -= 1
+
+
+@Controller("wait")
+class WaitController:
+    def __init__(self, service: WaitService):
+        self.service = service
+
+    @Get("async/:seconds")
+    async def async_wait(self, seconds: Param[str]):
+        await asyncio.sleep(float(seconds.data))
+        return {"engine": "asyncio"}
+
+    @Get("sync/:seconds")
+    def sync_wait(self, seconds: Param[str]):
+        self.service.enter()
+        try:
+            time.sleep(float(seconds.data))
+        finally:
+            self.service.leave()
+        return {"engine": "thread"}
+
+    @Get("async/overlap/:count")
+    async def async_overlap(self, count: Param[str]):
+        """
+        Returns once `count` handlers have been in flight at the same time (or on timeout)
+        """
+        self.service.enter()
+        try:
+            deadline = time.monotonic() + OVERLAP_TIMEOUT
+            while (
+                self.service.max_in_flight < int(count.data)
+                and time.monotonic() < deadline
+            ):
+                await asyncio.sleep(0.01)
+        finally:
+            self.service.leave()
+        return {"engine": "asyncio"}
+
+    @Get("sync/overlap/:count")
+    def sync_overlap(self, count: Param[str]):
+        self.service.enter()
+        try:
+            deadline = time.monotonic() + OVERLAP_TIMEOUT
+            while (
+                self.service.max_in_flight < int(count.data)
+                and time.monotonic() < deadline
+            ):
+                time.sleep(0.01)
+        finally:
+            self.service.leave()
+        return {"engine": "thread"}
+
+    @Get("max-in-flight")
+    def max_in_flight(self) -> int:
+        return self.service.max_in_flight
+
+
+@Module({"controller": WaitController, "provider": WaitService})
+class WaitModule:
+    pass
 
 
 @pytest.fixture(scope="function")
@@ -59,4 +157,43 @@ def test_module_cls(test_service1_cls: type, test_controller_cls: type):
 
 @pytest.fixture(scope="function")
 def test_http_client():
-    return Client()
+    with Client() as client:
+        yield client
+
+
+@pytest.fixture(scope="function")
+def get_concurrently():
+    """
+    GETs url from `count` clients at once, returns status codes
+    """
+
+    def _get_concurrently(url: str, count: int) -> list[int]:
+        def _get(_):
+            with Client() as client:
+                return client.get(url).status_code
+
+        with ThreadPoolExecutor(max_workers=count) as executor:
+            return list(executor.map(_get, range(count)))
+
+    return _get_concurrently
+
+
+@pytest.fixture(scope="function")
+def run_app():
+    """
+    Serves app on a random port in background thread, returns its url
+    """
+    apps: list[NestFactory] = []
+
+    def _run_app(root_module_cls: Class, **kwargs) -> str:
+        app = NestFactory.create(root_module_cls, port=0, **kwargs)
+        Thread(target=app.serve, daemon=True).start()
+        apps.append(app)
+        host, port = app.server_address[:2]
+        return f"http://{host}:{port}"
+
+    yield _run_app
+
+    for app in apps:
+        app.shutdown()
+        app.server_close()
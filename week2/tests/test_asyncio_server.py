@@ -0,0 +1,53 @@
+import logging
+import socket
+from urllib.parse import urlparse
+
+import pytest
+from httpx import Client
+from tests.fixtures import WaitModule
+
+_logger = logging.getLogger(__name__)
+
+
+@pytest.mark.asyncio_server
+class TestAsyncioServer:
+    def test_async_controller(self, run_app, get_concurrently):
+        url = run_app(WaitModule, engine="asyncio")
+
+        # served on the loop, so every handler overlaps regardless of client speed
+        assert get_concurrently(f"{url}/wait/async/overlap/20", 20) == [200] * 20
+
+        with Client() as client:
+            assert client.get(f"{url}/wait/max-in-flight").json() == 20
+            assert client.get(f"{url}/wait/async/0").json() == {"engine": "asyncio"}
+            assert client.get(f"{url}/not-found").status_code == 404
+
+    def test_sync_controller_on_executor(self, run_app, get_concurrently):
+        url = run_app(WaitModule, engine="asyncio", workers=4)
+
+        assert get_concurrently(f"{url}/wait/sync/overlap/4", 4) == [200] * 4
+
+        with Client() as client:
+            assert client.get(f"{url}/wait/max-in-flight").json() == 4
+            assert client.get(f"{url}/wait/sync/0").json() == {"engine": "thread"}
+
+    def test_idle_connections_and_pipelining(self, run_app):
+        url = run_app(WaitModule, engine="asyncio")
+        address = urlparse(url)
+
+        idle_connections = [
+            socket.create_connection((address.hostname, address.port))
+            for _ in range(500)
+        ]
+        try:
+            with socket.create_connection((address.hostname, address.port)) as sock:
+                request = b"GET /wait/async/0 HTTP/1.1\r\nHost: test\r\n\r\n"
+                sock.settimeout(5)
+                sock.sendall(request * 2)
+                received = b""
+                while received.count(b'{"engine":"asyncio"}') < 2:
+                    received += sock.recv(4096)
+                assert received.count(b"HTTP/1.1 200 OK") == 2
+        finally:
+            for connection in idle_connections:
+                connection.close()
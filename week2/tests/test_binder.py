@@ -0,0 +1,74 @@
+import logging
+from typing import Optional
+
+import pytest
+from nestpy.common import Body, Controller, Get, Param, Post, Query, get_api_info_list
+from nestpy.core.binder import RouteBinder
+from pydantic import BaseModel
+
+_logger = logging.getLogger(__name__)
+
+
+class Item(BaseModel):
+    id: str
+    count: int
+
+
+@Controller("items")
+class ItemsController:
+    def __init__(self):
+        pass
+
+    @Post(":group")
+    def create(self, group: Param[str], item: Body[Item]):
+        return group.data, item.data
+
+    @Get()
+    def list(self, tag: Query[str], limit: Optional[Query[str]] = None):
+        return tag.data, limit.data if limit else None
+
+    @Post("raw")
+    def raw(self, body: Body[dict]):
+        return body.data
+
+
+def _binder(func_name: str) -> RouteBinder:
+    controller = ItemsController()
+    for api_info in get_api_info_list(ItemsController):
+        if api_info.func_name == func_name:
+            return RouteBinder(api_info, controller)
+    raise KeyError(func_name)
+
+
+@pytest.mark.binder
+class TestBinder:
+    def test_path_and_body(self):
+        binder = _binder("create")
+
+        group, item = binder({"group": "a"}, "", b'{"id": "1", "count": "2"}')
+        assert group == "a"
+        assert item == Item(id="1", count=2)
+
+    def test_invalid_body(self):
+        binder = _binder("create")
+
+        with pytest.raises(ValueError):
+            binder({"group": "a"}, "", b'{"id": "1"}')
+        with pytest.raises(ValueError):
+            binder({"group": "a"}, "", b"not json")
+        with pytest.raises(ValueError):
+            binder({"group": "a"}, "", b"")
+
+    def test_query(self):
+        binder = _binder("list")
+
+        assert binder({}, "tag=x&limit=3", b"") == ("x", "3")
+        assert binder({}, "tag=x", b"") == ("x", None)
+        with pytest.raises(ValueError):
+            binder({}, "limit=3", b"")
+
+    def test_untyped_body(self):
+        binder = _binder("raw")
+
+        assert binder({}, "", b'{"a": [1, 2]}') == {"a": [1, 2]}
+        assert binder({}, "", b"") == {}
@@ -0,0 +1,111 @@
+import logging
+from typing import Iterator
+
+import pytest
+from httpx import Client
+from nestpy.common import Body, Controller, Injectable, Module, Post
+from pydantic import BaseModel
+
+_logger = logging.getLogger(__name__)
+
+
+class Item(BaseModel):
+    id: int
+
+
+@Injectable()
+class IngestService:
+    def __init__(self):
+        pass
+
+
+@Controller("ingest")
+class IngestController:
+    def __init__(self, service: IngestService):
+        self.service = service
+
+    @Post()
+    def ingest(self, items: Body[Iterator[Item]]):
+        return {"count": sum(1 for _ in items.data)}
+
+    @Post("first")
+    def first(self, items: Body[Iterator[Item]]):
+        # rest of body is left unread
+        return next(items.data)
+
+    @Post("one")
+    def one(self, item: Body[Item]):
+        return item.data
+
+
+@Module({"controller": IngestController, "provider": IngestService})
+class IngestModule:
+    pass
+
+
+engines = pytest.mark.parametrize(
+    "options",
+    [
+        {"engine": "blocking", "workers": 2, "mode": "thread"},
+        {"engine": "asyncio"},
+    ],
+    ids=["blocking", "asyncio"],
+)
+
+
+def _ndjson(count: int) -> bytes:
+    return b"".join(b'{"id": %d}\n' % i for i in range(count))
+
+
+@pytest.mark.body
+class TestBody:
+    @engines
+    def test_streamed_body(self, run_app, options):
+        url = run_app(IngestModule, **options)
+
+        with Client(base_url=url) as client:
+            res = client.post("/ingest", content=_ndjson(1000))
+            assert res.status_code == 200
+            assert res.json() == {"count": 1000}
+
+            # blank lines are skipped, last line may lack newline
+            res = client.post("/ingest", content=b'{"id": 1}\n\n{"id": 2}')
+            assert res.json() == {"count": 2}
+
+            res = client.post("/ingest", content=b"")
+            assert res.json() == {"count": 0}
+
+    @engines
+    def test_invalid_line(self, run_app, options):
+        url = run_app(IngestModule, **options)
+
+        with Client(base_url=url) as client:
+            res = client.post("/ingest", content=b'{"id": 1}\n{"id": "x"}\n')
+            assert res.status_code == 400
+
+            res = client.post("/ingest/one", content=b'{"id": "x"}')
+            assert res.status_code == 400
+
+    @engines
+    def test_unread_body_is_drained(self, run_app, options):
+        url = run_app(IngestModule, **options)
+
+        with Client(base_url=url) as client:
+            res = client.post("/ingest/first", content=_ndjson(10000))
+            assert res.json() == {"id": 0}
+
+            # same connection is reused
+            res = client.post("/ingest/one", content=b'{"id": 7}')
+            assert res.json() == {"id": 7}
+
+    @engines
+    def test_max_body_size(self, run_app, options):
+        url = run_app(IngestModule, max_body_size=1024, **options)
+
+        with Client(base_url=url) as client:
+            res = client.post("/ingest", content=_ndjson(1000))
+            assert res.status_code == 413
+            assert res.headers["connection"] == "close"
+
+            res = client.post("/ingest", content=_ndjson(10))
+            assert res.json() == {"count": 10}
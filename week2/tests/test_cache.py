@@ -0,0 +1,133 @@
+import logging
+import time
+
+import pytest
+from httpx import Client
+from nestpy.common import (
+    Body,
+    Cache,
+    Controller,
+    Get,
+    Injectable,
+    Module,
+    Param,
+    Post,
+    Query,
+    ResponseCache,
+)
+from nestpy.core import NestFactory
+
+_logger = logging.getLogger(__name__)
+
+
+@Injectable()
+class CounterService:
+    def __init__(self, cache: ResponseCache):
+        self.cache = cache
+        self.value = 0
+        self.calls = 0
+
+    def get(self) -> int:
+        self.calls += 1
+        return self.value
+
+    def set(self, value: int) -> int:
+        self.value = value
+        self.cache.invalidate("counter")
+        return value
+
+
+@Controller("counter")
+class CounterController:
+    def __init__(self, service: CounterService):
+        self.service = service
+
+    @Cache(ttl=60, tags=("counter",))
+    @Get(":name")
+    def get(self, name: Param[str], scale: Query[int] = 1) -> dict:
+        value = self.service.get() * int(scale.data)
+        return {"name": name.data, "value": value, "calls": self.service.calls}
+
+    @Post()
+    def set(self, value: Body[int]) -> int:
+        return self.service.set(value.data)
+
+
+@Module({"controller": CounterController, "provider": CounterService})
+class CounterModule:
+    pass
+
+
+@pytest.mark.cache
+class TestCache:
+    def test_lru(self):
+        cache = ResponseCache()
+        config = Cache(ttl=60, max_entries=2, tags=("a",))
+        for key in range(3):
+            cache.put("/route", key, b"body", '"etag"', config)
+        assert len(cache) == 2
+        assert cache.get("/route", 0) is None
+
+        cache.get("/route", 1)
+        cache.put("/route", 3, b"body", '"etag"', config)
+        # 2 was least recently used
+        assert cache.get("/route", 2) is None
+        assert cache.get("/route", 1) is not None
+
+        assert cache.invalidate("b") == 0
+        assert cache.invalidate("a") == 2
+        assert len(cache) == 0
+
+    def test_ttl(self):
+        cache = ResponseCache()
+        cache.put("/route", 0, b"body", '"etag"', Cache(ttl=0.05))
+        assert cache.get("/route", 0) is not None
+        time.sleep(0.1)
+        assert cache.get("/route", 0) is None
+
+    def test_invalid_route(self):
+        @Controller("invalid")
+        class InvalidController:
+            def __init__(self):
+                pass
+
+            @Post()
+            @Cache(ttl=60)
+            def create(self) -> int:
+                return 0
+
+        @Module({"controller": InvalidController, "provider": CounterService})
+        class InvalidModule:
+            pass
+
+        with pytest.raises(ValueError):
+            NestFactory.create(InvalidModule, port=0)
+
+    @pytest.mark.parametrize("engine", ["blocking", "asyncio"])
+    def test_cached_route(self, run_app, engine: str):
+        url = run_app(CounterModule, engine=engine)
+
+        with Client() as client:
+            res = client.get(f"{url}/counter/a?scale=2&x=1")
+            etag = res.headers["ETag"]
+            assert res.json() == {"name": "a", "value": 0, "calls": 1}
+            # query params are keyed regardless of order
+            res = client.get(f"{url}/counter/a?x=1&scale=2")
+            assert res.json()["calls"] == 1
+            assert res.headers["ETag"] == etag
+            assert client.get(f"{url}/counter/b").json()["calls"] == 2
+
+            res = client.get(
+                f"{url}/counter/a?scale=2&x=1", headers={"If-None-Match": etag}
+            )
+            assert res.status_code == 304
+            assert res.content == b""
+            assert res.headers["ETag"] == etag
+
+            assert client.post(f"{url}/counter", json=3).json() == 3
+            res = client.get(
+                f"{url}/counter/a?scale=2&x=1", headers={"If-None-Match": etag}
+            )
+            assert res.status_code == 200
+            assert res.json() == {"name": "a", "value": 6, "calls": 3}
+            assert res.headers["ETag"] != etag
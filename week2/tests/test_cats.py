@@ -48,6 +48,10 @@ class TestCats:
         assert res_json["name"] == "asdf"
         assert res_json["gender"] == "M"
 
+        # cached list is invalidated by create
+        res = test_http_client.get(f"{url}/cats")
+        assert "3" in [cat_json["id"] for cat_json in res.json()]
+
     def test_retrieve_cat(self, test_http_client: Client):
         res = test_http_client.get(f"{url}/cats/{cats[0].id}")
         assert res.status_code == 200
@@ -56,3 +60,28 @@ class TestCats:
         assert res_json["id"] == cats[0].id
         assert res_json["name"] == cats[0].name
         assert res_json["gender"] == cats[0].gender
+
+    def test_stream_cats(self, test_http_client: Client):
+        res = test_http_client.get(f"{url}/cats/stream", params={"gender": "F"})
+        assert res.status_code == 200
+        assert res.json() == [cat.model_dump() for cat in cats if cat.gender == "F"]
+
+    def test_bulk_create_cats(self, test_http_client: Client):
+        new_cats = [
+            {"id": f"bulk-{i}", "name": f"cat{i}", "gender": "M" if i % 2 else "F"}
+            for i in range(1000)
+        ]
+        res = test_http_client.post(f"{url}/cats/bulk", json=new_cats)
+        assert res.status_code == 200
+        assert res.json() == new_cats
+
+        res = test_http_client.get(f"{url}/cats/{new_cats[-1]['id']}")
+        assert res.json() == new_cats[-1]
+
+        # whole batch is rejected on duplicate id
+        res = test_http_client.post(
+            f"{url}/cats/bulk",
+            json=[{"id": "bulk-new", "name": "a", "gender": "M"}, new_cats[0]],
+        )
+        assert res.status_code == 500
+        assert test_http_client.get(f"{url}/cats/bulk-new").status_code == 500
@@ -0,0 +1,98 @@
+import gzip
+import logging
+
+import pytest
+from httpx import Client
+from nestpy.common import Controller, Get, Injectable, Module, Query
+from nestpy.core.compression import Compressor, parse_accept_encoding
+
+_logger = logging.getLogger(__name__)
+
+
+@Injectable()
+class NumbersService:
+    def __init__(self):
+        pass
+
+
+@Controller("numbers")
+class NumbersController:
+    def __init__(self, service: NumbersService):
+        self.service = service
+
+    @Get()
+    def list(self, count: Query[int]) -> list[int]:
+        return list(range(int(count.data)))
+
+
+@Module({"controller": NumbersController, "provider": NumbersService})
+class NumbersModule:
+    pass
+
+
+@pytest.mark.compression
+class TestCompression:
+    def test_negotiate(self):
+        assert parse_accept_encoding("gzip, br;q=0.5, *;q=0") == {
+            "gzip": 1.0,
+            "br": 0.5,
+            "*": 0.0,
+        }
+        compressor = Compressor()
+        assert compressor.negotiate(None) is None
+        assert compressor.negotiate("identity") is None
+        assert compressor.negotiate("gzip;q=0") is None
+        assert compressor.negotiate("*") == compressor.encodings[0]
+        assert compressor.negotiate("deflate, gzip;q=0.1") == "gzip"
+
+    def test_compress(self):
+        compressor = Compressor(min_size=10)
+        body = b"0123456789" * 100
+        assert not compressor.should_compress(body[:9])
+        compressed = compressor.compress(body, "gzip")
+        assert compressed == compressor.compress(body, "gzip")
+        assert gzip.decompress(compressed) == body
+
+    @pytest.mark.parametrize("engine", ["blocking", "asyncio"])
+    def test_compressed_response(self, run_app, engine: str):
+        url = run_app(NumbersModule, engine=engine, compression=True)
+
+        with Client() as client:
+            # large enough to be compressed on executor by asyncio engine
+            res = client.get(
+                f"{url}/numbers?count=60000", headers={"Accept-Encoding": "gzip"}
+            )
+            assert res.headers["Content-Encoding"] == "gzip"
+            assert res.headers["Vary"] == "Accept-Encoding"
+            assert int(res.headers["Content-Length"]) < len(res.content) / 2
+            assert res.json() == list(range(60000))
+
+            etag = res.headers["ETag"]
+            assert etag.endswith('-gzip"')
+            res = client.get(
+                f"{url}/numbers?count=60000",
+                headers={"Accept-Encoding": "gzip", "If-None-Match": etag},
+            )
+            assert res.status_code == 304
+
+            res = client.get(
+                f"{url}/numbers?count=60000", headers={"Accept-Encoding": "identity"}
+            )
+            assert "Content-Encoding" not in res.headers
+            assert res.json() == list(range(60000))
+
+            res = client.get(
+                f"{url}/numbers?count=3", headers={"Accept-Encoding": "gzip"}
+            )
+            assert "Content-Encoding" not in res.headers
+            assert res.headers["Vary"] == "Accept-Encoding"
+
+    def test_disabled(self, run_app):
+        url = run_app(NumbersModule)
+
+        with Client() as client:
+            res = client.get(
+                f"{url}/numbers?count=1000", headers={"Accept-Encoding": "gzip"}
+            )
+            assert "Content-Encoding" not in res.headers
+            assert "Vary" not in res.headers
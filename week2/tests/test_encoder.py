@@ -0,0 +1,42 @@
+import logging
+from json import loads
+
+import pytest
+from nestpy.core import encoder
+from nestpy.core.encoder import compile_encoder, encode_default
+from pydantic import BaseModel
+
+_logger = logging.getLogger(__name__)
+
+
+class Cat(BaseModel):
+    id: str
+    name: str
+
+
+cats = [Cat(id=str(i), name=f"cat{i}") for i in range(3)]
+
+
+@pytest.mark.encoder
+class TestEncoder:
+    def test_annotated(self):
+        encode = compile_encoder(list[Cat])
+
+        assert loads(encode(cats)) == [cat.model_dump() for cat in cats]
+        assert loads(compile_encoder(Cat)(cats[0])) == cats[0].model_dump()
+        assert encode(b"raw") == b"raw"
+
+    def test_unannotated(self):
+        assert compile_encoder(None) is encode_default
+        assert loads(encode_default(cats)) == [cat.model_dump() for cat in cats]
+        assert loads(encode_default(cats[0])) == cats[0].model_dump()
+        assert loads(encode_default({"cat": cats[0]})) == {"cat": cats[0].model_dump()}
+        assert encode_default("text") == b"text"
+        with pytest.raises(Exception):
+            encode_default(object())
+
+    def test_without_orjson(self, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr(encoder, "orjson", None)
+
+        assert loads(encode_default(cats)) == [cat.model_dump() for cat in cats]
+        assert loads(encode_default({"a": 1})) == {"a": 1}
@@ -0,0 +1,159 @@
+import logging
+from http.client import HTTPMessage
+
+import pytest
+from httpx import Client
+from nestpy.common import Body, Controller, ETag, Get, Injectable, Module, Post
+from nestpy.core.body import RequestBody
+from nestpy.core.etag import compute_etag, etag_matches
+from nestpy.core.handler import NestPyHTTPRequestHandlerBuilder
+from nestpy.core.response import ControllerCall, Response
+
+_logger = logging.getLogger(__name__)
+
+
+def parse_headers(headers: dict[str, str]) -> HTTPMessage:
+    message = HTTPMessage()
+    for name, value in headers.items():
+        message[name] = value
+    return message
+
+
+@Injectable()
+class DocumentService:
+    def __init__(self):
+        self.version = 0
+        self.calls = 0
+
+
+@Controller("documents")
+class DocumentController:
+    def __init__(self, service: DocumentService):
+        self.service = service
+
+    @Get("plain")
+    def plain(self) -> dict:
+        return {"version": self.service.version}
+
+    @ETag(lambda self: self.service.version)
+    @Get("versioned")
+    def versioned(self) -> dict:
+        self.service.calls += 1
+        return {"calls": self.service.calls}
+
+    @ETag(lambda self: 1 / 0)
+    @Get("broken")
+    def broken(self) -> dict:
+        return {}
+
+    @Post()
+    def update(self, version: Body[int]) -> int:
+        self.service.version = version.data
+        return version.data
+
+
+@Module({"controller": DocumentController, "provider": DocumentService})
+class DocumentModule:
+    pass
+
+
+@pytest.mark.etag
+class TestETag:
+    def test_etag_matches(self):
+        etag = compute_etag(b"body")
+        assert etag.startswith('"') and etag.endswith('"')
+        assert etag == compute_etag(b"body") != compute_etag(b"other")
+        assert etag_matches(etag, etag)
+        assert etag_matches(f'"a", W/{etag}', etag)
+        assert etag_matches("*", etag)
+        assert not etag_matches(None, etag)
+        assert not etag_matches('"a"', etag)
+
+    @pytest.mark.parametrize("engine", ["blocking", "asyncio"])
+    def test_body_etag(self, run_app, engine: str):
+        url = run_app(DocumentModule, engine=engine)
+
+        with Client() as client:
+            res = client.get(f"{url}/documents/plain")
+            etag = res.headers["ETag"]
+            res = client.get(f"{url}/documents/plain", headers={"If-None-Match": etag})
+            assert res.status_code == 304
+            assert res.content == b""
+
+            res = client.post(f"{url}/documents", json=1)
+            assert "ETag" not in res.headers
+            res = client.get(f"{url}/documents/plain", headers={"If-None-Match": etag})
+            assert res.status_code == 200
+            assert res.json() == {"version": 1}
+
+    @pytest.mark.parametrize("engine", ["blocking", "asyncio"])
+    def test_version_etag(self, run_app, engine: str):
+        url = run_app(DocumentModule, engine=engine)
+
+        with Client() as client:
+            res = client.get(f"{url}/documents/versioned")
+            etag = res.headers["ETag"]
+            assert res.json() == {"calls": 1}
+            for _ in range(3):
+                res = client.get(
+                    f"{url}/documents/versioned", headers={"If-None-Match": etag}
+                )
+                assert res.status_code == 304
+                assert res.headers["ETag"] == etag
+
+            client.post(f"{url}/documents", json=1)
+            res = client.get(
+                f"{url}/documents/versioned", headers={"If-None-Match": etag}
+            )
+            assert res.status_code == 200
+            # controller is not called for 304
+            assert res.json() == {"calls": 2}
+            assert res.headers["ETag"] != etag
+
+    @pytest.mark.parametrize("engine", ["blocking", "asyncio"])
+    def test_raising_version_hook(self, run_app, engine: str):
+        url = run_app(DocumentModule, engine=engine)
+
+        with Client(timeout=2) as client:
+            res = client.get(f"{url}/documents/broken")
+            assert res.status_code == 500
+            assert res.json() == {"message": "internal server error"}
+            res = client.get(f"{url}/documents/plain")
+            assert res.status_code == 200
+
+    def test_response_path_without_engine(self):
+        builder = NestPyHTTPRequestHandlerBuilder(DocumentModule)
+
+        def respond(headers: dict[str, str]) -> Response:
+            response = builder.begin(
+                "GET",
+                "/documents/versioned",
+                parse_headers(headers),
+                RequestBody.from_bytes(b""),
+            )
+            if isinstance(response, ControllerCall):
+                response = builder.complete(response, response.func(**response.inputs))
+            builder.compress_response(response)
+            return response
+
+        response = respond({})
+        assert (response.status, response.body) == (200, b'{"calls":1}')
+        # 304 from version hook, controller is not called
+        response = respond({"If-None-Match": response.etag})  # type: ignore
+        assert (response.status, response.body) == (304, b"")
+        assert (
+            builder.begin(
+                "GET",
+                "/documents/missing",
+                parse_headers({}),
+                RequestBody.from_bytes(b""),
+            ).status
+            == 404
+        )  # type: ignore
+
+    def test_disabled(self, run_app):
+        url = run_app(DocumentModule, etag=False)
+
+        with Client() as client:
+            assert "ETag" not in client.get(f"{url}/documents/plain").headers
+            assert "ETag" in client.get(f"{url}/documents/versioned").headers
@@ -0,0 +1,108 @@
+import logging
+import multiprocessing
+import os
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from httpx import Client
+from nestpy.common import Controller, Get, Injectable, Module, Param
+from nestpy.core import NestFactory
+from tests.fixtures import WaitModule
+
+_logger = logging.getLogger(__name__)
+
+
+@Injectable()
+class SlowService:
+    def __init__(self):
+        pass
+
+    def sleep(self, seconds: float) -> str:
+        time.sleep(seconds)
+        return "done"
+
+
+@Controller("slow")
+class SlowController:
+    def __init__(self, service: SlowService):
+        self.service = service
+
+    @Get(":seconds")
+    def sleep(self, seconds: Param[str]):
+        return self.service.sleep(float(seconds.data))
+
+
+@Module({"controller": SlowController, "provider": SlowService})
+class SlowModule:
+    pass
+
+
+@Controller("pid")
+class PidController:
+    def __init__(self, service: SlowService):
+        self.service = service
+
+    @Get(":seconds")
+    def pid(self, seconds: Param[str]) -> int:
+        self.service.sleep(float(seconds.data))
+        return os.getpid()
+
+
+@Module({"controller": PidController, "provider": SlowService})
+class PidModule:
+    pass
+
+
+@pytest.mark.factory
+class TestFactory:
+    def test_invalid_options(self):
+        with pytest.raises(ValueError):
+            NestFactory.create(SlowModule, port=0, workers=0)
+        with pytest.raises(ValueError):
+            NestFactory.create(SlowModule, port=0, mode="fiber")  # type: ignore
+
+    def test_thread_mode(self, run_app, get_concurrently):
+        url = run_app(WaitModule, workers=4, mode="thread")
+
+        # returns once every worker is in a handler at the same time
+        assert get_concurrently(f"{url}/wait/sync/overlap/4", 4) == [200] * 4
+        with Client() as client:
+            assert client.get(f"{url}/wait/max-in-flight").json() == 4
+
+    def test_thread_mode_is_bounded(self, run_app, get_concurrently):
+        url = run_app(WaitModule, workers=2, mode="thread")
+
+        assert get_concurrently(f"{url}/wait/sync/0.2", 6) == [200] * 6
+        with Client() as client:
+            assert client.get(f"{url}/wait/max-in-flight").json() == 2
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="process mode requires fork")
+    def test_process_mode(self):
+        app = NestFactory.create(PidModule, port=0, workers=2, mode="process")
+        host, port = app.server_address[:2]
+        # forks its workers and waits for them, stopped by SIGINT as on ctrl-c
+        server = multiprocessing.get_context("fork").Process(target=app.serve)
+        server.start()
+        app.server_close()
+        try:
+
+            def _get(_):
+                with Client() as client:
+                    response = client.get(f"http://{host}:{port}/pid/0.2")
+                    assert response.status_code == 200
+                    return response.json()
+
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                pids = set(executor.map(_get, range(8)))
+            assert len(pids) > 1
+            assert server.pid not in pids
+        finally:
+            os.kill(server.pid, signal.SIGINT)  # type: ignore
+            server.join(timeout=5)
+
+        assert server.exitcode == 0
+        for pid in pids:
+            with pytest.raises(ProcessLookupError):
+                os.kill(pid, 0)
@@ -0,0 +1,160 @@
+import logging
+import socket
+import time
+from json import loads
+from urllib.parse import urlparse
+
+import pytest
+from nestpy.common import Body, Controller, Get, Injectable, Module, Post
+
+_logger = logging.getLogger(__name__)
+
+
+@Injectable()
+class EchoService:
+    def __init__(self):
+        pass
+
+
+@Controller("echo")
+class EchoController:
+    def __init__(self, service: EchoService):
+        self.service = service
+
+    @Get()
+    def ping(self):
+        return {"message": "pong"}
+
+    @Post()
+    def echo(self, body: Body[dict]):
+        return body.data
+
+
+@Module({"controller": EchoController, "provider": EchoService})
+class EchoModule:
+    pass
+
+
+def _connect(url: str) -> socket.socket:
+    address = urlparse(url)
+    sock = socket.create_connection((address.hostname, address.port))
+    sock.settimeout(5)
+    return sock
+
+
+def _read_response(file) -> tuple[int, dict[str, str], bytes]:
+    status = int(file.readline().split()[1])
+    headers: dict[str, str] = {}
+    while (line := file.readline().decode("latin-1").strip()) != "":
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return status, headers, file.read(int(headers["content-length"]))
+
+
+engines = pytest.mark.parametrize(
+    "options",
+    [
+        {"engine": "blocking", "workers": 2, "mode": "thread"},
+        {"engine": "asyncio"},
+    ],
+    ids=["blocking", "asyncio"],
+)
+
+
+@pytest.mark.keep_alive
+class TestKeepAlive:
+    @engines
+    def test_persistent_connection(self, run_app, options):
+        url = run_app(EchoModule, **options)
+
+        with _connect(url) as sock, sock.makefile("rb") as file:
+            # 404 with unread body should not break the connection
+            body = b'{"a": 1}'
+            sock.sendall(
+                b"POST /not-found HTTP/1.1\r\nHost: test\r\n"
+                + f"Content-Length: {len(body)}\r\n\r\n".encode()
+                + body
+            )
+            assert _read_response(file)[0] == 404
+
+            # pipelined requests
+            sock.sendall(
+                b"GET /echo HTTP/1.1\r\nHost: test\r\n\r\n"
+                + b"POST /echo HTTP/1.1\r\nHost: test\r\n"
+                + f"Content-Length: {len(body)}\r\n\r\n".encode()
+                + body
+            )
+            status, _, res = _read_response(file)
+            assert (status, res) == (200, b'{"message":"pong"}')
+            status, _, res = _read_response(file)
+            assert (status, loads(res)) == (200, loads(body))
+
+    @engines
+    def test_max_keep_alive_requests(self, run_app, options):
+        url = run_app(EchoModule, max_keep_alive_requests=2, **options)
+
+        with _connect(url) as sock, sock.makefile("rb") as file:
+            sock.sendall(b"GET /echo HTTP/1.1\r\nHost: test\r\n\r\n")
+            status, headers, _ = _read_response(file)
+            assert status == 200
+            assert headers.get("connection") != "close"
+
+            sock.sendall(b"GET /echo HTTP/1.1\r\nHost: test\r\n\r\n")
+            status, headers, _ = _read_response(file)
+            assert status == 200
+            assert headers["connection"] == "close"
+            assert file.read() == b""
+
+    @engines
+    def test_idle_timeout(self, run_app, options):
+        url = run_app(EchoModule, keep_alive_timeout=0.2, **options)
+
+        with _connect(url) as sock, sock.makefile("rb") as file:
+            sock.sendall(b"GET /echo HTTP/1.1\r\nHost: test\r\n\r\n")
+            assert _read_response(file)[0] == 200
+            time.sleep(0.5)
+            assert file.read() == b""
+
+    @engines
+    @pytest.mark.parametrize("content_length", ["-20", "+5", "1_0", "abc"])
+    def test_invalid_content_length(self, run_app, options, content_length: str):
+        url = run_app(EchoModule, **options)
+
+        with _connect(url) as sock, sock.makefile("rb") as file:
+            # negative length would leave header bytes to be parsed as next request
+            sock.sendall(
+                b"POST /echo HTTP/1.1\r\nHost: test\r\n"
+                b"Content-Length: %s\r\n\r\n"
+                b"GET /echo HTTP/1.1\r\nHost: test\r\n\r\n" % content_length.encode()
+            )
+            status, headers, _ = _read_response(file)
+            assert status == 400
+            assert headers["connection"] == "close"
+            assert file.read() == b""
+
+    @engines
+    def test_unsupported_method(self, run_app, options):
+        url = run_app(EchoModule, **options)
+
+        with _connect(url) as sock, sock.makefile("rb") as file:
+            sock.sendall(b"GET /echo HTTP/1.1\r\nHost: test\r\n\r\n")
+            status, headers, _ = _read_response(file)
+            assert status == 200
+            assert "date" in headers
+
+            sock.sendall(b"PUT /echo HTTP/1.1\r\nHost: test\r\n\r\n")
+            status, headers, _ = _read_response(file)
+            assert status == 501
+            assert "date" in headers
+            assert headers["connection"] == "close"
+            assert file.read() == b""
+
+    def test_keep_alive_disabled_for_serial_server(self, run_app):
+        url = run_app(EchoModule)
+
+        with _connect(url) as sock, sock.makefile("rb") as file:
+            sock.sendall(b"GET /echo HTTP/1.1\r\nHost: test\r\n\r\n")
+            status, headers, body = _read_response(file)
+            assert status == 200
+            assert headers["connection"] == "close"
+            assert body == b'{"message":"pong"}'
@@ -0,0 +1,223 @@
+import importlib
+import logging
+import os
+import sys
+import textwrap
+
+import pytest
+from nestpy.common import Controller, Get, Injectable, InstanceInitiator, Module
+from nestpy.core.handler import NestPyHTTPRequestHandlerBuilder
+from nestpy.core.manifest import (
+    class_path,
+    compile_manifest,
+    get_manifest,
+    load_manifest,
+    save_manifest,
+)
+
+_logger = logging.getLogger(__name__)
+
+APP_SOURCE = """
+from nestpy.common import Controller, Get, Injectable, Module, Param
+
+
+@Injectable()
+class {name}Repository:
+    def __init__(self):
+        self.items = {{"1": "one"}}
+
+
+@Injectable()
+class {name}Service:
+    def __init__(self, repository: {name}Repository):
+        self.repository = repository
+
+
+@Controller("items")
+class {name}Controller:
+    def __init__(self, service: {name}Service):
+        self.service = service
+
+    @Get(":id")
+    def get(self, id: Param[str]) -> str:
+        return self.service.repository.items[id.data]
+
+    @Get("")
+    def list(self) -> list[str]:
+        return list(self.service.repository.items.values())
+
+
+@Module({{"controller": {name}Controller, "provider": {name}Service}})
+class {name}Module:
+    def __init__(self):
+        pass
+"""
+
+
+@pytest.fixture
+def app_module(tmp_path, request):
+    """
+    Root module of an app written to a file, so that its manifest can be cached
+    """
+    name = "Manifest" + request.node.name.title().replace("_", "")
+    module_name = name.lower()
+    (tmp_path / f"{module_name}.py").write_text(
+        textwrap.dedent(APP_SOURCE.format(name=name))
+    )
+    sys.path.insert(0, str(tmp_path))
+    try:
+        module = importlib.import_module(module_name)
+        yield getattr(module, f"{name}Module"), tmp_path / f"{module_name}.py"
+    finally:
+        sys.path.remove(str(tmp_path))
+        sys.modules.pop(module_name, None)
+
+
+@pytest.mark.manifest
+class TestManifest:
+    def test_compile(self, app_module):
+        root, source = app_module
+        manifest = compile_manifest(root)
+        providers = [entry.cls.partition(":")[2] for entry in manifest.providers]
+        # dependencies first, root last
+        assert providers[-1] == root.__name__
+        assert providers.index(root.__name__.replace("Module", "Repository")) < (
+            providers.index(root.__name__.replace("Module", "Service"))
+        )
+        assert sum(entry.controller for entry in manifest.providers) == 1
+        assert sorted(route.path for route in manifest.routes) == [
+            "items/",
+            "items/:id",
+        ]
+        assert str(source) in manifest.sources
+        assert manifest.cacheable
+
+    def test_order_of_instance_initiator(self, app_module):
+        root, _ = app_module
+        manifest = compile_manifest(root)
+        initiator = InstanceInitiator()
+        initiator.register_cls(root)
+        assert [entry.cls for entry in manifest.providers] == [
+            class_path(cls) for cls in initiator.resolve(root)
+        ]
+
+    def test_instantiate_singletons(self, app_module):
+        root, _ = app_module
+        manifest = compile_manifest(root)
+        instances = manifest.instantiate()
+        controller = next(
+            instances[entry.cls] for entry in manifest.providers if entry.controller
+        )
+        service = next(
+            instance
+            for instance in instances.values()
+            if type(instance).__name__.endswith("Service")
+        )
+        assert controller.service is service
+
+    def test_cache_hit(self, app_module, tmp_path):
+        root, _ = app_module
+        cache_path = str(tmp_path / "manifest.json")
+        manifest, source = get_manifest(root, cache_path)
+        assert source == "compiled"
+        assert os.path.exists(cache_path)
+
+        cached, source = get_manifest(root, cache_path)
+        assert source == "cached"
+        assert cached.providers == manifest.providers
+        assert cached.routes == manifest.routes
+
+        builder = NestPyHTTPRequestHandlerBuilder(root, manifest_cache=cache_path)
+        assert builder.startup["manifest"] == "cached"
+        assert builder.startup["routes"] == 2
+        matched = builder.router.lookup("GET", "/items/1")
+        assert matched is not None
+        route, path_params = matched
+        assert route.api_info.path == "items/:id"
+        assert path_params == {"id": "1"}
+
+    def test_cache_miss_on_mtime(self, app_module, tmp_path):
+        root, source_path = app_module
+        cache_path = str(tmp_path / "manifest.json")
+        get_manifest(root, cache_path)
+        assert load_manifest(cache_path, root) is not None
+
+        stat = os.stat(source_path)
+        os.utime(source_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        assert load_manifest(cache_path, root) is None
+        _, source = get_manifest(root, cache_path)
+        assert source == "compiled"
+        assert load_manifest(cache_path, root) is not None
+
+    def test_cache_of_other_root(self, app_module, tmp_path):
+        root, _ = app_module
+        cache_path = str(tmp_path / "manifest.json")
+        get_manifest(root, cache_path)
+        assert load_manifest(cache_path, TestManifest) is None
+
+    def test_invalid_cache(self, app_module, tmp_path):
+        root, _ = app_module
+        cache_path = tmp_path / "manifest.json"
+        cache_path.write_text("{")
+        _, source = get_manifest(root, str(cache_path))
+        assert source == "compiled"
+
+    def test_local_classes_not_cacheable(self, tmp_path):
+        @Controller("local")
+        class LocalController:
+            def __init__(self):
+                pass
+
+            @Get("")
+            def get(self) -> str:
+                return "local"
+
+        @Module({"controller": LocalController, "provider": LocalController})
+        class LocalModule:
+            def __init__(self):
+                pass
+
+        manifest = compile_manifest(LocalModule)
+        assert not manifest.cacheable
+        assert not save_manifest(manifest, str(tmp_path / "manifest.json"))
+        # still served, from compiled manifest
+        builder = NestPyHTTPRequestHandlerBuilder(
+            LocalModule, manifest_cache=str(tmp_path / "manifest.json")
+        )
+        assert builder.startup["manifest"] == "compiled"
+        assert builder.router.lookup("GET", "/local") is not None
+
+    def test_circular_reference(self):
+        @Injectable()
+        class ServiceA:
+            def __init__(self, b: object):
+                self.b = b
+
+        @Injectable()
+        class ServiceB:
+            def __init__(self, a: ServiceA):
+                self.a = a
+
+        ServiceA.__init__.__annotations__["b"] = ServiceB
+
+        @Module({"controller": ServiceA, "provider": ServiceB})
+        class CircularModule:
+            def __init__(self):
+                pass
+
+        with pytest.raises(ValueError):
+            compile_manifest(CircularModule)
+
+    def test_missing_annotation(self):
+        @Injectable()
+        class UnannotatedService:
+            def __init__(self, repository):
+                self.repository = repository
+
+        @Module({"controller": UnannotatedService, "provider": UnannotatedService})
+        class UnannotatedModule:
+            def __init__(self):
+                pass
+
+        with pytest.raises(ValueError):
+            compile_manifest(UnannotatedModule)
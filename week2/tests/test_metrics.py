@@ -0,0 +1,145 @@
+import logging
+from threading import Thread
+from typing import Iterator
+
+import pytest
+from httpx import Client
+from nestpy.common import Cache, Controller, Get, Injectable, Module, Param
+from nestpy.core import NestFactory
+from nestpy.core.metrics import PHASES, RequestMetrics
+
+_logger = logging.getLogger(__name__)
+
+
+@Injectable()
+class ItemsService:
+    def __init__(self):
+        pass
+
+
+@Controller("items")
+class ItemsController:
+    def __init__(self, service: ItemsService):
+        self.service = service
+
+    @Get(":id")
+    def get(self, id: Param[str]) -> dict:
+        return {"id": id.data}
+
+    @Cache(ttl=60)
+    @Get(":id/cached")
+    def cached(self, id: Param[str]) -> dict:
+        return {"id": id.data}
+
+    @Get("")
+    def list(self) -> Iterator[int]:
+        yield from range(3)
+
+
+@Module({"controller": ItemsController, "provider": ItemsService})
+class ItemsModule:
+    pass
+
+
+def _stats(metrics: RequestMetrics) -> dict[tuple[str, str], dict]:
+    return {(s["method"], s["route"]): s for s in metrics.snapshot()}
+
+
+@pytest.mark.metrics
+class TestMetrics:
+    def test_render(self):
+        metrics = RequestMetrics()
+        timer = metrics.start("GET")
+        timer.route = '/a"b'
+        for phase in range(len(PHASES)):
+            timer.lap(phase)
+        timer.finish(200, 10)
+
+        text = metrics.render().decode()
+        assert (
+            'nestpy_requests_total{method="GET",route="/a\\"b",status="200"} 1' in text
+        )
+        assert 'nestpy_response_bytes_total{method="GET",route="/a\\"b"} 10' in text
+        assert (
+            'nestpy_request_phase_seconds_bucket{method="GET",route="/a\\"b",phase="write",le="+Inf"} 1'
+            in text
+        )
+        assert (
+            'nestpy_request_duration_seconds_count{method="GET",route="/a\\"b"} 1'
+            in text
+        )
+
+    @pytest.mark.parametrize("engine", ["blocking", "asyncio"])
+    def test_routes(self, engine: str):
+        app = NestFactory.create(ItemsModule, port=0, engine=engine, metrics=True)
+        Thread(target=app.serve, daemon=True).start()
+        host, port = app.server_address[:2]
+        url = f"http://{host}:{port}"
+
+        try:
+            self._request(url)
+        finally:
+            app.shutdown()
+            app.server_close()
+
+        stats = _stats(app.metrics)  # type: ignore
+        item = stats[("GET", "/items/:id")]
+        assert item["requests"] == {200: 2}
+        assert item["response_bytes"] == 2 * len(b'{"id":"1"}')
+        assert set(item["phases"]) == set(PHASES)
+        assert all(phase["count"] == 2 for phase in item["phases"].values())
+        assert item["latency"]["sum"] >= item["phases"]["controller"]["sum"]
+        assert stats[("GET", "/items")]["response_bytes"] == len(b"[0,1,2]")
+
+    def _request(self, url: str):
+        with Client() as client:
+            assert client.get(f"{url}/items/1").status_code == 200
+            assert client.get(f"{url}/items/2").status_code == 200
+            assert client.get(f"{url}/items").json() == [0, 1, 2]
+            assert client.get(f"{url}/missing").status_code == 404
+
+            res = client.get(f"{url}/metrics")
+            assert res.status_code == 200
+            assert res.headers["Content-type"].startswith("text/plain")
+            assert (
+                'nestpy_requests_total{method="GET",route="/items/:id",status="200"} 2'
+                in res.text
+            )
+            assert (
+                'nestpy_requests_total{method="GET",route="<unmatched>",status="404"} 1'
+                in res.text
+            )
+
+    @pytest.mark.parametrize("engine", ["blocking", "asyncio"])
+    def test_unreached_phases(self, engine: str):
+        app = NestFactory.create(ItemsModule, port=0, engine=engine, metrics=True)
+        Thread(target=app.serve, daemon=True).start()
+        host, port = app.server_address[:2]
+        url = f"http://{host}:{port}"
+
+        try:
+            with Client() as client:
+                # first one is a miss, others are served from cache
+                for _ in range(3):
+                    assert client.get(f"{url}/items/1/cached").status_code == 200
+                assert client.get(f"{url}/missing").status_code == 404
+        finally:
+            app.shutdown()
+            app.server_close()
+
+        stats = _stats(app.metrics)  # type: ignore
+        phases = stats[("GET", "/items/:id/cached")]["phases"]
+        assert phases["routing"]["count"] == 3
+        assert phases["controller"]["count"] == 1
+        assert phases["serialize"]["count"] == 1
+        assert phases["write"]["count"] == 3
+        phases = stats[("GET", "<unmatched>")]["phases"]
+        assert phases["routing"]["count"] == 1
+        assert phases["controller"]["count"] == 0
+        assert phases["serialize"]["count"] == 0
+
+    def test_disabled(self, run_app):
+        url = run_app(ItemsModule)
+
+        with Client() as client:
+            assert client.get(f"{url}/metrics").status_code == 404
@@ -0,0 +1,104 @@
+import logging
+
+import pytest
+from nestpy.common import Injectable, InstanceInitiator, Repository
+from pydantic import BaseModel
+
+_logger = logging.getLogger(__name__)
+
+
+class Pet(BaseModel):
+    id: str
+    kind: str
+    gender: str
+
+
+@Injectable()
+class PetsRepository(Repository[Pet]):
+    primary_key = "id"
+    indexes = ("kind", "gender")
+
+    def __init__(self):
+        super().__init__()
+
+
+@Injectable()
+class PetsService:
+    def __init__(self, repository: PetsRepository):
+        self.repository = repository
+
+
+def _pets() -> list[Pet]:
+    return [
+        Pet(id=str(i), kind="cat" if i % 3 else "dog", gender="M" if i % 2 else "F")
+        for i in range(12)
+    ]
+
+
+@pytest.mark.repository
+class TestRepository:
+    def test_insert_and_get(self):
+        repository = PetsRepository()
+        pets = _pets()
+        for pet in pets:
+            repository.insert(pet)
+
+        assert len(repository) == len(pets)
+        assert repository.get("3") == pets[3]
+        assert repository.get("unknown") is None
+        assert repository.all() == pets
+        with pytest.raises(ValueError):
+            repository.insert(Pet(id="3", kind="cat", gender="M"))
+
+    def test_insert_many_is_atomic(self):
+        repository = PetsRepository()
+        pets = _pets()
+        repository.insert_many(pets[:6])
+        version = repository.version
+
+        with pytest.raises(ValueError):
+            repository.insert_many(pets[5:])
+        with pytest.raises(ValueError):
+            repository.insert_many([pets[7], pets[7]])
+        assert repository.all() == pets[:6]
+        assert repository.version == version
+
+        repository.insert_many(pets[6:])
+        assert repository.all() == pets
+        assert repository.version > version
+
+    def test_find(self):
+        repository = PetsRepository()
+        pets = _pets()
+        repository.insert_many(pets)
+
+        # insertion order is kept
+        assert repository.find(kind="dog") == [p for p in pets if p.kind == "dog"]
+        assert repository.find(kind="cat", gender="F") == [
+            p for p in pets if p.kind == "cat" and p.gender == "F"
+        ]
+        assert repository.find(kind="fish") == []
+        # not indexed field is scanned
+        assert repository.find(id="4") == [pets[4]]
+
+    def test_remove(self):
+        repository = PetsRepository()
+        pets = _pets()
+        repository.insert_many(pets)
+
+        assert repository.remove("0") == pets[0]
+        assert "0" not in repository
+        assert repository.find(kind="dog") == [p for p in pets[1:] if p.kind == "dog"]
+        with pytest.raises(KeyError):
+            repository.remove("0")
+
+        # reinserted model goes last
+        repository.insert(pets[0])
+        assert repository.all() == pets[1:] + pets[:1]
+
+    def test_inject(self, instance_initiator: InstanceInitiator):
+        instance_initiator.register_cls(PetsService)
+        service = instance_initiator.get_or_init_instance(PetsService)
+        assert service.repository is instance_initiator.get_or_init_instance(
+            PetsRepository
+        )
@@ -0,0 +1,55 @@
+import logging
+
+import pytest
+from nestpy.core.router import Router
+
+_logger = logging.getLogger(__name__)
+
+
+@pytest.mark.router
+class TestRouter:
+    def test_static_route(self):
+        router: Router[str] = Router()
+        router.add("GET", "cats/", "list")
+        router.add("POST", "cats/", "create")
+
+        assert router.lookup("GET", "/cats") == ("list", {})
+        assert router.lookup("GET", "/cats/") == ("list", {})
+        assert router.lookup("POST", "/cats") == ("create", {})
+        assert router.lookup("GET", "/dogs") is None
+        assert router.lookup("PUT", "/cats") is None
+
+    def test_path_param(self):
+        router: Router[str] = Router()
+        router.add("GET", "cats/:id", "get")
+
+        assert router.lookup("GET", "/cats/1") == ("get", {"id": "1"})
+        assert router.lookup("GET", "/cats") is None
+        assert router.lookup("GET", "/cats/1/2") is None
+
+    def test_query_string_ignored(self):
+        router: Router[str] = Router()
+        router.add("GET", "cats/", "list")
+
+        assert router.lookup("GET", "/cats?gender=M") == ("list", {})
+
+    def test_static_precedence_and_backtracking(self):
+        router: Router[str] = Router()
+        router.add("GET", "cats/:id", "get")
+        router.add("GET", "cats/bulk", "bulk")
+        router.add("GET", "cats/:id/toys", "toys")
+        router.add("GET", "cats/bulk/:job", "job")
+
+        assert router.lookup("GET", "/cats/bulk") == ("bulk", {})
+        assert router.lookup("GET", "/cats/3") == ("get", {"id": "3"})
+        assert router.lookup("GET", "/cats/bulk/toys") == ("job", {"job": "toys"})
+        assert router.lookup("GET", "/cats/3/toys") == ("toys", {"id": "3"})
+
+    def test_duplicated_route(self):
+        router: Router[str] = Router()
+        router.add("GET", "cats/:id", "get")
+
+        with pytest.raises(ValueError):
+            router.add("GET", "cats/:id", "get")
+        with pytest.raises(ValueError):
+            router.add("GET", "cats/:name/toys", "toys")
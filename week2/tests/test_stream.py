@@ -0,0 +1,96 @@
+import asyncio
+import logging
+from json import loads
+from typing import AsyncIterator, Iterator
+
+import pytest
+from httpx import Client
+from nestpy.common import Controller, Get, Injectable, Module, Param
+from pydantic import BaseModel
+
+_logger = logging.getLogger(__name__)
+
+
+class Item(BaseModel):
+    id: int
+
+
+@Injectable()
+class ItemService:
+    def __init__(self):
+        pass
+
+
+@Controller("items")
+class ItemController:
+    def __init__(self, service: ItemService):
+        self.service = service
+
+    @Get("sync/:count")
+    def sync_items(self, count: Param[str]) -> Iterator[Item]:
+        return (Item(id=i) for i in range(int(count.data)))
+
+    @Get("async/:count")
+    async def async_items(self, count: Param[str]) -> AsyncIterator[Item]:
+        for i in range(int(count.data)):
+            await asyncio.sleep(0)
+            yield Item(id=i)
+
+    @Get("broken")
+    def broken(self) -> Iterator[Item]:
+        yield Item(id=0)
+        raise Exception("broken stream")
+
+
+@Module({"controller": ItemController, "provider": ItemService})
+class ItemModule:
+    pass
+
+
+engines = pytest.mark.parametrize(
+    "options",
+    [
+        {"engine": "blocking", "workers": 2, "mode": "thread"},
+        {"engine": "asyncio"},
+    ],
+    ids=["blocking", "asyncio"],
+)
+
+
+@pytest.mark.stream
+class TestStream:
+    @engines
+    @pytest.mark.parametrize("kind", ["sync", "async"])
+    @pytest.mark.parametrize("count", [0, 1, 10000])
+    def test_json_array(self, run_app, options, kind, count):
+        url = run_app(ItemModule, **options)
+
+        with Client() as client:
+            res = client.get(f"{url}/items/{kind}/{count}")
+            assert res.status_code == 200
+            assert res.headers["transfer-encoding"] == "chunked"
+            assert res.json() == [{"id": i} for i in range(count)]
+
+            # connection is reusable after chunked response
+            assert client.get(f"{url}/items/{kind}/1").json() == [{"id": 0}]
+
+    @engines
+    def test_ndjson(self, run_app, options):
+        url = run_app(ItemModule, **options)
+
+        with Client() as client:
+            res = client.get(
+                f"{url}/items/sync/3", headers={"Accept": "application/x-ndjson"}
+            )
+            assert res.headers["content-type"] == "application/x-ndjson"
+            assert [loads(line) for line in res.text.splitlines()] == [
+                {"id": i} for i in range(3)
+            ]
+
+    @engines
+    def test_broken_stream(self, run_app, options):
+        url = run_app(ItemModule, **options)
+
+        with Client() as client:
+            with pytest.raises(Exception):
+                client.get(f"{url}/items/broken")
@@ -1,7 +1,7 @@
 import logging
 
 import pytest
-from nestpy.common import InstanceInitiator
+from nestpy.common import Injectable, InstanceInitiator
 
 _logger = logging.getLogger(__name__)
 
@@ -27,6 +27,8 @@ class TestToken:
         instance_initiator.register_cls(test_service2_cls)
         assert instance_initiator._instance_manager.get_wrapper(test_service1_cls)
         assert instance_initiator._instance_manager.get_wrapper(test_service2_cls)
+        assert instance_initiator.is_registered(test_service1_cls)
+        assert not instance_initiator.is_registered(object)
 
     def test_register_3classes(
         self,
@@ -108,3 +110,50 @@ class TestToken:
             instance_initiator.get_or_init_instance(test_service1_cls),
             test_service1_cls,
         )
+
+    def test_circular_reference(self, instance_initiator: InstanceInitiator):
+        @Injectable()
+        class CircularService1:
+            def __init__(self, service: object):
+                self.service = service
+
+        @Injectable()
+        class CircularService2:
+            def __init__(self, service: CircularService1):
+                self.service = service
+
+        CircularService1.__init__.__annotations__["service"] = CircularService2
+
+        # registration terminates, initiation detects it
+        instance_initiator.register_cls(CircularService2)
+        with pytest.raises(ValueError):
+            instance_initiator.get_or_init_instance(CircularService2)
+
+    def test_dependencies_inspected_once(
+        self,
+        instance_initiator: InstanceInitiator,
+        test_service1_cls: type,
+        test_service2_cls: type,
+    ):
+        dependencies = instance_initiator.dependencies(test_service2_cls)
+        assert [param_cls for _, param_cls in dependencies] == [test_service1_cls]
+        assert instance_initiator.dependencies(test_service2_cls) is dependencies
+
+    def test_resolve(
+        self,
+        instance_initiator: InstanceInitiator,
+        test_service1_cls: type,
+        test_service2_cls: type,
+        test_service3_cls: type,
+    ):
+        instance_initiator.register_cls(test_service3_cls)
+        assert instance_initiator.resolve(test_service3_cls) == [
+            test_service1_cls,
+            test_service2_cls,
+            test_service3_cls,
+        ]
+        # resolved once, nothing initiated
+        assert instance_initiator.resolve(test_service3_cls) == []
+        assert not instance_initiator._instance_manager.get_wrapper(
+            test_service1_cls
+        ).instance_registered